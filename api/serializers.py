@@ -0,0 +1,90 @@
+"""Поля ответов API.
+
+Ответы собираются прямо из ``values_list()``, модели не создаются:
+каждое поле API — путь ORM и, если нужно, преобразование значения.
+``?fields=id,text`` оставляет в ответе только перечисленные поля, и
+из базы выбираются только они. Если установлен orjson, JSON кодирует
+он, иначе — стандартный ``json``; даты в обоих случаях в ISO 8601.
+"""
+import json
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def image_url(thumbnail):
+    # Оригинал загрузки хранит EXIF, в том числе координаты съёмки, поэтому
+    # наружу отдаётся только перекодированный вариант без метаданных.
+    return thumbnail or None
+
+
+class Serializer:
+    """Поля API: имя — путь ORM или пара (путь ORM, преобразование)."""
+
+    def __init__(self, **fields):
+        self.fields = {
+            name: spec if isinstance(spec, tuple) else (spec, None)
+            for name, spec in fields.items()
+        }
+
+    def select(self, fields=None):
+        """Имена полей из ``?fields=``, по умолчанию все."""
+        if not fields:
+            return list(self.fields)
+        names = list(dict.fromkeys(
+            name.strip() for name in fields.split(',') if name.strip()
+        ))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(f'Неизвестные поля: {", ".join(unknown)}.')
+        return names
+
+    def paths(self, names):
+        return [self.fields[name][0] for name in names]
+
+    def rows(self, names, values_list):
+        converters = [
+            (index, self.fields[name][1])
+            for index, name in enumerate(names)
+            if self.fields[name][1] is not None
+        ]
+        for values in values_list:
+            values = list(values[:len(names)])
+            for index, convert in converters:
+                values[index] = convert(values[index])
+            yield dict(zip(names, values))
+
+
+POSTS = Serializer(
+    id='id', text='text', pub_date='pub_date', author='author__username',
+    group='group__slug', image=('thumbnail', image_url),
+    comments_count='comments_count',
+)
+COMMENTS = Serializer(
+    id='id', post='post_id', author='author__username', text='text',
+    created='created',
+)
+GROUPS = Serializer(slug='slug', title='title', description='description')
+USERS = Serializer(
+    username='username', first_name='first_name', last_name='last_name',
+    posts_count='profile__posts_count',
+    followers_count='profile__followers_count',
+    following_count='profile__following_count',
+)
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(
+        data, default=_default, ensure_ascii=False, separators=(',', ':')
+    ).encode()
@@ -0,0 +1,138 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ApiTests.reader)
+
+    def get(self, url, client=None, **extra):
+        response = (client or self.guest_client).get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response.json()
+
+    def test_feed_pages_with_cursor(self):
+        """Лента листается курсором до конца без повторов."""
+        texts, url = [], '/api/v1/posts/?limit=2&fields=text'
+        while url:
+            data = self.get(url)
+            texts.extend(row['text'] for row in data['results'])
+            url = data['next']
+        self.assertEqual(
+            texts, [post.text for post in reversed(ApiTests.posts)]
+        )
+
+    def test_post_fields(self):
+        """Пост отдаётся со всеми полями, ?fields= оставляет нужные."""
+        post = ApiTests.posts[0]
+        data = self.get(f'/api/v1/posts/{post.pk}/')
+        self.assertEqual(data['author'], 'author')
+        self.assertEqual(data['group'], 'group')
+        self.assertIsNone(data['image'])
+        Post.objects.filter(pk=post.pk).update(
+            image='posts/photo.jpg', thumbnail='/media/variants/card.jpg'
+        )
+        self.assertEqual(
+            self.get(f'/api/v1/posts/{post.pk}/?fields=image')['image'],
+            '/media/variants/card.jpg'
+        )
+        self.assertEqual(data['pub_date'], post.pub_date.isoformat())
+        self.assertEqual(
+            self.get(f'/api/v1/posts/{post.pk}/?fields=id,author'),
+            {'id': post.pk, 'author': 'author'}
+        )
+        response = self.guest_client.get('/api/v1/posts/?fields=password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_errors_are_json(self):
+        """Ошибки отдаются в JSON."""
+        response = self.guest_client.get('/api/v1/posts/999/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Не найдено.'})
+        response = self.guest_client.get('/api/v1/follow/')
+        self.assertEqual(response.status_code, 401)
+        response = self.guest_client.delete('/api/v1/posts/')
+        self.assertEqual(response.status_code, 405)
+
+    def test_conditional_get(self):
+        """Повторный запрос с ETag получает 304, пока лента не изменилась."""
+        url = '/api/v1/groups/group/posts/'
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Ещё', author=self.author, group=self.group)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_add_comment(self):
+        """Комментарий добавляется JSON-запросом вошедшего пользователя."""
+        url = f'/api/v1/posts/{ApiTests.posts[0].pk}/comments/'
+        body = json.dumps({'text': 'Комментарий'})
+        response = self.guest_client.post(
+            url, body, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+        response = self.authorized_client.post(
+            url, body, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['author'], 'reader')
+        self.assertEqual(Comment.objects.count(), 1)
+        response = self.authorized_client.post(
+            url, '{}', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+        data = self.get(url)
+        self.assertEqual(
+            [row['text'] for row in data['results']], ['Комментарий']
+        )
+
+    def test_follow(self):
+        """Подписка через API наполняет ленту подписок."""
+        url = '/api/v1/users/author/follow/'
+        response = self.authorized_client.post(url)
+        self.assertEqual(response.json(), {'following': True})
+        self.assertTrue(Follow.objects.filter(
+            user=ApiTests.reader, author=ApiTests.author
+        ).exists())
+        data = self.get('/api/v1/follow/', self.authorized_client)
+        self.assertEqual(len(data['results']), 5)
+        self.assertEqual(
+            self.get('/api/v1/users/author/?fields=followers_count'),
+            {'followers_count': 1}
+        )
+        response = self.authorized_client.delete(url)
+        self.assertEqual(response.json(), {'following': False})
+        data = self.get('/api/v1/follow/', self.authorized_client)
+        self.assertEqual(data['results'], [])
+
+    def test_groups(self):
+        """Список групп."""
+        self.assertEqual(self.get('/api/v1/groups/'), {'results': [
+            {'slug': 'group', 'title': 'Группа', 'description': ''}
+        ]})
@@ -0,0 +1,35 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.post_list, name='post_list'),
+    path('events/', views.post_events, name='post_events'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/', views.comments, name='comments'
+    ),
+    path('groups/', views.group_list, name='group_list'),
+    path(
+        'groups/<slug:slug>/posts/', views.group_post_list,
+        name='group_post_list'
+    ),
+    path(
+        'groups/<slug:slug>/events/', views.group_events,
+        name='group_events'
+    ),
+    path('users/<str:username>/', views.user_detail, name='user_detail'),
+    path(
+        'users/<str:username>/posts/', views.user_post_list,
+        name='user_post_list'
+    ),
+    path(
+        'users/<str:username>/events/', views.user_events,
+        name='user_events'
+    ),
+    path('users/<str:username>/follow/', views.follow, name='follow'),
+    path('follow/', views.follow_feed, name='follow_feed'),
+    path('follow/events/', views.follow_events, name='follow_events'),
+]
@@ -0,0 +1,314 @@
+"""JSON API для лент, постов, комментариев и подписок.
+
+Ленты берут те же запросы, что и HTML-страницы в ``posts.views``, но
+читают только нужные поля через ``values_list()`` и листаются курсором
+(``?cursor=``, ``?limit=``). GET-ответы поддерживают ETag так же, как
+страницы сайта. Изменения требуют входа на
+сайт и CSRF-токена в заголовке ``X-CSRFToken``. Новые посты и
+комментарии лент приходят как Server-Sent Events на ``.../events/``.
+"""
+import json
+from functools import wraps
+from operator import itemgetter
+
+from django.contrib.auth import get_user_model
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from django.shortcuts import get_object_or_404
+
+from posts import events, timeline
+from posts.conditional import (
+    conditional_page, follow_state, group_state, index_state, post_id_state,
+    profile_state
+)
+from posts.counters import recount_profile
+from posts.forms import CommentForm
+from posts.metrics import query_budget
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import POSTS_PER_PAGE, CursorPaginator, cursor_fields
+from posts.replicas import replica_reads
+
+from .serializers import COMMENTS, GROUPS, POSTS, USERS, dumps
+
+User = get_user_model()
+
+MAX_LIMIT = 100
+
+
+class BadRequest(Exception):
+    pass
+
+
+def api_response(data, status=200):
+    return HttpResponse(
+        dumps(data), content_type='application/json', status=status
+    )
+
+
+def api_view(view):
+    """Отвечает на ошибки JSON, а не HTML-страницей."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return api_response({'detail': 'Не найдено.'}, 404)
+        except BadRequest as error:
+            return api_response({'detail': str(error)}, 400)
+    return wrapper
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return api_response({'detail': 'Требуется вход на сайт.'}, 401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def allow(*methods):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def selected(request, serializer):
+    try:
+        return serializer.select(request.GET.get('fields'))
+    except ValueError as error:
+        raise BadRequest(error)
+
+
+def limit(request):
+    try:
+        value = int(request.GET.get('limit', POSTS_PER_PAGE))
+    except ValueError:
+        raise BadRequest('limit должен быть числом.')
+    return min(max(value, 1), MAX_LIMIT)
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def feed(request, queryset, serializer=POSTS):
+    names = selected(request, serializer)
+    values_list = queryset.values_list(
+        *serializer.paths(names), *cursor_fields(queryset)
+    )
+    page = CursorPaginator(
+        values_list, limit(request), position=itemgetter(-2, -1)
+    ).get_page(request.GET.get('cursor'))
+    return api_response({
+        'results': list(serializer.rows(names, page)),
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+def detail(request, serializer, queryset):
+    names = selected(request, serializer)
+    values = queryset.values_list(*serializer.paths(names)).first()
+    if values is None:
+        raise Http404
+    return next(serializer.rows(names, [values]))
+
+
+def request_data(request):
+    if request.content_type != 'application/json':
+        return request.POST
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise BadRequest('Некорректный JSON.')
+    if not isinstance(data, dict):
+        raise BadRequest('Ожидается JSON-объект.')
+    return data
+
+
+@query_budget(5)
+@replica_reads
+@api_view
+@allow('GET', 'HEAD')
+@conditional_page(index_state)
+def post_list(request):
+    return feed(request, Post.objects.for_feed())
+
+
+@query_budget(5)
+@replica_reads
+@api_view
+@allow('GET', 'HEAD')
+@conditional_page(post_id_state)
+def post_detail(request, post_id):
+    return api_response(
+        detail(request, POSTS, Post.objects.filter(pk=post_id))
+    )
+
+
+@conditional_page(post_id_state)
+def comment_list(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return feed(
+        request,
+        Comment.objects.filter(post_id=post_id).order_by('-created', '-pk'),
+        COMMENTS
+    )
+
+
+@api_login_required
+def add_comment(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    form = CommentForm(request_data(request))
+    if not form.is_valid():
+        return api_response({'errors': form.errors.get_json_data()}, 400)
+    comment = form.save(commit=False)
+    comment.post = post
+    comment.author = request.user
+    comment.save()
+    return api_response(
+        detail(request, COMMENTS, Comment.objects.filter(pk=comment.pk)), 201
+    )
+
+
+@query_budget(12)
+@replica_reads
+@api_view
+@allow('GET', 'HEAD', 'POST')
+def comments(request, post_id):
+    if request.method == 'POST':
+        return add_comment(request, post_id)
+    return comment_list(request, post_id)
+
+
+@query_budget(4)
+@replica_reads
+@api_view
+@allow('GET', 'HEAD')
+def group_list(request):
+    names = selected(request, GROUPS)
+    return api_response({'results': list(GROUPS.rows(
+        names, Group.objects.order_by('title').values_list(
+            *GROUPS.paths(names)
+        )
+    ))})
+
+
+@query_budget(6)
+@replica_reads
+@api_view
+@allow('GET', 'HEAD')
+@conditional_page(group_state)
+def group_post_list(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed(request, group.posts.for_feed())
+
+
+@query_budget(5)
+@replica_reads
+@api_view
+@allow('GET', 'HEAD')
+@conditional_page(profile_state)
+def user_detail(request, username):
+    row = detail(request, USERS, User.objects.filter(username=username))
+    counters = [name for name in row if name.endswith('_count')]
+    if any(row[name] is None for name in counters):
+        # Профиль ещё не создан: пересчитываем его, как profile_for.
+        profile = recount_profile(
+            User.objects.values_list('pk', flat=True).get(username=username)
+        )
+        row.update({name: getattr(profile, name) for name in counters})
+    return api_response(row)
+
+
+@query_budget(6)
+@replica_reads
+@api_view
+@allow('GET', 'HEAD')
+@conditional_page(profile_state)
+def user_post_list(request, username):
+    user = get_object_or_404(User, username=username)
+    return feed(request, user.posts.for_feed())
+
+
+@query_budget(7)
+@replica_reads
+@api_view
+@allow('GET', 'HEAD')
+@api_login_required
+@conditional_page(follow_state)
+def follow_feed(request):
+    return feed(request, timeline.follow_feed(request.user).for_feed())
+
+
+@query_budget(13)
+@api_view
+@allow('POST', 'DELETE')
+@api_login_required
+def follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.method == 'DELETE':
+        Follow.objects.filter(user=request.user, author=author).delete()
+        return api_response({'following': False})
+    if author == request.user:
+        raise BadRequest('Нельзя подписаться на себя.')
+    Follow.objects.get_or_create(user=request.user, author=author)
+    return api_response({'following': True})
+
+
+def listen(request, **lookups):
+    last_event_id = request.META.get('HTTP_LAST_EVENT_ID', '')
+    try:
+        return events.event_stream(
+            lookups, int(last_event_id) if last_event_id.isdigit() else None
+        )
+    except events.TooManyListeners:
+        response = api_response(
+            {'detail': 'Слишком много подписчиков, повторите позже.'}, 503
+        )
+        response['Retry-After'] = 30
+        return response
+
+
+@query_budget(2)
+@api_view
+@allow('GET')
+def post_events(request):
+    return listen(request)
+
+
+@query_budget(4)
+@api_view
+@allow('GET')
+def group_events(request, slug):
+    return listen(
+        request, group_id=get_object_or_404(Group, slug=slug).pk
+    )
+
+
+@query_budget(4)
+@api_view
+@allow('GET')
+def user_events(request, username):
+    return listen(
+        request, author_id=get_object_or_404(User, username=username).pk
+    )
+
+
+@query_budget(6)
+@api_view
+@allow('GET')
+@api_login_required
+def follow_events(request):
+    return listen(request, author_id__in=Follow.objects.filter(
+        user=request.user
+    ).values_list('author_id', flat=True))
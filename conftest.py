@@ -0,0 +1,10 @@
+import pytest
+from django.test import override_settings
+
+from yatube.testing import TEST_SETTINGS
+
+
+@pytest.fixture(autouse=True, scope='session')
+def test_settings():
+    with override_settings(**TEST_SETTINGS):
+        yield
@@ -0,0 +1,38 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'task', 'queue', 'priority', 'status', 'attempts',
+                    'run_at', 'locked_by')
+    list_filter = ('status', 'queue')
+    search_fields = ('task', 'key')
+    fields = ('task', 'args', 'key', 'queue', 'priority', 'status',
+              'attempts', 'max_attempts', 'run_at', 'locked_by', 'locked_at',
+              'created', 'error')
+    readonly_fields = fields
+    actions = ('retry',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def retry(self, request, queryset):
+        # Задачу, чей ключ уже снова в очереди, повторять не нужно.
+        updated = queryset.filter(status=Job.FAILED).exclude(
+            key__in=Job.objects.filter(
+                status=Job.QUEUED, key__isnull=False
+            ).values('key')
+        ).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(),
+            locked_by='', locked_at=None
+        )
+        self.message_user(request, f'Снова в очереди: {updated}')
+    retry.short_description = 'Повторить упавшие задачи'
+
+
+admin.site.register(Job, JobAdmin)
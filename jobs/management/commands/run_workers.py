@@ -0,0 +1,78 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import work
+
+
+def serve(queues, stop, burst):
+    # Сигналы обрабатывает родитель и выставляет stop: обработчик сигнала
+    # не может сам вызвать stop.set(), пока процесс ждёт в stop.wait().
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    work(queues, stop, burst)
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает пул процессов-воркеров очереди задач. По SIGTERM или '
+        'Ctrl+C воркеры доделывают текущую задачу и выходят.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2)
+        parser.add_argument(
+            '--queues', nargs='+', choices=list(settings.JOBS_QUEUES),
+            default=list(settings.JOBS_QUEUES)
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда готовых задач не останется.'
+        )
+
+    def handle(self, *args, **options):
+        queues, burst = options['queues'], options['burst']
+        if options['concurrency'] == 1:
+            done = work(queues, threading.Event(), burst)
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        connections.close_all()
+        processes = [
+            self.start(context, queues, stop, burst)
+            for _ in range(options['concurrency'])
+        ]
+        try:
+            while not stop.is_set() and any(
+                process.is_alive() for process in processes
+            ):
+                for number, process in enumerate(processes):
+                    # Упавший воркер перезапускается; с --burst вышедший
+                    # воркер означает, что очередь пуста.
+                    if not process.is_alive() and not burst:
+                        self.stderr.write(
+                            f'Воркер {process.pid} завершился с кодом '
+                            f'{process.exitcode}, перезапуск'
+                        )
+                        processes[number] = self.start(
+                            context, queues, stop, burst
+                        )
+                stop.wait(1)
+        except KeyboardInterrupt:
+            pass
+        stop.set()
+        for process in processes:
+            process.join()
+
+    def start(self, context, queues, stop, burst):
+        process = context.Process(
+            target=serve, args=(queues, stop, burst), daemon=True
+        )
+        process.start()
+        return process
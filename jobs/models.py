@@ -0,0 +1,67 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача: функция ``task`` с аргументами ``args`` (JSON).
+
+    Выполненные задачи удаляются, упавшие после ``max_attempts`` попыток
+    остаются со статусом ``failed`` и текстом ошибки. Задач с одинаковым
+    ключом ``key`` в очереди может быть только одна.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'), (RUNNING, 'Выполняется'), (FAILED, 'Ошибка')
+    )
+
+    queue = models.CharField(verbose_name='Очередь', max_length=50)
+    priority = models.SmallIntegerField(verbose_name='Приоритет', default=0)
+    task = models.CharField(verbose_name='Задача', max_length=200)
+    args = models.TextField(verbose_name='Аргументы (JSON)', default='[]')
+    key = models.CharField(
+        verbose_name='Ключ', max_length=200, blank=True, null=True
+    )
+    status = models.CharField(
+        verbose_name='Статус', max_length=10, choices=STATUSES,
+        default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток', default=0
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток не больше', default=5
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Выполнить после', default=timezone.now
+    )
+    locked_by = models.CharField(
+        verbose_name='Воркер', max_length=100, blank=True
+    )
+    locked_at = models.DateTimeField(
+        verbose_name='Взята', blank=True, null=True
+    )
+    error = models.TextField(verbose_name='Ошибка', blank=True)
+    created = models.DateTimeField(verbose_name='Создана', auto_now_add=True)
+
+    class Meta:
+        ordering = ['-priority', 'run_at', 'pk']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='job_claim_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'], condition=Q(status='queued'),
+                name='job_queued_key_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
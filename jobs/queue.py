@@ -0,0 +1,174 @@
+"""Очередь фоновых задач в таблице ``Job``.
+
+Обработчик запроса только вызывает ``enqueue()``: строка задачи пишется в
+той же транзакции, что и данные, и воркер увидит её после коммита.
+Воркеры (``manage.py run_workers``) забирают задачи по одной: сначала из
+очередей с большим приоритетом (``JOBS_QUEUES``), затем по времени.
+Там, где база умеет ``SELECT ... FOR UPDATE SKIP LOCKED``, выборка не
+ждёт чужих блокировок; в SQLite транзакция начинается с
+``BEGIN IMMEDIATE`` (бэкенд ``yatube.sqlite``), поэтому две выборки не
+пересекаются. Упавшая задача повторяется через растущую паузу, задача
+умершего воркера возвращается в очередь через ``JOBS_LEASE`` секунд.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    IntegrityError, close_old_connections, connection, transaction
+)
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 'default'
+
+
+def task_name(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task, *args, queue=DEFAULT_QUEUE, priority=None, key=None,
+            delay=0, max_attempts=None):
+    """Ставит ``task(*args)`` в очередь; аргументы должны сериализоваться
+    в JSON.
+
+    Если задача с тем же ``key`` уже ждёт в очереди, новая не создаётся и
+    возвращается ``None``.
+    """
+    if queue not in settings.JOBS_QUEUES:
+        raise ValueError(f'Неизвестная очередь: {queue}')
+    job = Job(
+        queue=queue, task=task_name(task), args=json.dumps(args), key=key,
+        priority=(
+            settings.JOBS_QUEUES[queue] if priority is None else priority
+        ),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None
+    return job
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(queues, worker):
+    """Забирает самую приоритетную готовую задачу или возвращает None."""
+    now = timezone.now()
+    ready = Job.objects.filter(
+        status=Job.QUEUED, queue__in=queues, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'pk')
+    # Пустая очередь проверяется без транзакции на запись.
+    if not ready.exists():
+        return None
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            ready = ready.select_for_update(skip_locked=True)
+        job_id = ready.values_list('pk', flat=True).first()
+        if job_id is None or not Job.objects.filter(
+            pk=job_id, status=Job.QUEUED
+        ).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now,
+            attempts=F('attempts') + 1
+        ):
+            return None
+    return Job.objects.get(pk=job_id)
+
+
+def backoff(attempts, delay=None, max_delay=None):
+    """Пауза перед следующей попыткой в секундах, с разбросом ±25%."""
+    delay = min(
+        (delay or settings.JOBS_RETRY_DELAY) * 2 ** (attempts - 1),
+        max_delay or settings.JOBS_RETRY_MAX_DELAY
+    )
+    return delay * random.uniform(0.75, 1.25)
+
+
+def requeue(jobs, **fields):
+    # Если задачу с тем же ключом уже поставили заново, повтор не нужен.
+    with transaction.atomic():
+        jobs.filter(key__in=Job.objects.filter(
+            status=Job.QUEUED
+        ).values('key')).delete()
+        return jobs.update(
+            status=Job.QUEUED, locked_by='', locked_at=None, **fields
+        )
+
+
+def run(job):
+    """Выполняет задачу; при успехе удаляет её, при ошибке откладывает
+    повтор или помечает задачу упавшей."""
+    mine = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    try:
+        import_string(job.task)(*json.loads(job.args))
+    except Exception:
+        logger.exception('Задача %s упала', job)
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            mine.update(status=Job.FAILED, error=error, locked_at=None)
+            return False
+        requeue(mine, error=error, run_at=timezone.now() + timedelta(
+            seconds=backoff(job.attempts)
+        ))
+        return False
+    mine.delete()
+    return True
+
+
+def reclaim():
+    """Возвращает в очередь задачи воркеров, не закончивших их за
+    ``JOBS_LEASE`` секунд; исчерпавшие попытки помечаются упавшими."""
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=settings.JOBS_LEASE)
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, error='Воркер не завершил задачу', locked_at=None
+    )
+    return requeue(stale)
+
+
+def work(queues, stop, burst=False):
+    """Цикл воркера: выполняет задачи, пока не выставлен ``stop``.
+
+    С ``burst`` воркер выходит, когда готовых задач не осталось.
+    Возвращает число выполненных задач.
+    """
+    worker = worker_name()
+    done = 0
+    next_reclaim = 0
+    while not stop.is_set():
+        close_old_connections()
+        if time.monotonic() >= next_reclaim:
+            reclaim()
+            next_reclaim = time.monotonic() + settings.JOBS_LEASE / 10
+        job = claim(queues, worker)
+        if job is None:
+            if burst:
+                break
+            stop.wait(settings.JOBS_POLL_INTERVAL)
+            continue
+        done += run(job)
+    close_old_connections()
+    return done
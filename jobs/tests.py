@@ -0,0 +1,82 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim, enqueue, reclaim, run, work
+
+CALLS = []
+
+
+def record(value):
+    CALLS.append(value)
+
+
+def explode():
+    raise RuntimeError('Сбой')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_runs_by_priority_and_deletes_done(self):
+        """Сначала очередь с большим приоритетом; выполненные удаляются."""
+        enqueue(record, 'default')
+        enqueue(record, 'later', delay=60)
+        enqueue(record, 'mail', queue='mail')
+        self.assertEqual(work(['default', 'mail'], threading.Event(), True), 2)
+        self.assertEqual(CALLS, ['mail', 'default'])
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+    def test_key_deduplicates_queued_jobs(self):
+        """Ключ не даёт поставить в очередь вторую такую же задачу."""
+        self.assertIsNotNone(enqueue(record, 1, key='k'))
+        self.assertIsNone(enqueue(record, 2, key='k'))
+        job = claim(['default'], 'worker')
+        self.assertIsNotNone(enqueue(record, 3, key='k'))
+        run(job)
+        self.assertEqual(CALLS, [1])
+        self.assertEqual(Job.objects.count(), 1)
+        with self.assertRaises(ValueError):
+            enqueue(record, queue='missing')
+
+    @override_settings(JOBS_RETRY_DELAY=10)
+    def test_retries_with_backoff_then_fails(self):
+        """Упавшая задача откладывается всё дольше и в конце остаётся
+        с ошибкой."""
+        enqueue(explode, max_attempts=2)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertFalse(run(claim(['default'], 'worker')))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=7))
+        self.assertIsNone(claim(['default'], 'worker'))
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run(claim(['default'], 'worker'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn('RuntimeError', job.error)
+
+    @override_settings(JOBS_LEASE=60)
+    def test_reclaims_abandoned_jobs(self):
+        """Задача умершего воркера возвращается в очередь."""
+        enqueue(record, 1)
+        claim(['default'], 'dead')
+        self.assertEqual(reclaim(), 0)
+        Job.objects.update(locked_at=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(reclaim(), 1)
+        self.assertEqual(claim(['default'], 'alive').attempts, 2)
+
+    def test_run_workers_burst(self):
+        """run_workers --burst разбирает очередь и выходит."""
+        enqueue(record, 'job')
+        with mock.patch('sys.stdout'):
+            call_command('run_workers', concurrency=1, burst=True)
+        self.assertEqual(CALLS, ['job'])
+        self.assertFalse(Job.objects.exists())
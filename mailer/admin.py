@@ -0,0 +1,34 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Message
+from .spool import schedule_delivery
+
+
+class MessageAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'subject', 'from_email', 'recipients', 'status',
+                    'attempts', 'run_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    fields = ('subject', 'from_email', 'recipients', 'status', 'attempts',
+              'run_at', 'locked_by', 'locked_at', 'created', 'error')
+    readonly_fields = fields
+    actions = ('retry',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def retry(self, request, queryset):
+        updated = queryset.filter(status=Message.FAILED).update(
+            status=Message.QUEUED, attempts=0, run_at=timezone.now()
+        )
+        if updated:
+            schedule_delivery()
+        self.message_user(request, f'Снова в очереди: {updated}')
+    retry.short_description = 'Отправить заново'
+
+
+admin.site.register(Message, MessageAdmin)
@@ -0,0 +1,29 @@
+import json
+
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .models import Message
+from .spool import schedule_delivery
+
+
+class SpoolBackend(BaseEmailBackend):
+    """EMAIL_BACKEND, который только кладёт письма в очередь ``Message``.
+
+    Отправляет их задача ``mailer.spool.deliver`` через
+    ``MAIL_SPOOL_BACKEND``, поэтому запрос не ждёт почтового сервера.
+    """
+
+    def send_messages(self, email_messages):
+        rows = [
+            Message(
+                from_email=message.from_email,
+                recipients=json.dumps(message.recipients()),
+                subject=message.subject[:255],
+                message=message.message().as_bytes(),
+            )
+            for message in email_messages if message.recipients()
+        ]
+        if rows:
+            Message.objects.bulk_create(rows)
+            schedule_delivery()
+        return len(rows)
@@ -0,0 +1,33 @@
+import time
+from email.header import decode_header, make_header
+
+from django.core.management.base import BaseCommand
+
+from mailer.sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает локальный SMTP-сервер, который принимает письма и '
+        'печатает их заголовки. Для проверки почты без настоящего сервера: '
+        'YATUBE_MAIL_BACKEND=smtp YATUBE_EMAIL_PORT=1025.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=1025)
+
+    def handle(self, *args, **options):
+        with SMTPSink(port=options['port']) as sink:
+            self.stdout.write(f'SMTP на {sink.host}:{sink.port}')
+            shown = 0
+            try:
+                while True:
+                    time.sleep(0.5)
+                    for sender, recipients, message in sink.messages[shown:]:
+                        self.stdout.write(
+                            f'{sender} -> {", ".join(recipients)}: '
+                            f'{make_header(decode_header(message["Subject"]))}'
+                        )
+                    shown = len(sink.messages)
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,46 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Message(models.Model):
+    """Письмо в очереди на отправку: готовый MIME и адреса конверта."""
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'), (SENDING, 'Отправляется'), (FAILED, 'Ошибка')
+    )
+
+    from_email = models.CharField(verbose_name='Отправитель', max_length=254)
+    recipients = models.TextField(verbose_name='Получатели (JSON)')
+    subject = models.CharField(verbose_name='Тема', max_length=255)
+    message = models.BinaryField(verbose_name='Письмо (MIME)')
+    status = models.CharField(
+        verbose_name='Статус', max_length=10, choices=STATUSES,
+        default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток', default=0
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Отправить после', default=timezone.now
+    )
+    locked_by = models.CharField(
+        verbose_name='Воркер', max_length=100, blank=True
+    )
+    locked_at = models.DateTimeField(
+        verbose_name='Взято', blank=True, null=True
+    )
+    error = models.TextField(verbose_name='Ошибка', blank=True)
+    created = models.DateTimeField(verbose_name='Создано', auto_now_add=True)
+
+    class Meta:
+        ordering = ['run_at', 'pk']
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='mail_ready_idx'),
+        ]
+
+    def __str__(self):
+        return self.subject
@@ -0,0 +1,108 @@
+"""Локальный SMTP-сервер, который принимает письма и никуда их не шлёт.
+
+Нужен тестам и для ручной проверки почты (``manage.py smtp_sink``).
+Понимает ровно то, что использует ``smtplib``: EHLO/HELO, MAIL, RCPT,
+DATA, RSET, NOOP и QUIT. В ``replies`` можно положить коды ответа на
+DATA, чтобы изобразить временные (4xx) и постоянные (5xx) ошибки.
+"""
+import socketserver
+import threading
+from collections import deque
+from email import message_from_bytes
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.sink = self.server.sink
+        with self.sink.lock:
+            self.sink.connections += 1
+        self.sender, self.recipients = None, []
+        self.reply('220 yatube-sink ESMTP')
+        for line in self.rfile:
+            verb, _, argument = line.decode('latin-1').strip().partition(' ')
+            command = getattr(self, f'smtp_{verb.lower()}', None)
+            if command is None:
+                self.reply('502 command not implemented')
+            elif command(argument):
+                return
+
+    def smtp_ehlo(self, argument):
+        self.reply('250-yatube-sink')
+        self.reply('250 8BITMIME')
+
+    def smtp_helo(self, argument):
+        self.reply('250 yatube-sink')
+
+    def smtp_mail(self, argument):
+        self.sender, self.recipients = argument.split(':', 1)[1], []
+        self.reply('250 ok')
+
+    def smtp_rcpt(self, argument):
+        self.recipients.append(argument.split(':', 1)[1])
+        self.reply('250 ok')
+
+    def smtp_data(self, argument):
+        self.reply('354 end with .')
+        lines = []
+        for line in self.rfile:
+            if line in (b'.\r\n', b'.\n'):
+                break
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        with self.sink.lock:
+            code = self.sink.replies.popleft() if self.sink.replies else 250
+            if code == 250:
+                self.sink.messages.append((
+                    self.sender, self.recipients,
+                    message_from_bytes(b''.join(lines))
+                ))
+        self.sender, self.recipients = None, []
+        self.reply(f'{code} {"ok" if code == 250 else "rejected"}')
+
+    def smtp_rset(self, argument):
+        self.sender, self.recipients = None, []
+        self.reply('250 ok')
+
+    def smtp_noop(self, argument):
+        self.reply('250 ok')
+
+    def smtp_quit(self, argument):
+        self.reply('221 bye')
+        return True
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """Сервер в фоновом потоке: ``with SMTPSink() as sink: sink.port``."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.lock = threading.Lock()
+        self.messages = []
+        self.replies = deque()
+        self.connections = 0
+        self.server = SMTPServer((host, port), SMTPHandler)
+        self.server.sink = self
+        self.host, self.port = self.server.server_address[:2]
+
+    def start(self):
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,235 @@
+"""Отправка писем из очереди ``Message``.
+
+``SpoolBackend`` пишет письма в таблицу и ставит задачу ``deliver`` в
+очередь ``mail``. Воркер забирает письма пачками по ``MAIL_BATCH_SIZE``
+и отправляет их через одно соединение ``MAIL_SPOOL_BACKEND``, которое
+живёт всё время жизни процесса воркера и переоткрывается после обрыва.
+Не чаще ``MAIL_RATE_LIMIT`` писем в секунду на воркер. Временные ошибки
+(код SMTP 4xx, обрыв или недоступный сервер) повторяются через растущую
+паузу до ``MAIL_MAX_ATTEMPTS`` раз, постоянные (5xx) сразу помечают
+письмо упавшим.
+"""
+import json
+import logging
+import smtplib
+import time
+from datetime import timedelta
+from email import message_from_bytes
+from email.message import Message as MIMEMessage
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.message import MIMEMixin
+from django.db import connection as db, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from jobs.queue import backoff, enqueue, worker_name
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+_connection = None
+_last_sent = 0
+
+
+class StoredMIME(MIMEMixin, MIMEMessage):
+    """Разобранный MIME с ``as_bytes(linesep=...)``, как у писем Django."""
+
+
+class StoredMessage(EmailMessage):
+    """Письмо из очереди: MIME уже собран, получатели — из конверта."""
+
+    def __init__(self, row):
+        super().__init__(
+            from_email=row.from_email, to=json.loads(row.recipients)
+        )
+        self.raw = bytes(row.message)
+
+    def message(self):
+        return message_from_bytes(self.raw, _class=StoredMIME)
+
+
+def schedule_delivery(delay=0):
+    # Отложенный повтор не должен задерживать новые письма, поэтому у
+    # него свой ключ.
+    enqueue(
+        deliver, queue='mail', delay=delay,
+        key='mail:retry' if delay else 'mail:deliver'
+    )
+
+
+def open_connection():
+    global _connection
+    if _connection is None:
+        _connection = get_connection(settings.MAIL_SPOOL_BACKEND)
+        _connection.open()
+    return _connection
+
+
+def close_connection():
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        except Exception:
+            pass
+        _connection = None
+
+
+def throttle():
+    global _last_sent
+    pause = _last_sent + 1 / settings.MAIL_RATE_LIMIT - time.monotonic()
+    if pause > 0:
+        time.sleep(pause)
+    _last_sent = time.monotonic()
+
+
+def is_temporary(error):
+    """Стоит ли повторить отправку позже."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return any(code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPException, OSError))
+
+
+def is_disconnect(error):
+    return isinstance(error, smtplib.SMTPServerDisconnected) or (
+        isinstance(error, OSError)
+        and not isinstance(error, smtplib.SMTPException)
+    )
+
+
+def claim(worker):
+    """Забирает пачку готовых писем или возвращает пустой список."""
+    now = timezone.now()
+    ready = Message.objects.filter(
+        status=Message.QUEUED, run_at__lte=now
+    ).order_by('run_at', 'pk')
+    if not ready.exists():
+        return []
+    with transaction.atomic():
+        if db.features.has_select_for_update_skip_locked:
+            ready = ready.select_for_update(skip_locked=True)
+        ids = list(
+            ready.values_list('pk', flat=True)[:settings.MAIL_BATCH_SIZE]
+        )
+        Message.objects.filter(pk__in=ids, status=Message.QUEUED).update(
+            status=Message.SENDING, locked_by=worker, locked_at=now
+        )
+    return list(Message.objects.filter(
+        pk__in=ids, status=Message.SENDING, locked_by=worker, locked_at=now
+    ))
+
+
+def defer(row, error):
+    attempts = row.attempts + 1
+    fields = {
+        'attempts': attempts, 'error': error, 'locked_by': '',
+        'locked_at': None,
+    }
+    if attempts >= settings.MAIL_MAX_ATTEMPTS:
+        fields['status'] = Message.FAILED
+    else:
+        fields['status'] = Message.QUEUED
+        fields['run_at'] = timezone.now() + timedelta(seconds=backoff(
+            attempts, settings.MAIL_RETRY_DELAY, settings.MAIL_RETRY_MAX_DELAY
+        ))
+    Message.objects.filter(pk=row.pk).update(**fields)
+
+
+def postpone(rows):
+    """Возвращает письма в очередь, не тратя попыток: сервер недоступен."""
+    Message.objects.filter(pk__in=[row.pk for row in rows]).update(
+        status=Message.QUEUED, locked_by='', locked_at=None,
+        run_at=timezone.now() + timedelta(seconds=settings.MAIL_RETRY_DELAY)
+    )
+
+
+def send(row):
+    message = StoredMessage(row)
+    try:
+        open_connection().send_messages([message])
+    except smtplib.SMTPServerDisconnected:
+        # Сервер закрыл простаивавшее соединение: одна попытка заново.
+        close_connection()
+        open_connection().send_messages([message])
+
+
+def send_batch(rows):
+    """Отправляет пачку через общее соединение; возвращает число
+    отправленных писем."""
+    try:
+        open_connection()
+    except Exception as error:
+        logger.warning('Почтовый сервер недоступен: %r', error)
+        close_connection()
+        postpone(rows)
+        return 0
+    sent = 0
+    for number, row in enumerate(rows):
+        throttle()
+        try:
+            send(row)
+        except Exception as error:
+            logger.warning('Письмо %s не отправлено: %r', row.pk, error)
+            if not is_temporary(error):
+                Message.objects.filter(pk=row.pk).update(
+                    status=Message.FAILED, error=repr(error),
+                    attempts=row.attempts + 1
+                )
+                continue
+            defer(row, repr(error))
+            if is_disconnect(error):
+                close_connection()
+                postpone(rows[number + 1:])
+                break
+            continue
+        Message.objects.filter(pk=row.pk).delete()
+        sent += 1
+    return sent
+
+
+def release_stale():
+    Message.objects.filter(
+        status=Message.SENDING,
+        locked_at__lt=timezone.now() - timedelta(seconds=settings.JOBS_LEASE)
+    ).update(status=Message.QUEUED, locked_by='', locked_at=None)
+
+
+def next_delivery():
+    """Когда появятся готовые письма: ближайший отложенный повтор или
+    истечение аренды писем, которые держит другой (возможно, умерший)
+    воркер."""
+    lease = timedelta(seconds=settings.JOBS_LEASE)
+    times = Message.objects.aggregate(
+        queued=Min('run_at', filter=Q(status=Message.QUEUED)),
+        sending=Min('locked_at', filter=Q(status=Message.SENDING)),
+    )
+    if times['sending'] is not None:
+        times['sending'] += lease
+    return min(filter(None, times.values()), default=None)
+
+
+def deliver():
+    """Задача очереди ``mail``: отправляет все готовые письма и ставит
+    повтор на время ближайшего отложенного."""
+    release_stale()
+    worker = worker_name()
+    deadline = time.monotonic() + settings.JOBS_LEASE / 2
+    sent = 0
+    rows = claim(worker)
+    while rows:
+        sent += send_batch(rows)
+        if time.monotonic() >= deadline:
+            schedule_delivery()
+            return sent
+        rows = claim(worker)
+    next_try = next_delivery()
+    if next_try is not None:
+        schedule_delivery(
+            max((next_try - timezone.now()).total_seconds(), 0) + 1
+        )
+    return sent
@@ -0,0 +1,140 @@
+import socket
+from datetime import timedelta
+from email.header import decode_header, make_header
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from mailer import spool
+from mailer.models import Message
+from mailer.sink import SMTPSink
+
+User = get_user_model()
+
+SPOOL = 'mailer.backends.SpoolBackend'
+SMTP = 'django.core.mail.backends.smtp.EmailBackend'
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+def closed_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+@override_settings(
+    EMAIL_BACKEND=SPOOL, MAIL_SPOOL_BACKEND=SMTP, EMAIL_HOST='127.0.0.1',
+    MAIL_RATE_LIMIT=1000, MAIL_RETRY_DELAY=60
+)
+class SpoolTests(TestCase):
+    def setUp(self):
+        self.sink = SMTPSink().start()
+        self.settings_override = self.settings(EMAIL_PORT=self.sink.port)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        spool.close_connection()
+        self.settings_override.disable()
+        self.sink.stop()
+
+    def send(self, count=1):
+        for number in range(count):
+            mail.send_mail(
+                f'Письмо {number}', 'Привет, Yatube!', 'from@yatube.ru',
+                [f'user{number}@yandex.ru']
+            )
+
+    def test_batch_over_one_connection(self):
+        """Письма ждут в очереди и уходят через одно соединение."""
+        self.send(3)
+        self.assertEqual(Message.objects.count(), 3)
+        self.assertEqual(self.sink.messages, [])
+        self.assertEqual(Job.objects.get().queue, 'mail')
+        self.assertEqual(spool.deliver(), 3)
+        self.send()
+        self.assertEqual(spool.deliver(), 1)
+        self.assertEqual(self.sink.connections, 1)
+        self.assertFalse(Message.objects.exists())
+        sender, recipients, message = self.sink.messages[0]
+        self.assertEqual(recipients, ['<user0@yandex.ru>'])
+        self.assertEqual(
+            str(make_header(decode_header(message['Subject']))), 'Письмо 0'
+        )
+        self.assertEqual(
+            message.get_payload(decode=True).decode().strip(),
+            'Привет, Yatube!'
+        )
+
+    def test_temporary_error_is_retried(self):
+        """Ответ 4xx откладывает письмо и ставит повтор, 5xx — ошибка."""
+        self.send(3)
+        self.sink.replies.extend([451, 550])
+        with self.assertLogs('mailer.spool', 'WARNING'):
+            self.assertEqual(spool.deliver(), 1)
+        deferred, failed = Message.objects.order_by('pk')
+        self.assertEqual(
+            (deferred.status, deferred.attempts), (Message.QUEUED, 1)
+        )
+        self.assertGreater(deferred.run_at, timezone.now())
+        self.assertEqual(failed.status, Message.FAILED)
+        self.assertTrue(Job.objects.filter(key='mail:retry').exists())
+        Message.objects.filter(pk=deferred.pk).update(run_at=timezone.now())
+        self.assertEqual(spool.deliver(), 1)
+        self.assertEqual(len(self.sink.messages), 2)
+
+    def test_server_down_keeps_attempts(self):
+        """Недоступный сервер откладывает пачку, не тратя попыток."""
+        self.send(2)
+        with self.settings(EMAIL_PORT=closed_port()):
+            with self.assertLogs('mailer.spool', 'WARNING'):
+                self.assertEqual(spool.deliver(), 0)
+        self.assertEqual(
+            list(Message.objects.values_list('status', 'attempts')),
+            [(Message.QUEUED, 0)] * 2
+        )
+
+    @override_settings(JOBS_LEASE=60)
+    def test_abandoned_batch_is_retried(self):
+        """Письма умершего воркера отправляются после истечения аренды."""
+        self.send(2)
+        Job.objects.all().delete()
+        Message.objects.filter(pk=Message.objects.first().pk).update(
+            status=Message.SENDING, locked_by='dead',
+            locked_at=timezone.now() - timedelta(seconds=30)
+        )
+        self.assertEqual(spool.deliver(), 1)
+        retry = Job.objects.get(key='mail:retry')
+        self.assertAlmostEqual(
+            (retry.run_at - timezone.now()).total_seconds(), 31, delta=5
+        )
+        Message.objects.update(
+            locked_at=timezone.now() - timedelta(seconds=61)
+        )
+        self.assertEqual(spool.deliver(), 1)
+        self.assertFalse(Message.objects.exists())
+
+    @override_settings(MAIL_SPOOL_BACKEND=LOCMEM)
+    def test_signup_and_password_reset_do_not_send(self):
+        """Регистрация и сброс пароля только ставят письма в очередь."""
+        response = Client().post('/auth/signup/', {
+            'username': 'newbie', 'email': 'newbie@yandex.ru',
+            'password1': 'Pa55-word-long', 'password2': 'Pa55-word-long',
+        })
+        self.assertEqual(response.status_code, 302)
+        Client().post(
+            '/auth/password_reset/', {'email': 'newbie@yandex.ru'}
+        )
+        self.assertEqual(Message.objects.count(), 2)
+        self.assertEqual(mail.outbox, [])
+        spool.deliver()
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['newbie@yandex.ru']] * 2
+        )
+        self.assertIn(
+            'newbie',
+            mail.outbox[0].message().get_payload(decode=True).decode()
+        )
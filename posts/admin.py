@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.utils.html import format_html
 
-from .models import Comment, Follow, Group, Post
+from .models import Comment, Follow, Group, Post, SlowRequest
+from .profiling import read_profile
+from .search import matching_comment_ids, matching_post_ids
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,6 +12,11 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=matching_post_ids(search_term)), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
@@ -23,13 +31,46 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ("created",)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            pk__in=matching_comment_ids(search_term)
+        ), False
+
 
 class FollowAdmin (admin.ModelAdmin):
     list_display = ("pk", "user", "author")
     empty_value_display = '-пусто-'
 
 
+class SlowRequestAdmin(admin.ModelAdmin):
+    STACKS_SHOWN = 50
+
+    list_display = ('view', 'duration_ms', 'samples', 'method', 'path',
+                    'created')
+    list_filter = ('view',)
+    ordering = ('-duration_ms',)
+    fields = ('view', 'method', 'path', 'duration_ms', 'samples', 'created',
+              'profile', 'stacks')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def stacks(self, obj):
+        lines = read_profile(obj.profile).splitlines()
+        return format_html('<pre>{}</pre>', '\n'.join(
+            lines[:SlowRequestAdmin.STACKS_SHOWN]
+        ))
+    stacks.short_description = 'Самые частые стеки'
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(SlowRequest, SlowRequestAdmin)
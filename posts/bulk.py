@@ -0,0 +1,444 @@
+"""Потоковый импорт и экспорт пользователей, групп, постов, комментариев
+и подписок.
+
+Одна запись — одна строка NDJSON или CSV (колонка ``model`` и общая для
+всех моделей шапка), записи идут в порядке зависимостей. Авторы и группы
+ссылаются по username и slug и разрешаются пачками через кэш, посты и
+комментарии сохраняют свои id. Запись с занятым id считается уже
+загруженной, только если совпадают автор, дата и текст; иначе она
+получает новый id, а комментарии её поста переносятся вслед за ним.
+Импорт сохраняет записи ``bulk_create``,
+каждая пачка — в своей транзакции. Сигналы при этом не срабатывают,
+поэтому их последствия (счётчики, лента подписок, поиск, ссылки на
+медиа, кэши) применяются к пачке целиком, если не передан
+``signals=False``. Миниатюры строит ``manage.py generate_thumbnails``.
+"""
+import csv
+import datetime
+import gzip
+import json
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from users.models import Profile
+
+from . import counters, feed_cache, page_cache, search, storage, timeline
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FIELDS = {
+    'user': (
+        'username', 'password', 'first_name', 'last_name', 'email',
+        'date_joined',
+    ),
+    'group': ('slug', 'title', 'description'),
+    'post': ('id', 'text', 'pub_date', 'author', 'group', 'image'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+    'follow': ('user', 'author'),
+}
+MODELS = tuple(FIELDS)
+CSV_COLUMNS = ('model', *dict.fromkeys(
+    field for fields in FIELDS.values() for field in fields
+))
+LOOKUP_CACHE_SIZE = 100_000
+
+
+def _exported(model, names):
+    if model == 'user':
+        return User.objects.values_list(*names).order_by('pk')
+    return {
+        'group': Group.objects.values_list(*FIELDS['group']),
+        'post': Post.objects.values_list(
+            'pk', 'text', 'pub_date', 'author__username', 'group__slug',
+            'image'
+        ),
+        'comment': Comment.objects.values_list(
+            'pk', 'post_id', 'author__username', 'text', 'created'
+        ),
+        'follow': Follow.objects.values_list(
+            'user__username', 'author__username'
+        ),
+    }[model].order_by('pk')
+
+
+def export_records(models=MODELS, chunk_size=2000, passwords=False):
+    """Записи выгрузки. Хеши паролей попадают в неё только с
+    ``passwords``, иначе пользователи загружаются с непригодным паролем."""
+    for model in models:
+        names = FIELDS[model]
+        if model == 'user' and not passwords:
+            names = tuple(name for name in names if name != 'password')
+        for row in _exported(model, names).iterator(chunk_size=chunk_size):
+            yield model, dict(zip(names, row))
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return '' if value is None else value
+
+
+def write_ndjson(records, stream):
+    for model, fields in records:
+        stream.write(json.dumps(
+            {'model': model, **fields}, ensure_ascii=False, default=_encode
+        ) + '\n')
+
+
+def write_csv(records, stream):
+    writer = csv.writer(stream)
+    writer.writerow(CSV_COLUMNS)
+    for model, fields in records:
+        writer.writerow(
+            [model, *(_encode(fields.get(name)) for name in CSV_COLUMNS[1:])]
+        )
+
+
+def read_ndjson(stream):
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            fields = json.loads(line)
+            yield fields.pop('model'), fields
+        except (ValueError, KeyError, AttributeError):
+            raise ValueError(f'Строка {number}: некорректная запись')
+
+
+def read_csv(stream):
+    for fields in csv.DictReader(stream):
+        yield fields.pop('model'), fields
+
+
+WRITERS = {'ndjson': write_ndjson, 'csv': write_csv}
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+def detect_format(path):
+    if path.endswith('.gz'):
+        path = path[:-len('.gz')]
+    return 'csv' if path.endswith('.csv') else 'ndjson'
+
+
+def open_file(path, mode):
+    """Открывает файл как текст; ``.gz`` сжимается на лету."""
+    if path.endswith('.gz'):
+        return gzip.open(path, f'{mode}t', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Позволяет bulk_create сохранить заданные даты полей auto_now_add."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'Некорректная дата: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+class Lookup:
+    """Кэш соответствия ключа записи её первичному ключу.
+
+    Ключи, которых нет в кэше, читаются одним запросом на пачку. Кэш
+    ограничен ``LOOKUP_CACHE_SIZE`` и при переполнении сбрасывается.
+    """
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.cache = {}
+
+    def resolve(self, keys):
+        keys = {key for key in keys if key not in (None, '')}
+        if len(self.cache) + len(keys) > LOOKUP_CACHE_SIZE:
+            self.cache.clear()
+        missing = keys - self.cache.keys()
+        if missing:
+            self.cache.update(
+                self.model.objects.filter(**{f'{self.field}__in': missing})
+                .values_list(self.field, 'pk')
+            )
+        return self.cache
+
+
+class Importer:
+    """Сохраняет поток записей пачками по ``batch_size``.
+
+    Записи, которые уже есть в базе или ссылаются на отсутствующих
+    авторов, группы и посты, пропускаются и учитываются в ``skipped``.
+    ``post_ids`` хранит новые id постов, чей id в базе занят другим
+    постом, ``dropped_posts`` — id пропущенных постов, чтобы их
+    комментарии не прицепились к чужим постам.
+    """
+
+    def __init__(self, batch_size=1000, signals=True, progress=None):
+        self.batch_size = batch_size
+        self.signals = signals
+        self.progress = progress
+        self.users = Lookup(User, 'username')
+        self.groups = Lookup(Group, 'slug')
+        self.posts = Lookup(Post, 'pk')
+        self.post_ids = {}
+        self.dropped_posts = set()
+        self.created = Counter()
+        self.skipped = Counter()
+
+    def run(self, records):
+        model, batch = None, []
+        for record_model, fields in records:
+            if record_model not in FIELDS:
+                raise ValueError(f'Неизвестная модель: {record_model}')
+            if record_model != model or len(batch) == self.batch_size:
+                self.flush(model, batch)
+                model, batch = record_model, []
+            batch.append(fields)
+        self.flush(model, batch)
+
+    def report(self):
+        for model in MODELS:
+            if model in self.created or model in self.skipped:
+                yield (
+                    f'{model}: загружено {self.created[model]}, '
+                    f'пропущено {self.skipped[model]}'
+                )
+
+    def flush(self, model, batch):
+        if not batch:
+            return
+        try:
+            with transaction.atomic():
+                created = getattr(self, f'import_{model}')(batch)
+        except KeyError as error:
+            raise ValueError(f'{model}: нет поля {error}')
+        self.created[model] += created
+        self.skipped[model] += len(batch) - created
+        if self.progress is not None:
+            self.progress(model, self.created[model], self.skipped[model])
+
+    def import_user(self, batch):
+        existing = self.users.resolve(fields['username'] for fields in batch)
+        users = {}
+        for fields in batch:
+            username = fields['username']
+            if username in existing or username in users:
+                continue
+            users[username] = User(
+                username=username,
+                password=fields.get('password') or make_password(None),
+                first_name=fields.get('first_name') or '',
+                last_name=fields.get('last_name') or '',
+                email=fields.get('email') or '',
+                date_joined=_date(fields.get('date_joined')),
+            )
+        User.objects.bulk_create(users.values())
+        if self.signals:
+            created = self.users.resolve(users)
+            Profile.objects.bulk_create(
+                Profile(user_id=created[username]) for username in users
+            )
+            page_cache.invalidate(*(
+                page_cache.scope('profile', username=username)
+                for username in users
+            ))
+        return len(users)
+
+    def import_group(self, batch):
+        existing = self.groups.resolve(fields['slug'] for fields in batch)
+        groups = {}
+        for fields in batch:
+            slug = fields['slug']
+            if slug in existing or slug in groups:
+                continue
+            groups[slug] = Group(
+                slug=slug, title=fields['title'],
+                description=fields.get('description') or ''
+            )
+        Group.objects.bulk_create(groups.values())
+        return len(groups)
+
+    def _stored(self, model, ids, identity):
+        """Значения полей ``identity`` у записей с этими id."""
+        return {
+            pk: values
+            for pk, *values in model.objects.filter(pk__in=ids)
+            .values_list('pk', *identity)
+        }
+
+    def _place(self, model, objects, identity, ids=None):
+        """Раскладывает записи пачки по id, уже занятым в базе.
+
+        Запись с тем же id и теми же ``identity`` уже загружена и
+        отбрасывается. Остальным, чей id занят, подбирается загруженная
+        ранее такая же запись или новый id после наибольшего; замены
+        попадают в ``ids``. Возвращает записи для ``bulk_create``.
+        """
+        stored = self._stored(model, [obj.pk for obj in objects], identity)
+        placed, moved = [], []
+        for obj in objects:
+            values = [getattr(obj, field) for field in identity]
+            if obj.pk not in stored:
+                stored[obj.pk] = values
+                placed.append(obj)
+            elif stored[obj.pk] != values:
+                moved.append(obj)
+        next_pk = max(
+            [model.objects.aggregate(last=Max('pk'))['last'] or 0]
+            + [obj.pk for obj in placed]
+        ) + 1
+        for obj in moved:
+            exported = obj.pk
+            obj.pk = model.objects.filter(**{
+                field: getattr(obj, field) for field in identity
+            }).values_list('pk', flat=True).first()
+            if obj.pk is None:
+                obj.pk, next_pk = next_pk, next_pk + 1
+                placed.append(obj)
+            if ids is not None:
+                ids[exported] = obj.pk
+        return placed
+
+    def import_post(self, batch):
+        authors = self.users.resolve(fields['author'] for fields in batch)
+        groups = self.groups.resolve(fields.get('group') for fields in batch)
+        posts = []
+        for fields in batch:
+            pk = int(fields['id'])
+            slug = fields.get('group')
+            author_id = authors.get(fields['author'])
+            if author_id is None or (slug and slug not in groups):
+                self.dropped_posts.add(pk)
+                continue
+            posts.append(Post(
+                pk=pk, text=fields['text'], pub_date=_date(fields['pub_date']),
+                author_id=author_id, group_id=groups.get(slug),
+                image=fields.get('image') or '',
+            ))
+        posts = self._place(
+            Post, posts, ('author_id', 'pub_date', 'text'), self.post_ids
+        )
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            Post.objects.bulk_create(posts)
+        if self.signals:
+            self.after_posts(posts, batch)
+        return len(posts)
+
+    def after_posts(self, posts, batch):
+        for author_id, total in Counter(
+            post.author_id for post in posts
+        ).items():
+            counters.bump_profile(author_id, 'posts_count', total)
+        timeline.fan_out_many(posts)
+        backend = search.get_backend()
+        for post in posts:
+            backend.index(post.pk, None, post.text)
+        storage.acquire([post.image.name for post in posts if post.image])
+        feed_cache.bump_feed_version()
+        page_cache.invalidate(page_cache.scope('index'), *(
+            page_cache.scope('profile', username=fields['author'])
+            for fields in batch
+        ), *(
+            page_cache.scope('group_posts', slug=fields['group'])
+            for fields in batch if fields.get('group')
+        ))
+
+    def _local_post(self, exported):
+        if exported in self.dropped_posts:
+            return None
+        return self.post_ids.get(exported, exported)
+
+    def import_comment(self, batch):
+        authors = self.users.resolve(fields['author'] for fields in batch)
+        local = [self._local_post(int(fields['post'])) for fields in batch]
+        posts = self.posts.resolve(local)
+        comments = []
+        for post_id, fields in zip(local, batch):
+            author_id = authors.get(fields['author'])
+            if post_id not in posts or author_id is None:
+                continue
+            comments.append(Comment(
+                pk=int(fields['id']), post_id=post_id, author_id=author_id,
+                text=fields['text'], created=_date(fields['created']),
+            ))
+        comments = self._place(
+            Comment, comments, ('post_id', 'author_id', 'created', 'text')
+        )
+        with explicit_dates(Comment._meta.get_field('created')):
+            Comment.objects.bulk_create(comments)
+        if self.signals:
+            self.after_comments(comments)
+        return len(comments)
+
+    def after_comments(self, comments):
+        totals = Counter(comment.post_id for comment in comments)
+        for post_id, total in totals.items():
+            counters.bump_comments(post_id, total)
+        backend = search.get_backend()
+        for comment in comments:
+            backend.index(comment.post_id, comment.pk, comment.text)
+        feed_cache.bump_feed_version()
+        page_cache.invalidate(*(
+            scope
+            for post in Post.objects.filter(pk__in=totals)
+            .select_related('author', 'group')
+            for scope in page_cache.post_scopes(post)
+        ))
+
+    def import_follow(self, batch):
+        users = self.users.resolve(
+            username for fields in batch
+            for username in (fields['user'], fields['author'])
+        )
+        pairs = {
+            (users[fields['user']], users[fields['author']])
+            for fields in batch
+            if fields['user'] in users and fields['author'] in users
+            and fields['user'] != fields['author']
+        }
+        pairs -= set(Follow.objects.filter(
+            user_id__in={user_id for user_id, _ in pairs},
+            author_id__in={author_id for _, author_id in pairs},
+        ).values_list('user_id', 'author_id'))
+        Follow.objects.bulk_create(
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in pairs
+        )
+        if self.signals:
+            self.after_follows(pairs, batch)
+        return len(pairs)
+
+    def after_follows(self, pairs, batch):
+        for field, totals in (
+            ('following_count', Counter(user for user, _ in pairs)),
+            ('followers_count', Counter(author for _, author in pairs)),
+        ):
+            for user_id, total in totals.items():
+                counters.bump_profile(user_id, field, total)
+        timeline.backfill_many(pairs)
+        for user_id in {user_id for user_id, _ in pairs}:
+            feed_cache.bump_follow_version(user_id)
+        page_cache.invalidate(*(
+            page_cache.scope('profile', username=fields[role])
+            for fields in batch for role in ('user', 'author')
+        ))
@@ -0,0 +1,110 @@
+"""Условные GET-запросы для лент и страницы поста.
+
+Перед рендерингом страницы один небольшой запрос читает её состояние:
+время последней публикации или комментария и счётчики. Вместе с
+версиями кэша лент (их сдвигают правки, удаления и подписки) и
+пользователем оно даёт ETag. Если клиент прислал совпадающий
+If-None-Match, вью не вызывается и отдаётся 304. Last-Modified не
+отдаётся: время публикации не меняется при правке поста или
+переименовании группы, и If-Modified-Since вернул бы 304 на
+устаревшую страницу.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import timeline
+from .feed_cache import feed_versions
+from .models import Group, Post
+from .replicas import may_cache
+
+User = get_user_model()
+
+
+def conditional_page(page_state):
+    """Декоратор вью с ETag.
+
+    ``page_state(request, *args, **kwargs)`` возвращает кортеж состояния
+    страницы или None, если страницы нет, — тогда вью вызывается как
+    обычно.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, '_page_state'):
+            request._page_state = page_state(request, *args, **kwargs)
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        # Ответ отстающей реплики под новой версией лент клиент
+        # перепроверял бы и получал 304 уже после того, как реплика
+        # догнала основную базу.
+        if not may_cache():
+            return None
+        current = state(request, *args, **kwargs)
+        if current is None:
+            return None
+        user = request.user if request.user.is_authenticated else None
+        parts = (
+            request.get_full_path(), user and user.pk,
+            feed_versions(user), *current
+        )
+        return hashlib.md5(repr(parts).encode()).hexdigest()
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.user.is_authenticated:
+                patch_cache_control(response, no_cache=True, private=True)
+            else:
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def index_state(request):
+    latest = Post.objects.aggregate(latest=Max('pub_date'))['latest']
+    return (latest,)
+
+
+def group_state(request, slug):
+    return Group.objects.filter(slug=slug).annotate(
+        latest=Max('posts__pub_date')
+    ).values_list('latest', 'title', 'description').first()
+
+
+def profile_state(request, username):
+    return User.objects.filter(username=username).annotate(
+        latest=Max('posts__pub_date')
+    ).values_list(
+        'latest', 'profile__posts_count', 'profile__followers_count',
+        'profile__following_count'
+    ).first()
+
+
+def post_state(request, username, post_id):
+    return _post_state(pk=post_id, author__username=username)
+
+
+def post_id_state(request, post_id):
+    return _post_state(pk=post_id)
+
+
+def _post_state(**lookups):
+    state = Post.objects.filter(**lookups).annotate(
+        commented=Max('comments__created')
+    ).values_list('pub_date', 'commented', 'comments_count').first()
+    if state is None:
+        return None
+    pub_date, commented, comments_count = state
+    return max(pub_date, commented or pub_date), comments_count
+
+
+def follow_state(request):
+    return (timeline.latest_pub_date(request.user),)
@@ -0,0 +1,64 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарно через ``F()``. Если профиль ещё не создан,
+при увеличении он пересчитывается целиком. Уменьшение ниже нуля
+пропускается, такое расхождение исправляет ``manage.py recount_counters``.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Profile
+
+from .models import Comment, Follow, Post
+
+PROFILE_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+POST_COUNTERS = {
+    'comments_count': (Comment, 'post'),
+}
+
+
+def counter_subquery(model, lookup, outer):
+    return Coalesce(Subquery(
+        model.objects.filter(**{lookup: OuterRef(outer)})
+        .order_by().values(lookup)
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def recount_profile(user_id):
+    profile, _ = Profile.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            field: model.objects.filter(**{lookup: user_id}).count()
+            for field, (model, lookup) in PROFILE_COUNTERS.items()
+        }
+    )
+    return profile
+
+
+def profile_for(user):
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        return recount_profile(user.pk)
+
+
+def bump_profile(user_id, field, delta):
+    profiles = Profile.objects.filter(user_id=user_id)
+    if delta < 0:
+        profiles.filter(**{f'{field}__gt': 0}).update(
+            **{field: F(field) + delta}
+        )
+    elif not profiles.update(**{field: F(field) + delta}):
+        recount_profile(user_id)
+
+
+def bump_comments(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gt=0)
+    posts.update(comments_count=F('comments_count') + delta)
@@ -0,0 +1,289 @@
+"""События лент для Server-Sent Events.
+
+Сигналы ``Post`` и ``Comment`` пишут событие в таблицу ``Event``
+(outbox) в той же транзакции, что и саму запись. В каждом процессе один
+поток-читатель забирает из таблицы новые строки и раздаёт их подписчикам
+этого процесса, так что события видят слушатели всех воркеров; запись
+в своём процессе будит читателя сразу после коммита. Очередь подписчика
+ограничена ``EVENTS_QUEUE_SIZE``: клиент, который не успевает читать,
+получает событие ``overflow`` и должен перезагрузить ленту. Подписчиков
+на процесс не больше ``EVENTS_MAX_CONNECTIONS``. Под мостом ASGI
+ожидание событий не занимает поток, под WSGI каждый слушатель держит
+поток сервера.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import (
+    DatabaseError, close_old_connections, connection, transaction
+)
+from django.db.models import Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# Раз в столько событий удаляются записи старше EVENTS_RETENTION.
+CLEANUP_EVERY = 1000
+RETRY_MS = 3000
+KEEPALIVE = b': keepalive\n\n'
+OVERFLOW = b'event: overflow\ndata: {}\n\n'
+
+
+class TooManyListeners(Exception):
+    pass
+
+
+def _publish(kind, post, payload):
+    event = Event.objects.create(
+        kind=kind, post_id=post.pk, author_id=post.author_id,
+        group_id=post.group_id,
+        payload=json.dumps(
+            payload, cls=DjangoJSONEncoder, ensure_ascii=False
+        ),
+    )
+    if event.pk % CLEANUP_EVERY == 0:
+        Event.objects.filter(created__lt=timezone.now() - timedelta(
+            seconds=settings.EVENTS_RETENTION
+        )).delete()
+    transaction.on_commit(broker.notify)
+
+
+def publish_post(post):
+    _publish(Event.POST, post, {
+        'id': post.pk, 'text': post.text, 'pub_date': post.pub_date,
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+    })
+
+
+def publish_comment(comment):
+    _publish(Event.COMMENT, comment.post, {
+        'id': comment.pk, 'post': comment.post_id,
+        'author': comment.author.username, 'text': comment.text,
+        'created': comment.created,
+    })
+
+
+def matcher(lookups):
+    """Проверка события в памяти по тем же условиям, что и в filter()."""
+    checks = [
+        (lookup[:-len('__in')], set(value))
+        if lookup.endswith('__in') else (lookup, {value})
+        for lookup, value in lookups.items()
+    ]
+
+    def matches(event):
+        return all(
+            getattr(event, field) in values for field, values in checks
+        )
+    return matches
+
+
+class Subscriber:
+
+    def __init__(self, broker, matches, size):
+        self.broker = broker
+        self.matches = matches
+        self.size = size
+        self.events = deque()
+        self.overflowed = False
+        self.condition = threading.Condition()
+        self.waker = None
+
+    def put(self, event):
+        with self.condition:
+            if len(self.events) >= self.size:
+                self.overflowed = True
+            else:
+                self.events.append(event)
+            self.condition.notify()
+            waker = self.waker
+        if waker is not None:
+            waker()
+
+    def _drain(self):
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+    def get(self, timeout):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.events or self.overflowed, timeout
+            )
+            return self._drain()
+
+    async def aget(self, timeout):
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        with self.condition:
+            if self.events or self.overflowed:
+                return self._drain()
+            self.waker = lambda: loop.call_soon_threadsafe(ready.set)
+        try:
+            await asyncio.wait_for(ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        with self.condition:
+            self.waker = None
+            return self._drain()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Раздаёт подписчикам процесса новые строки outbox."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.last_id = None
+
+    def subscribe(self, matches):
+        with self.lock:
+            if len(self.subscribers) >= settings.EVENTS_MAX_CONNECTIONS:
+                raise TooManyListeners
+            if self.last_id is None:
+                self.last_id = Event.objects.aggregate(
+                    last=Max('pk')
+                )['last'] or 0
+            subscriber = Subscriber(self, matches, settings.EVENTS_QUEUE_SIZE)
+            self.subscribers.add(subscriber)
+            # С базой в памяти (тесты) соседние потоки не видят данных
+            # транзакции, поэтому события раздаются вызовом poll().
+            if self.thread is None and not (
+                connection.vendor == 'sqlite'
+                and connection.is_in_memory_db()
+            ):
+                self.thread = threading.Thread(
+                    target=self.run, daemon=True, name='events-tailer'
+                )
+                self.thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def notify(self):
+        self.wakeup.set()
+
+    def poll(self):
+        events = list(
+            Event.objects.filter(pk__gt=self.last_id)[:BATCH_SIZE]
+        )
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for event in events:
+            for subscriber in subscribers:
+                if subscriber.matches(event):
+                    subscriber.put(event)
+        if events:
+            self.last_id = events[-1].pk
+        return len(events)
+
+    def run(self):
+        while True:
+            with self.lock:
+                if not self.subscribers:
+                    self.thread = self.last_id = None
+                    return
+            close_old_connections()
+            try:
+                while self.poll() == BATCH_SIZE:
+                    pass
+            except DatabaseError:
+                logger.exception('Не удалось прочитать события')
+            self.wakeup.wait(settings.EVENTS_POLL_INTERVAL)
+            self.wakeup.clear()
+
+
+broker = Broker()
+
+
+def format_event(event):
+    return (
+        f'id: {event.pk}\nevent: {event.kind}\ndata: {event.payload}\n\n'
+    ).encode()
+
+
+class Stream:
+    """Поток событий одного подписчика; пропускает уже отданные id."""
+
+    def __init__(self, subscriber, replay):
+        self.subscriber = subscriber
+        self.replay = replay
+        self.last_id = 0
+
+    def chunk(self, events):
+        fresh = [event for event in events if event.pk > self.last_id]
+        if fresh:
+            self.last_id = fresh[-1].pk
+        return b''.join(map(format_event, fresh)) or KEEPALIVE
+
+    def __iter__(self):
+        yield f'retry: {RETRY_MS}\n\n'.encode() + self.chunk(self.replay)
+        while not self.subscriber.overflowed:
+            yield self.chunk(self.subscriber.get(settings.EVENTS_KEEPALIVE))
+        yield OVERFLOW
+
+    async def __aiter__(self):
+        yield f'retry: {RETRY_MS}\n\n'.encode() + self.chunk(self.replay)
+        while not self.subscriber.overflowed:
+            yield self.chunk(
+                await self.subscriber.aget(settings.EVENTS_KEEPALIVE)
+            )
+        yield OVERFLOW
+
+    def close(self):
+        self.subscriber.close()
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """Ответ SSE. Мост ASGI читает ``async_content`` без потока пула."""
+
+    def __init__(self, stream):
+        super().__init__(iter(stream), content_type='text/event-stream')
+        self.stream = stream
+        self.async_content = stream.__aiter__()
+        self['Cache-Control'] = 'no-cache'
+        self['X-Accel-Buffering'] = 'no'
+
+    def close(self):
+        self.stream.close()
+        super().close()
+
+
+def event_stream(lookups, last_event_id=None):
+    """Ответ SSE с событиями, подходящими под ``lookups`` модели Event.
+
+    Если клиент переподключился с ``Last-Event-ID``, сначала отдаются
+    пропущенные события из outbox; если их больше ``EVENTS_REPLAY``,
+    клиент получает ``overflow``.
+    """
+    subscriber = broker.subscribe(matcher(lookups))
+    replay = []
+    try:
+        if last_event_id is not None:
+            replay = list(Event.objects.filter(
+                pk__gt=last_event_id, **lookups
+            )[:settings.EVENTS_REPLAY])
+    except Exception:
+        subscriber.close()
+        raise
+    if len(replay) >= settings.EVENTS_REPLAY:
+        subscriber.overflowed = True
+    return EventStreamResponse(Stream(subscriber, replay))
@@ -0,0 +1,69 @@
+"""Версии кэша фрагментов ленты.
+
+Ключ фрагмента состоит из версии ленты, пользователя и страницы.
+Сигналы ``Post``, ``Comment`` и ``Follow`` сдвигают версии, поэтому
+старые фрагменты больше не читаются и просто вытесняются по TTL.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .replicas import may_cache, note_change
+
+FEED_VERSION_KEY = 'feed:version'
+FOLLOW_VERSION_KEY = 'feed:follow:{}'
+
+
+def _initial_version():
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+    note_change()
+
+
+def bump_version(key):
+    # Повторный сдвиг после коммита не даёт соседнему запросу закэшировать
+    # ещё не закоммиченное состояние под новой версией.
+    _bump(key)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(key))
+
+
+def get_versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = _initial_version()
+            cache.add(key, versions[key], None)
+    return [versions[key] for key in keys]
+
+
+def bump_feed_version():
+    bump_version(FEED_VERSION_KEY)
+
+
+def bump_follow_version(user_id):
+    bump_version(FOLLOW_VERSION_KEY.format(user_id))
+
+
+def feed_versions(user=None):
+    keys = [FEED_VERSION_KEY]
+    if user is not None:
+        keys.append(FOLLOW_VERSION_KEY.format(user.pk))
+    return '.'.join(str(version) for version in get_versions(keys))
+
+
+def feed_cache_context(user=None):
+    # Тайм-аут 0: фрагмент, прочитанный с отстающей реплики, не сохраняется.
+    timeout = settings.FEED_CACHE_TIMEOUT if may_cache() else 0
+    return {
+        'feed_version': feed_versions(user),
+        'feed_cache_timeout': timeout,
+    }
@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 
 from .models import Comment, Post
 
@@ -9,6 +10,32 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('group', 'text', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.image_rejection = getattr(
+            self.files.get('image'), 'rejection', None
+        )
+        if self.image_rejection:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        """Проверяет только заголовок картинки: полное декодирование
+        с поворотом по EXIF и очисткой метаданных выполняется в фоне при
+        построении вариантов."""
+        if self.image_rejection:
+            raise forms.ValidationError(self.image_rejection)
+        image = self.cleaned_data['image']
+        header = getattr(image, 'image', None)
+        if header is not None:
+            width, height = header.size
+            if width * height > settings.IMAGE_MAX_PIXELS:
+                raise forms.ValidationError(
+                    'Слишком большое изображение: '
+                    f'{width}×{height} точек.'
+                )
+        return image
+
 
 class CommentForm(forms.ModelForm):
 
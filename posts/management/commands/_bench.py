@@ -0,0 +1,40 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+from posts.bulk import explicit_dates
+from posts.models import Post
+
+
+@contextmanager
+def throwaway_database():
+    """Временная тестовая база, чтобы замеры не трогали рабочие данные."""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def explicit_pub_dates():
+    """Позволяет bulk_create сохранить заданные pub_date постов."""
+    return explicit_dates(Post._meta.get_field('pub_date'))
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def percentiles(values, points=(50, 95, 99)):
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {point: cuts[point - 1] for point in points}
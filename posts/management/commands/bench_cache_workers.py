@@ -0,0 +1,87 @@
+import multiprocessing
+import random
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+def make_cache(backend, location):
+    return import_string(settings.CACHE_BACKENDS[backend][0])(
+        location, {'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': 100000}}
+    )
+
+
+def run_worker(backend, location, keys, requests, seed, barrier, results):
+    cache = make_cache(backend, location)
+    rng = random.Random(seed)
+    hits = 0
+    for _ in range(requests):
+        # Популярные страницы запрашиваются чаще: распределение Парето.
+        key = f'page:{min(int(rng.paretovariate(0.5)), keys)}'
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            cache.set(key, 'x' * 2048)
+    barrier.wait()
+    if seed == 0:
+        cache.set('page:1', 'fresh')
+    barrier.wait()
+    results.put((hits, cache.get('page:1') == 'fresh'))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает долю попаданий в кэш у нескольких процессов-воркеров '
+        'для разных бэкендов кэша и проверяет, видят ли воркеры '
+        'инвалидацию, сделанную соседом.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends', nargs='+', default=['locmem', 'file'],
+            choices=sorted(settings.CACHE_BACKENDS)
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--keys', type=int, default=20000)
+        parser.add_argument('--requests', type=int, default=3000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"backend":>10} {"hit rate":>9} {"invalidation seen":>18}'
+        )
+        for backend in options['backends']:
+            with tempfile.TemporaryDirectory() as directory:
+                location = settings.CACHE_BACKENDS[backend][1]
+                if backend == 'file':
+                    location = directory
+                hit_rate, seen = self.run(backend, location, options)
+            self.stdout.write(
+                f'{backend:>10} {hit_rate:>9.1%} '
+                f'{seen:>10}/{options["workers"]}'
+            )
+
+    def run(self, backend, location, options):
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(options['workers'])
+        results = context.Queue()
+        workers = [
+            context.Process(target=run_worker, args=(
+                backend, location, options['keys'], options['requests'],
+                seed, barrier, results,
+            ))
+            for seed in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        outcomes = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+            if worker.exitcode:
+                raise CommandError(f'Воркер {backend} завершился с ошибкой')
+        total = options['workers'] * options['requests']
+        return (
+            sum(hits for hits, _ in outcomes) / total,
+            sum(seen for _, seen in outcomes),
+        )
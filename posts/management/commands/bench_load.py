@@ -0,0 +1,109 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post
+
+from ._bench import percentiles
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест страниц на текущей базе (заполните её '
+        'seed_load): задержки p50/p95/p99 и число запросов к базе в JSON. '
+        'Сценарий add_comment добавляет комментарии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--output', help='Файл для отчёта, по умолчанию stdout.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('Нужно хотя бы два запроса на сценарий.')
+        reader = User.objects.order_by('-profile__following_count').first()
+        post = Post.objects.select_related('author').order_by(
+            '-comments_count', '-pk'
+        ).first()
+        if reader is None or post is None:
+            raise CommandError('Нет данных: сначала выполните seed_load.')
+        author = User.objects.order_by('-profile__followers_count').first()
+        post_kwargs = {'username': post.author.username, 'post_id': post.pk}
+        scenarios = {
+            'index': ('get', reverse('index'), None),
+            'follow_index': ('get', reverse('follow_index'), None),
+            'profile': (
+                'get',
+                reverse('profile', kwargs={'username': author.username}),
+                None
+            ),
+            'post_view': ('get', reverse('post', kwargs=post_kwargs), None),
+            'add_comment': (
+                'post', reverse('add_comment', kwargs=post_kwargs),
+                {'text': 'Комментарий нагрузочного теста'}
+            ),
+            'api_posts': ('get', reverse('api:post_list'), None),
+            'api_follow': ('get', reverse('api:follow_feed'), None),
+        }
+        with override_settings(DEBUG=False):
+            client = Client()
+            client.force_login(reader)
+            results = {
+                name: self.run(client, *scenario, options)
+                for name, scenario in scenarios.items()
+            }
+        report = json.dumps({
+            'started': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'rows': {
+                'users': User.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+            'requests': options['requests'],
+            'scenarios': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def run(self, client, method, url, data, options):
+        request = getattr(client, method)
+        for _ in range(options['warmup']):
+            request(url, data)
+        timings, queries = [], []
+        for _ in range(options['requests']):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = request(url, data)
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code not in (200, 302):
+                raise CommandError(
+                    f'{method.upper()} {url}: {response.status_code}'
+                )
+            queries.append(len(captured))
+        latency = percentiles(timings)
+        return {
+            'url': url,
+            'p50_ms': round(latency[50], 2),
+            'p95_ms': round(latency[95], 2),
+            'p99_ms': round(latency[99], 2),
+            'queries_p50': statistics.median_low(queries),
+            'queries_max': max(queries),
+        }
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, modify_settings, override_settings
+from django.urls import reverse
+
+from posts import page_cache
+from posts.models import Comment, Group, Post
+
+from ._bench import median_ms, throwaway_database
+
+User = get_user_model()
+
+MIDDLEWARE = 'posts.page_cache.AnonymousPageCacheMiddleware'
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест кэша страниц для гостей: сравнивает время '
+        'ответа главной, группы, профиля и поста с кэшем и без него. '
+        'Работает на временной базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with throwaway_database(), override_settings(DEBUG=False):
+            urls = self.seed(options['posts'])
+            self.report(urls, options['requests'])
+
+    def seed(self, total):
+        author = User.objects.create(username='bench')
+        reader = User.objects.create(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='bench', description='Нагрузочный тест'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=author, group=group)
+            for number in range(total)
+        )
+        post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=reader, text=f'Комментарий {number}')
+            for number in range(50)
+        )
+        return {
+            'index': reverse('index'),
+            'group': reverse('group_posts', kwargs={'slug': 'bench'}),
+            'profile': reverse('profile', kwargs={'username': 'bench'}),
+            'post': reverse(
+                'post', kwargs={'username': 'bench', 'post_id': post.pk}
+            ),
+        }
+
+    def report(self, urls, requests):
+        cache.clear()
+        page_cache.reset_stats()
+        # Client собирает цепочку middleware при первом запросе, поэтому
+        # у каждого режима свой клиент.
+        with modify_settings(MIDDLEWARE={'remove': MIDDLEWARE}):
+            uncached = Client()
+            for url in urls.values():
+                uncached.get(url)
+        cached = Client()
+        self.stdout.write(
+            f'{"page":>8} {"view ms":>10} {"cached ms":>10} {"speed-up":>9}'
+        )
+        for name, url in urls.items():
+            view_ms = median_ms(lambda: uncached.get(url), requests)
+            cached_ms = median_ms(lambda: cached.get(url), requests)
+            self.stdout.write(
+                f'{name:>8} {view_ms:>10.2f} {cached_ms:>10.2f} '
+                f'{view_ms / cached_ms:>8.1f}x'
+            )
+        hits, misses = page_cache.stats()
+        self.stdout.write(f'Попаданий: {hits}, промахов: {misses}')
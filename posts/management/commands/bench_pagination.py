@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.utils import timezone
+
+from posts.models import Post
+from posts.paginator import (NEXT, POSTS_PER_PAGE, CursorPaginator,
+                             encode_cursor)
+
+from ._bench import explicit_pub_dates, median_ms, throwaway_database
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время выдачи страниц ленты: ?page= (COUNT + OFFSET) '
+        'и ?cursor= (поиск по ключу). Работает на временной базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.seed(options['posts'])
+            self.report(options['posts'], options['repeat'])
+
+    def seed(self, total):
+        author = User.objects.create(username='bench')
+        now = timezone.now()
+        with explicit_pub_dates():
+            for start in range(0, total, 5000):
+                Post.objects.bulk_create(
+                    Post(
+                        text=f'Пост {number}', author=author,
+                        pub_date=now - timedelta(seconds=number)
+                    )
+                    for number in range(start, min(start + 5000, total))
+                )
+
+    def report(self, total, repeat):
+        last_page = max(1, -(-total // POSTS_PER_PAGE))
+        numbers = sorted({1, 10, 100, 1000, last_page // 2, last_page})
+        self.stdout.write(f'{"page":>8} {"?page= ms":>12} {"?cursor= ms":>12}')
+        queryset = Post.objects.all()
+        for number in numbers:
+            if number > last_page:
+                continue
+            offset_ms = median_ms(
+                lambda: list(
+                    Paginator(queryset, POSTS_PER_PAGE).get_page(number)
+                ),
+                repeat,
+            )
+            cursor = None
+            if number > 1:
+                cursor = encode_cursor(
+                    NEXT, queryset[(number - 1) * POSTS_PER_PAGE - 1]
+                )
+            cursor_ms = median_ms(
+                lambda: list(
+                    CursorPaginator(queryset, POSTS_PER_PAGE).get_page(cursor)
+                ),
+                repeat,
+            )
+            self.stdout.write(
+                f'{number:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}'
+            )
@@ -0,0 +1,216 @@
+import asyncio
+import http.client
+import multiprocessing
+import socket
+import threading
+import time
+from urllib.parse import unquote
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connections
+from django.test import override_settings
+
+from ._bench import percentiles
+
+User = get_user_model()
+
+BACKLOG = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+class WSGIServer(ThreadedWSGIServer):
+    request_queue_size = BACKLOG
+
+
+def serve_wsgi(port, ready):
+    from django.core.wsgi import get_wsgi_application
+
+    server = WSGIServer(('127.0.0.1', port), QuietHandler)
+    server.set_app(get_wsgi_application())
+    ready.set()
+    server.serve_forever()
+
+
+async def handle_http(application, port, reader, writer):
+    # Минимальный HTTP/1.1 без keep-alive: ровно столько, сколько нужно
+    # для замера; в работе приложение запускают uvicorn или daphne.
+    method, target, version = (await reader.readline()).decode(
+        'latin-1'
+    ).split()
+    headers = []
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, value = line.decode('latin-1').split(':', 1)
+        headers.append((
+            name.strip().lower().encode('latin-1'),
+            value.strip().encode('latin-1'),
+        ))
+    length = int(dict(headers).get(b'content-length', 0))
+    body = await reader.readexactly(length) if length else b''
+    path, _, query = target.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'},
+        'http_version': version.split('/')[1], 'method': method,
+        'scheme': 'http', 'path': unquote(path), 'root_path': '',
+        'query_string': query.encode('latin-1'), 'headers': headers,
+        'client': writer.get_extra_info('peername')[:2],
+        'server': ('127.0.0.1', port),
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            writer.write(f'HTTP/1.1 {message["status"]} -\r\n'.encode())
+            for name, value in message['headers']:
+                writer.write(name + b': ' + value + b'\r\n')
+            writer.write(b'Connection: close\r\n\r\n')
+        else:
+            writer.write(message.get('body', b''))
+        await writer.drain()
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        writer.close()
+
+
+def serve_asgi(port, ready):
+    from yatube.asgi import application
+
+    async def main():
+        server = await asyncio.start_server(
+            lambda reader, writer: handle_http(
+                application, port, reader, writer
+            ),
+            '127.0.0.1', port, backlog=BACKLOG
+        )
+        ready.set()
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+SERVERS = {'wsgi': serve_wsgi, 'asgi': serve_asgi}
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def fetch(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request('GET', path, headers={'Host': 'localhost'})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def run_client(port, paths, deadline, results):
+    timings, errors, number = [], 0, 0
+    while time.perf_counter() < deadline:
+        path = paths[number % len(paths)]
+        number += 1
+        start = time.perf_counter()
+        try:
+            status = fetch(port, path)
+        except OSError:
+            status = None
+        if status == 200:
+            timings.append((time.perf_counter() - start) * 1000)
+        else:
+            errors += 1
+    results.append((timings, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI (многопоточный сервер '
+        'Django) и моста ASGI из yatube/asgi.py при одинаковом числе '
+        'одновременных клиентов на текущей базе (заполните её seed_load).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument(
+            '--servers', nargs='+', default=list(SERVERS),
+            choices=list(SERVERS)
+        )
+
+    def handle(self, *args, **options):
+        author = User.objects.order_by('-profile__followers_count').first()
+        if author is None:
+            raise CommandError('Нет данных: сначала выполните seed_load.')
+        paths = [
+            '/', '/api/v1/posts/', f'/api/v1/users/{author.username}/posts/'
+        ]
+        self.stdout.write(
+            f'{"server":>6} {"clients":>7} {"req/s":>8} {"p50 ms":>7} '
+            f'{"p95 ms":>7} {"errors":>6}'
+        )
+        for server in options['servers']:
+            with override_settings(DEBUG=False):
+                self.report(server, options, *self.run(
+                    SERVERS[server], paths, options
+                ))
+
+    def run(self, serve, paths, options):
+        context = multiprocessing.get_context('fork')
+        port, ready = free_port(), context.Event()
+        connections.close_all()
+        process = context.Process(target=serve, args=(port, ready))
+        process.start()
+        try:
+            if not ready.wait(30):
+                raise CommandError('Сервер не запустился.')
+            for path in paths:
+                if fetch(port, path) != 200:
+                    raise CommandError(f'GET {path}: ошибка')
+            results = []
+            deadline = time.perf_counter() + options['duration']
+            clients = [
+                threading.Thread(
+                    target=run_client, args=(port, paths, deadline, results)
+                )
+                for _ in range(options['concurrency'])
+            ]
+            start = time.perf_counter()
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            process.terminate()
+            process.join()
+        timings = [ms for done, _ in results for ms in done]
+        return timings, sum(errors for _, errors in results), elapsed
+
+    def report(self, server, options, timings, errors, elapsed):
+        if len(timings) < 2:
+            raise CommandError(f'{server}: нет успешных ответов.')
+        cuts = percentiles(timings, (50, 95))
+        self.stdout.write(
+            f'{server:>6} {options["concurrency"]:>7} '
+            f'{len(timings) / elapsed:>8.1f} {cuts[50]:>7.1f} '
+            f'{cuts[95]:>7.1f} {errors:>6}'
+        )
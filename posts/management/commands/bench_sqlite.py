@@ -0,0 +1,129 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connections
+from django.test import Client, override_settings
+
+from posts.models import Post
+
+from ._bench import percentiles
+
+User = get_user_model()
+
+ENGINES = {
+    'stock': ('django.db.backends.sqlite3', 0),
+    'tuned': ('yatube.sqlite', 60),
+}
+
+
+def use_database(engine, conn_max_age, name):
+    connections.close_all()
+    connections.databases['default'].update(
+        ENGINE=engine, NAME=name, CONN_MAX_AGE=conn_max_age
+    )
+    del connections['default']
+
+
+def run_writer(username, url, comments, barrier, results):
+    client = Client()
+    client.force_login(User.objects.get(username=username))
+    timings, locked = [], 0
+    barrier.wait()
+    for number in range(comments):
+        # Тестовый клиент не закрывает соединения сам; как и WSGIHandler,
+        # закрываем их по CONN_MAX_AGE до и после запроса.
+        close_old_connections()
+        start = time.perf_counter()
+        try:
+            client.post(url, {'text': f'Комментарий {number}'})
+        except OperationalError as error:
+            if 'locked' not in str(error):
+                raise
+            locked += 1
+        else:
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            close_old_connections()
+    connections.close_all()
+    results.append((timings, locked))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает обычный и настроенный бэкенд SQLite под одновременной '
+        'записью: несколько потоков добавляют комментарии через '
+        'add_comment во временную базу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16)
+        parser.add_argument('--comments', type=int, default=50)
+        parser.add_argument(
+            '--engines', nargs='+', default=list(ENGINES),
+            choices=list(ENGINES)
+        )
+
+    def handle(self, *args, **options):
+        saved = dict(connections.databases['default'])
+        self.stdout.write(
+            f'{"engine":>6} {"req/s":>7} {"p50 ms":>7} {"p95 ms":>7} '
+            f'{"locked":>7}'
+        )
+        try:
+            with override_settings(DEBUG=False):
+                for engine in options['engines']:
+                    with tempfile.TemporaryDirectory() as directory:
+                        use_database(
+                            *ENGINES[engine],
+                            os.path.join(directory, 'bench.sqlite3')
+                        )
+                        self.report(engine, *self.run(options))
+        finally:
+            connections.close_all()
+            connections.databases['default'] = saved
+            del connections['default']
+
+    def run(self, options):
+        call_command('migrate', verbosity=0)
+        author = User.objects.create(username='bench_author')
+        post = Post.objects.create(text='Пост', author=author)
+        url = f'/{author.username}/{post.pk}/comment'
+        usernames = [f'bench_writer_{n}' for n in range(options['writers'])]
+        User.objects.bulk_create(User(username=name) for name in usernames)
+        connections.close_all()
+        barrier = threading.Barrier(options['writers'] + 1)
+        results = []
+        writers = [
+            threading.Thread(target=run_writer, args=(
+                username, url, options['comments'], barrier, results
+            ))
+            for username in usernames
+        ]
+        for writer in writers:
+            writer.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for writer in writers:
+            writer.join()
+        elapsed = time.perf_counter() - start
+        timings = [ms for done, _ in results for ms in done]
+        locked = sum(failed for _, failed in results)
+        connections.close_all()
+        return timings, locked, elapsed
+
+    def report(self, engine, timings, locked, elapsed):
+        if len(timings) < 2:
+            self.stdout.write(
+                f'{engine:>6} {"—":>7} {"—":>7} {"—":>7} {locked:>7}'
+            )
+            return
+        cuts = percentiles(timings, (50, 95))
+        self.stdout.write(
+            f'{engine:>6} {len(timings) / elapsed:>7.1f} {cuts[50]:>7.1f} '
+            f'{cuts[95]:>7.1f} {locked:>7}'
+        )
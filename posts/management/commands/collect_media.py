@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет медиафайлы, на которые больше не ссылается ни один пост. '
+        'Можно запускать на работающем сайте.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GC_GRACE,
+            help='Сколько секунд файл должен пробыть без ссылок.'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['grace'])
+        if options['dry_run']:
+            count = storage.orphans(cutoff).count()
+            self.stdout.write(f'Файлов к удалению: {count}')
+            return
+        removed = storage.collect(cutoff, batch_size=options['batch_size'])
+        self.stdout.write(f'Удалено файлов: {removed}')
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import POSTS_PER_PAGE, CursorPaginator
+
+User = get_user_model()
+
+# Признаки плана SQLite, при которых запрос читает всю таблицу
+# или сортирует результат вместо чтения индекса по порядку.
+BAD_PLAN_MARKERS = ('USE TEMP B-TREE FOR ORDER BY',)
+
+
+def is_full_scan(detail):
+    return detail.startswith('SCAN ') and 'INDEX' not in detail
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для запросов лент и показывает, какие индексы '
+        'они используют. С --check завершается ошибкой, если запрос '
+        'читает таблицу целиком или сортирует без индекса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true')
+
+    def feed_queries(self):
+        user = User.objects.order_by('pk').first() or User(pk=1)
+        group = Group.objects.order_by('pk').first() or Group(pk=1)
+        post_id = Post.objects.aggregate(Max('pk'))['pk__max'] or 1
+        now = timezone.now()
+        feeds = {
+            'index': Post.objects.for_feed(),
+            'group_posts': group.posts.for_feed(),
+            'profile': user.posts.for_feed(),
+            'follow_index': timeline.follow_feed(user).for_feed(),
+        }
+        for name, queryset in feeds.items():
+            yield name, queryset[:POSTS_PER_PAGE]
+            yield f'{name} cursor', CursorPaginator(
+                queryset, POSTS_PER_PAGE
+            ).seek(now, post_id, before=True)[:POSTS_PER_PAGE + 1]
+        yield 'post_view comments', Comment.objects.filter(
+            post_id=post_id
+        ).select_related('author').order_by('created')
+        yield 'profile following', Follow.objects.filter(
+            user=user, author=user
+        )
+        yield 'fan-out followers', Follow.objects.filter(
+            author=user
+        ).values_list('user_id', flat=True)
+
+    def handle(self, *args, **options):
+        problems = []
+        for name, queryset in self.feed_queries():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for line in queryset.explain().splitlines():
+                detail = line.split(' ', 3)[-1]
+                bad = is_full_scan(detail) or detail in BAD_PLAN_MARKERS
+                if bad:
+                    problems.append(f'{name}: {detail}')
+                self.stdout.write(
+                    f'  {self.style.ERROR(detail) if bad else detail}'
+                )
+        if problems and options['check']:
+            raise CommandError(
+                'Запросы без индекса:\n' + '\n'.join(problems)
+            )
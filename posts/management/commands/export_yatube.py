@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from posts import bulk
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в NDJSON или CSV, читая базу пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл выгрузки, «-» — стандартный вывод. '
+                 'Файлы .gz сжимаются.'
+        )
+        parser.add_argument(
+            '--format', choices=sorted(bulk.WRITERS),
+            help='По умолчанию определяется по расширению файла.'
+        )
+        parser.add_argument(
+            '--models', nargs='+', choices=bulk.MODELS, default=bulk.MODELS
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--with-passwords', action='store_true',
+            help='Выгрузить хеши паролей. Без флага пользователи после '
+                 'загрузки задают пароль через восстановление.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        write = bulk.WRITERS[options['format'] or bulk.detect_format(path)]
+        records = bulk.export_records(
+            [model for model in bulk.MODELS if model in options['models']],
+            chunk_size=options['chunk_size'],
+            passwords=options['with_passwords']
+        )
+        if path == '-':
+            write(records, self.stdout)
+            return
+        with bulk.open_file(path, 'w') as stream:
+            write(records, stream)
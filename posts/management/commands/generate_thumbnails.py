@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.storage import release
+from posts.thumbnails import generate_thumbnail, variant_names
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры для постов с картинкой, у которых их ещё нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить миниатюры всех постов с картинкой.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(thumbnail='')
+        done = failed = 0
+        for post_id, image_name, srcsets in posts.values_list(
+            'pk', 'image', 'srcsets'
+        ).iterator():
+            if srcsets and Post.objects.filter(
+                pk=post_id, srcsets=srcsets
+            ).update(thumbnail='', srcsets=''):
+                release(variant_names(srcsets))
+            if generate_thumbnail(post_id, image_name):
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(f'Миниатюр построено: {done}, ошибок: {failed}')
@@ -0,0 +1,65 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bulk
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает выгрузку export_yatube пачками через bulk_create. '
+        'Записи, которые уже есть в базе, пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл выгрузки, «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--format', choices=sorted(bulk.READERS),
+            help='По умолчанию определяется по расширению файла.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-signals', action='store_true',
+            help='Не пересчитывать счётчики, ленту подписок, поиск и '
+                 'ссылки на медиа. Быстрее для первичной загрузки.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        read = bulk.READERS[options['format'] or bulk.detect_format(path)]
+        self.started, self.processed = time.perf_counter(), {}
+        importer = bulk.Importer(
+            batch_size=options['batch_size'],
+            signals=not options['no_signals'],
+            progress=self.progress if options['verbosity'] > 1 else None,
+        )
+        try:
+            if path == '-':
+                importer.run(read(sys.stdin))
+            else:
+                with bulk.open_file(path, 'r') as stream:
+                    importer.run(read(stream))
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        finally:
+            for line in importer.report():
+                self.stdout.write(line)
+        if options['no_signals']:
+            self.stdout.write(
+                'Сигналы пропущены: выполните recount_counters и '
+                'rebuild_search_index. Лента подписок заполняется, только '
+                'если подписки загружены с сигналами.'
+            )
+
+    def progress(self, model, created, skipped):
+        self.processed[model] = created + skipped
+        rate = sum(self.processed.values()) / (
+            time.perf_counter() - self.started
+        )
+        self.stdout.write(
+            f'{model}: {created} загружено, {skipped} пропущено, '
+            f'{rate:.0f} записей/с'
+        )
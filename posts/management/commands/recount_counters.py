@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from posts.counters import POST_COUNTERS, PROFILE_COUNTERS, counter_subquery
+from posts.models import Post
+from users.models import Profile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики записей, комментариев и подписок '
+        'и исправляет разошедшиеся значения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        missing = User.objects.filter(profile__isnull=True)
+        self.stdout.write(f'profiles: нет у {missing.count()} пользователей')
+        if not options['dry_run']:
+            Profile.objects.bulk_create(
+                (Profile(user=user) for user in missing.iterator()),
+                batch_size=options['batch_size']
+            )
+        for model, counters, outer in (
+            (Profile, PROFILE_COUNTERS, 'user_id'),
+            (Post, POST_COUNTERS, 'pk'),
+        ):
+            for field, (counted, lookup) in counters.items():
+                drifted = list(
+                    model.objects.annotate(
+                        actual=counter_subquery(counted, lookup, outer)
+                    ).exclude(**{field: F('actual')})
+                    .values_list('pk', 'actual')
+                )
+                self.stdout.write(f'{field}: расхождений {len(drifted)}')
+                if not options['dry_run']:
+                    self.fix(model, field, drifted, options['batch_size'])
+
+    def fix(self, model, field, drifted, batch_size):
+        for start in range(0, len(drifted), batch_size):
+            with transaction.atomic():
+                for pk, actual in drifted[start:start + batch_size]:
+                    model.objects.filter(pk=pk).update(**{field: actual})
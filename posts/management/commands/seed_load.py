@@ -0,0 +1,72 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from posts import bulk, seed, storage
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, постами с '
+        'картинками, комментариями и подписками для нагрузочных тестов. '
+        'Миниатюры затем строит generate_thumbnails.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument(
+            '--images', type=int, default=20,
+            help='Сколько разных картинок сгенерировать.'
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.3,
+            help='Доля постов с картинкой.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты постов.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--no-signals', action='store_true',
+            help='Не пересчитывать счётчики, ленту подписок, поиск и '
+                 'ссылки на медиа.'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        images = seed.make_images(rng, options['images'])
+        importer = bulk.Importer(
+            batch_size=options['batch_size'],
+            signals=not options['no_signals'],
+        )
+        try:
+            importer.run(seed.records(
+                rng,
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                follows=options['follows'],
+                comments=options['comments'],
+                images=images,
+                image_ratio=options['image_ratio'],
+                days=options['days'],
+                first_post_id=self.next_id(Post),
+                first_comment_id=self.next_id(Comment),
+            ))
+        finally:
+            # Ссылку при сохранении держал сам генератор, посты
+            # получили свои при импорте.
+            storage.release(images)
+        for line in importer.report():
+            self.stdout.write(line)
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
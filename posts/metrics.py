@@ -0,0 +1,338 @@
+"""Метрики запросов для Prometheus.
+
+``MetricsMiddleware`` стоит в начале цепочки и для каждого view
+записывает время ответа (гистограмма), число и время SQL-запросов, время
+отрисовки шаблонов и попадания в кэш. Счётчики копятся в памяти
+процесса (время — целыми микросекундами) и не зависят от кэша. Если
+задан ``METRICS_DIR``, каждый процесс раз в ``METRICS_FLUSH_INTERVAL``
+секунд сохраняет свои счётчики в ``<pid>.json``, и ``/metrics`` любого
+воркера отдаёт счётчики всех процессов с меткой ``pid``; без него видны
+только счётчики процесса, ответившего на запрос. View может объявить
+бюджет запросов декоратором ``query_budget``: превышение пишется в лог,
+а в тестах роняет тест.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+FIELDS = (
+    'requests', 'duration_us', 'queries', 'query_us', 'template_us',
+    'cache_hits', 'cache_misses', 'over_budget',
+    *(f'bucket_{index}' for index in range(len(BUCKETS))),
+)
+OTHER_VIEW = 'other'
+COUNTERS = (
+    ('yatube_db_queries_total', 'queries', 1,
+     'Число SQL-запросов.'),
+    ('yatube_db_query_seconds_total', 'query_us', 1e-6,
+     'Время SQL-запросов.'),
+    ('yatube_template_render_seconds_total', 'template_us', 1e-6,
+     'Время отрисовки шаблонов.'),
+    ('yatube_cache_hits_total', 'cache_hits', 1,
+     'Прочитанные из кэша ключи.'),
+    ('yatube_cache_misses_total', 'cache_misses', 1,
+     'Ключи, которых не было в кэше.'),
+    ('yatube_query_budget_exceeded_total', 'over_budget', 1,
+     'Ответы сверх бюджета запросов.'),
+)
+
+_state = threading.local()
+_missing = object()
+_lock = threading.Lock()
+_totals = {}
+_next_flush = 0
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    """Объявляет, сколько запросов к базе допустимо для view."""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0
+        self.template_time = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - start
+
+
+def current():
+    return getattr(_state, 'metrics', None)
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        metrics = current()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблоны Django с замером времени отрисовки для метрик."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+@contextmanager
+def counting_cache_reads(metrics):
+    # Кэш у каждого потока свой, поэтому подмена методов на время запроса
+    # не задевает соседние запросы. Вложенные вызовы (get_many через get)
+    # не считаются повторно.
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    get, get_many = backend.get, backend.get_many
+
+    def counted_get(key, default=None, version=None):
+        metrics.cache_depth += 1
+        try:
+            value = get(key, _missing, version=version)
+        finally:
+            metrics.cache_depth -= 1
+        if metrics.cache_depth == 0:
+            if value is _missing:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _missing else value
+
+    def counted_get_many(keys, version=None):
+        keys = list(keys)
+        metrics.cache_depth += 1
+        try:
+            found = get_many(keys, version=version)
+        finally:
+            metrics.cache_depth -= 1
+        if metrics.cache_depth == 0:
+            metrics.cache_hits += len(found)
+            metrics.cache_misses += len(keys) - len(found)
+        return found
+
+    backend.get, backend.get_many = counted_get, counted_get_many
+    try:
+        yield
+    finally:
+        del backend.get, backend.get_many
+
+
+def _micro(seconds):
+    return int(seconds * 1_000_000)
+
+
+def record(view, duration, metrics, over_budget=False):
+    bucket = next(
+        (index for index, bound in enumerate(BUCKETS) if duration <= bound),
+        None
+    )
+    values = {
+        'requests': 1,
+        'duration_us': _micro(duration),
+        'queries': metrics.queries,
+        'query_us': _micro(metrics.query_time),
+        'template_us': _micro(metrics.template_time),
+        'cache_hits': metrics.cache_hits,
+        'cache_misses': metrics.cache_misses,
+        'over_budget': int(over_budget),
+    }
+    if bucket is not None:
+        values[f'bucket_{bucket}'] = 1
+    with _lock:
+        totals = _totals.setdefault(view, dict.fromkeys(FIELDS, 0))
+        for field, delta in values.items():
+            totals[field] += delta
+    if settings.METRICS_DIR and time.monotonic() >= _next_flush:
+        flush()
+
+
+def snapshot():
+    with _lock:
+        return {view: dict(totals) for view, totals in _totals.items()}
+
+
+def flush():
+    """Сохраняет счётчики процесса в ``METRICS_DIR/<pid>.json``."""
+    global _next_flush
+    _next_flush = time.monotonic() + settings.METRICS_FLUSH_INTERVAL
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+    temporary = f'{path}.{threading.get_ident()}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(snapshot(), file)
+    os.replace(temporary, path)
+
+
+def reset():
+    """Обнуляет счётчики процесса (для тестов)."""
+    global _next_flush
+    with _lock:
+        _totals.clear()
+    _next_flush = 0
+
+
+def _forget_parent():
+    # Процесс после fork начинает с нуля, иначе счётчики родителя попали
+    # бы в сумму дважды; блокировку мог держать другой поток родителя.
+    global _lock, _totals, _next_flush
+    _lock, _totals, _next_flush = threading.Lock(), {}, 0
+
+
+os.register_at_fork(after_in_child=_forget_parent)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or match.url_name is None:
+        return OTHER_VIEW
+    return match.view_name
+
+
+def report_budget(view, budget, metrics):
+    message = (
+        f'{view}: {metrics.queries} запросов к базе при бюджете {budget}'
+    )
+    if settings.QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if current() is not None:
+            return self.get_response(request)
+        metrics = _state.metrics = RequestMetrics()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                stack.enter_context(counting_cache_reads(metrics))
+                response = self.get_response(request)
+        finally:
+            _state.metrics = None
+        duration = time.perf_counter() - start
+        view = view_name(request)
+        budget = getattr(request, '_query_budget', None)
+        over_budget = budget is not None and metrics.queries > budget
+        record(view, duration, metrics, over_budget)
+        if over_budget:
+            report_budget(view, budget, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = getattr(view_func, 'query_budget', None)
+
+
+def collect():
+    """Счётчики по процессам: ``{pid: {view: {поле: значение}}}``.
+
+    Файлы завершившихся процессов остаются: их счётчики не должны
+    пропадать из сумм.
+    """
+    processes = {}
+    if settings.METRICS_DIR:
+        flush()
+        for name in os.listdir(settings.METRICS_DIR):
+            pid, extension = os.path.splitext(name)
+            if extension != '.json':
+                continue
+            try:
+                with open(os.path.join(settings.METRICS_DIR, name)) as file:
+                    processes[pid] = json.load(file)
+            except (OSError, ValueError):
+                logger.warning('Не удалось прочитать метрики %s', name)
+    processes[str(os.getpid())] = snapshot()
+    return processes
+
+
+def _histogram(label, counters):
+    total = 0
+    for index, bound in enumerate(BUCKETS):
+        total += counters[f'bucket_{index}']
+        yield (
+            f'yatube_request_duration_seconds_bucket{{{label},le="{bound}"}} '
+            f'{total}'
+        )
+    yield (
+        f'yatube_request_duration_seconds_bucket{{{label},le="+Inf"}} '
+        f'{counters["requests"]}'
+    )
+    yield (
+        f'yatube_request_duration_seconds_sum{{{label}}} '
+        f'{counters["duration_us"] / 1e6}'
+    )
+    yield (
+        f'yatube_request_duration_seconds_count{{{label}}} '
+        f'{counters["requests"]}'
+    )
+
+
+def export():
+    """Счётчики в текстовом формате Prometheus."""
+    series = [
+        (f'view="{view}",pid="{pid}"', dict.fromkeys(FIELDS, 0) | counters)
+        for pid, views in sorted(collect().items())
+        for view, counters in sorted(views.items())
+    ]
+    lines = [
+        '# HELP yatube_request_duration_seconds Время ответа.',
+        '# TYPE yatube_request_duration_seconds histogram',
+    ]
+    for label, counters in series:
+        lines.extend(_histogram(label, counters))
+    for name, field, scale, help_text in COUNTERS:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for label, counters in series:
+            lines.append(f'{name}{{{label}}} {counters[field] * scale}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(
+        export(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='srcsets',
+            field=models.TextField(blank=True, editable=False, help_text='JSON: формат -> значение srcset', verbose_name='Варианты изображения'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.6 on 2026-10-18 06:19
+
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def variant_names(srcsets):
+    try:
+        sources = json.loads(srcsets)
+    except ValueError:
+        return []
+    return {
+        source.rsplit(' ', 1)[0][len(settings.MEDIA_URL):]
+        for srcset in sources.values() for source in srcset.split(', ')
+    }
+
+
+def count_references(apps, schema_editor):
+    MediaFile = apps.get_model('posts', 'MediaFile')
+    Post = apps.get_model('posts', 'Post')
+    refs = Counter()
+    posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+    for image, srcsets in posts.values_list('image', 'srcsets').iterator():
+        refs.update([image, *variant_names(srcsets)])
+    MediaFile.objects.bulk_create(
+        (MediaFile(name=name, refs=count) for name, count in refs.items()),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_srcsets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refs', models.PositiveIntegerField(default=0)),
+                ('orphaned_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='mediafile',
+            index=models.Index(fields=['refs', 'orphaned_at'], name='media_orphaned_idx'),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
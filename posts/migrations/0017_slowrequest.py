@@ -0,0 +1,35 @@
+# Generated by Django 2.2.6 on 2026-10-18 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_mediafile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowRequest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view', models.CharField(max_length=200, verbose_name='View')),
+                ('method', models.CharField(max_length=10, verbose_name='Метод')),
+                ('path', models.CharField(max_length=2000, verbose_name='Путь')),
+                ('duration_ms', models.PositiveIntegerField(verbose_name='Время, мс')),
+                ('samples', models.PositiveIntegerField(verbose_name='Сэмплов')),
+                ('profile', models.CharField(max_length=255, verbose_name='Файл профиля')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата')),
+            ],
+            options={
+                'verbose_name': 'Медленный запрос',
+                'verbose_name_plural': 'Медленные запросы',
+                'ordering': ['-duration_ms'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='slowrequest',
+            index=models.Index(fields=['view', '-duration_ms'], name='slow_view_duration_idx'),
+        ),
+    ]
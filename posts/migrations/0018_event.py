@@ -0,0 +1,30 @@
+# Generated by Django 2.2.6 on 2026-10-18 07:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_slowrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10, verbose_name='Тип')),
+                ('post_id', models.PositiveIntegerField(verbose_name='Пост')),
+                ('author_id', models.PositiveIntegerField(verbose_name='Автор поста')),
+                ('group_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='Группа поста')),
+                ('payload', models.TextField(verbose_name='Данные (JSON)')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата')),
+            ],
+            options={
+                'verbose_name': 'Событие ленты',
+                'verbose_name_plural': 'События лент',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
@@ -1,3 +1,6 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -22,6 +25,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+
+    def for_feed(self):
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст публикации',
@@ -46,12 +55,59 @@ class Post(models.Model):
         help_text='Выберите изображение',
         blank=True, null=True
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Комментариев', default=0
+    )
+    thumbnail = models.CharField(
+        verbose_name='Миниатюра', max_length=255,
+        blank=True, editable=False
+    )
+    srcsets = models.TextField(
+        verbose_name='Варианты изображения', blank=True, editable=False,
+        help_text='JSON: формат -> значение srcset'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def _srcsets(self):
+        try:
+            srcsets = json.loads(self.srcsets)
+        except ValueError:
+            return {}
+        return srcsets if isinstance(srcsets, dict) else {}
+
+    @property
+    def image_sources(self):
+        """Пары (MIME-тип, srcset) для <source>, кроме запасного JPEG."""
+        return [
+            (f'image/{format}', self._srcsets[format])
+            for format in settings.IMAGE_VARIANT_FORMATS
+            if format != 'jpeg' and format in self._srcsets
+        ]
+
+    @property
+    def image_srcset(self):
+        return self._srcsets.get('jpeg', '')
+
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -74,6 +130,13 @@ class Comment(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -92,3 +155,125 @@ class Follow(models.Model):
                 name='unique_followings'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date', '-post']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entries'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
+
+
+class SearchTerm(models.Model):
+    TERM_LENGTH = 64
+
+    term = models.CharField(max_length=TERM_LENGTH)
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    comment = models.ForeignKey(
+        Comment, on_delete=models.CASCADE,
+        blank=True, null=True, related_name='search_terms'
+    )
+    count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'post'], name='search_term_post_idx'),
+        ]
+
+
+class MediaFile(models.Model):
+    """Счётчик ссылок на файл в хранилище с адресацией по содержимому."""
+    name = models.CharField(max_length=255, unique=True)
+    refs = models.PositiveIntegerField(default=0)
+    orphaned_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['refs', 'orphaned_at'], name='media_orphaned_idx'
+            ),
+        ]
+
+
+class SlowRequest(models.Model):
+    """Запрос дольше порога с профилем в формате collapsed stacks."""
+    view = models.CharField(verbose_name='View', max_length=200)
+    method = models.CharField(verbose_name='Метод', max_length=10)
+    path = models.CharField(verbose_name='Путь', max_length=2000)
+    duration_ms = models.PositiveIntegerField(verbose_name='Время, мс')
+    samples = models.PositiveIntegerField(verbose_name='Сэмплов')
+    profile = models.CharField(verbose_name='Файл профиля', max_length=255)
+    created = models.DateTimeField(
+        verbose_name='Дата', auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        ordering = ['-duration_ms']
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        indexes = [
+            models.Index(
+                fields=['view', '-duration_ms'], name='slow_view_duration_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.view} {self.duration_ms} мс'
+
+
+class Event(models.Model):
+    """Запись outbox: новый пост или комментарий для подписчиков SSE.
+
+    Поля не ссылаются на модели внешними ключами: событие переживает
+    удаление поста и не держит блокировки на связанных таблицах.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = ((POST, 'Пост'), (COMMENT, 'Комментарий'))
+
+    kind = models.CharField(verbose_name='Тип', max_length=10, choices=KINDS)
+    post_id = models.PositiveIntegerField(verbose_name='Пост')
+    author_id = models.PositiveIntegerField(verbose_name='Автор поста')
+    group_id = models.PositiveIntegerField(
+        verbose_name='Группа поста', blank=True, null=True
+    )
+    payload = models.TextField(verbose_name='Данные (JSON)')
+    created = models.DateTimeField(
+        verbose_name='Дата', auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        ordering = ['pk']
+        verbose_name = 'Событие ленты'
+        verbose_name_plural = 'События лент'
+
+    def __str__(self):
+        return f'{self.kind} {self.pk}'
@@ -0,0 +1,141 @@
+"""Кэш целых страниц для анонимных посетителей.
+
+Ответы ``index``, ``group_posts``, ``profile`` и ``post`` на GET без
+входа на сайт хранятся в кэше по пути и строке запроса. Ключ содержит
+версии областей, от которых зависит страница: главной, группы, профиля
+автора (его счётчики видны и на странице поста) и самого поста. Сигналы
+сдвигают версии только затронутых областей, старые ответы вытесняются
+по TTL.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .feed_cache import bump_version, get_versions
+from .replicas import may_cache
+
+CACHED_VIEWS = ('index', 'group_posts', 'profile', 'post')
+VERSION_KEY = 'page:version:{}'
+PAGE_KEY = 'page:{}:{}'
+HITS_KEY = 'page:hits'
+MISSES_KEY = 'page:misses'
+STORED_HEADERS = (
+    'Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Vary'
+)
+
+
+def scope(url_name, **kwargs):
+    return ':'.join(
+        [url_name, *(f'{key}={kwargs[key]}' for key in sorted(kwargs))]
+    )
+
+
+def page_scopes(url_name, kwargs):
+    scopes = [scope(url_name, **kwargs)]
+    if url_name == 'post':
+        scopes.append(scope('profile', username=kwargs['username']))
+    return scopes
+
+
+def invalidate(*scopes):
+    for page in set(scopes):
+        bump_version(VERSION_KEY.format(page))
+
+
+def post_scopes(post, group_slug=None):
+    username = post.author.username
+    scopes = [
+        scope('index'),
+        scope('profile', username=username),
+        scope('post', username=username, post_id=post.pk),
+    ]
+    if group_slug is not None:
+        scopes.append(scope('group_posts', slug=group_slug))
+    if post.group_id is not None:
+        scopes.append(scope('group_posts', slug=post.group.slug))
+    return scopes
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def stats():
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    return counters.get(HITS_KEY, 0), counters.get(MISSES_KEY, 0)
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def _cached_response(request, cached):
+    content, headers = cached
+    response = HttpResponse(content)
+    for header, value in headers:
+        response[header] = value
+    response['X-Page-Cache'] = 'hit'
+    return get_conditional_response(
+        request, etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(
+            response.get('Last-Modified', '')
+        ),
+        response=response
+    )
+
+
+class AnonymousPageCacheMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        key = getattr(request, '_page_cache_key', None)
+        if (
+            key is not None and self.cacheable(response) and may_cache()
+        ):
+            headers = [
+                (header, response[header])
+                for header in STORED_HEADERS if response.has_header(header)
+            ]
+            cache.set(
+                key, (response.content, headers),
+                settings.PAGE_CACHE_TIMEOUT
+            )
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if request.resolver_match.url_name not in CACHED_VIEWS:
+            return None
+        if request.user.is_authenticated:
+            return None
+        scopes = page_scopes(request.resolver_match.url_name, view_kwargs)
+        versions = get_versions([VERSION_KEY.format(page) for page in scopes])
+        key = PAGE_KEY.format(
+            '.'.join(str(version) for version in versions),
+            hashlib.md5(request.get_full_path().encode()).hexdigest()
+        )
+        cached = cache.get(key)
+        if cached is None:
+            _count(MISSES_KEY)
+            request._page_cache_key = key
+            return None
+        _count(HITS_KEY)
+        return _cached_response(request, cached)
+
+    def cacheable(self, response):
+        return (
+            response.status_code == 200 and not response.streaming
+            and not response.cookies
+        )
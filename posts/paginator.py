@@ -0,0 +1,153 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import lazy
+
+POSTS_PER_PAGE = 10
+
+NEXT = 'n'
+PREVIOUS = 'p'
+DEFAULT_ORDERING = ('-pub_date', '-pk')
+
+
+def post_position(post):
+    return post.pub_date, post.pk
+
+
+def encode_position(direction, position):
+    pub_date, pk = position
+    raw = f'{direction}{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def encode_cursor(direction, post):
+    return encode_position(direction, post_position(post))
+
+
+def decode_cursor(cursor):
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        pub_date, pk = raw[1:].split('|')
+        position = (parse_datetime(pub_date), int(pk))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Некорректный курсор')
+    if raw[0] not in (NEXT, PREVIOUS) or position[0] is None:
+        raise ValueError('Некорректный курсор')
+    return raw[0], position
+
+
+def cursor_fields(queryset):
+    """Поля ключа курсора: дата и pk."""
+    return tuple(
+        field.lstrip('-')
+        for field in queryset.query.order_by or DEFAULT_ORDERING
+    )
+
+
+class CursorPage(Page):
+
+    def __init__(self, object_list, paginator, cursor,
+                 next_cursor=None, previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<Page cursor={self.cursor or "-"}>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET.
+
+    Ключом служит явная сортировка queryset (два поля по убыванию, равные
+    pub_date и pk поста), иначе ``-pub_date, -pk``. Условие записано как
+    ``pub_date <= x AND (pub_date < x OR id < y)``, чтобы SQLite начинал
+    чтение индекса сразу с нужной позиции. ``position`` достаёт значения
+    ключа из строки страницы, если это не пост (например, из ``values()``).
+    """
+
+    def __init__(self, object_list, per_page, position=post_position):
+        ordering = object_list.query.order_by or DEFAULT_ORDERING
+        self.date_field, self.pk_field = cursor_fields(object_list)
+        self.object_list = object_list.order_by(*ordering)
+        self.per_page = per_page
+        self.position = position
+
+    def seek(self, pub_date, pk, before):
+        date_lookup = 'lt' if before else 'gt'
+        return self.object_list.filter(
+            Q(**{f'{self.date_field}__{date_lookup}': pub_date})
+            | Q(**{f'{self.pk_field}__{date_lookup}': pk}),
+            **{f'{self.date_field}__{date_lookup}e': pub_date}
+        )
+
+    def get_page(self, cursor):
+        try:
+            direction, (pub_date, pk) = decode_cursor(cursor or '')
+        except ValueError:
+            return self._first_page()
+        if direction == NEXT:
+            rows = list(
+                self.seek(pub_date, pk, before=True)[:self.per_page + 1]
+            )
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return self._page(
+                rows, cursor, next_cursor=has_more, previous_cursor=True
+            )
+        rows = list(
+            self.seek(pub_date, pk, before=False)
+            .reverse()[:self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return self._page(
+            rows, cursor, next_cursor=True, previous_cursor=has_more
+        )
+
+    def _first_page(self):
+        rows = list(self.object_list[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        return self._page(rows[:self.per_page], None, next_cursor=has_more)
+
+    def _page(self, rows, cursor, next_cursor=False, previous_cursor=False):
+        return CursorPage(
+            rows, self, cursor,
+            next_cursor=(
+                encode_position(NEXT, self.position(rows[-1]))
+                if rows and next_cursor else None
+            ),
+            previous_cursor=(
+                encode_position(PREVIOUS, self.position(rows[0]))
+                if rows and previous_cursor else None
+            ),
+        )
+
+
+def paginate(request, queryset):
+    cursor = request.GET.get('cursor')
+    if cursor is not None:
+        return CursorPaginator(queryset, POSTS_PER_PAGE).get_page(cursor)
+    page = Paginator(queryset, POSTS_PER_PAGE).get_page(
+        request.GET.get('page')
+    )
+    # Как и у CursorPage, курсор есть только при следующей странице;
+    # кодируется он лениво, при первом обращении из шаблона.
+    page.next_cursor = lazy(
+        lambda: encode_cursor(NEXT, page[len(page) - 1]), str
+    )() if page.has_next() else None
+    return page
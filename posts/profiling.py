@@ -0,0 +1,157 @@
+"""Сэмплирующий профилировщик медленных запросов.
+
+Пока ``SLOW_REQUEST_PROFILING`` включён, один фоновый поток на процесс
+каждые ``SLOW_REQUEST_SAMPLE_INTERVAL`` секунд снимает стеки потоков,
+которые сейчас обрабатывают запросы; без запросов поток завершается.
+Запрос дольше ``SLOW_REQUEST_THRESHOLD_MS`` сохраняется в
+``SLOW_REQUEST_PROFILE_DIR`` в формате collapsed stacks (его читают
+flamegraph.pl и speedscope) и в таблицу ``SlowRequest``. Для каждого
+view сохраняется не больше одного профиля за
+``SLOW_REQUEST_RATE_LIMIT`` секунд, хранятся последние
+``SLOW_REQUEST_MAX_PROFILES`` профилей.
+"""
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .metrics import view_name
+from .models import SlowRequest
+
+MAX_DEPTH = 128
+# Сколько секунд поток ждёт новых запросов, прежде чем завершиться.
+IDLE_TIMEOUT = 1
+RATE_KEY = 'slow:{}'
+
+
+def collapse(frame):
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        module = frame.f_globals.get('__name__', '?')
+        names.append(
+            f'{module}:{getattr(code, "co_qualname", code.co_name)}'
+        )
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler:
+    """Фоновый поток, снимающий стеки зарегистрированных потоков."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stacks = {}
+        self.thread = None
+
+    def start(self, interval):
+        ident = threading.get_ident()
+        with self.lock:
+            self.stacks[ident] = Counter()
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, args=(interval,), daemon=True,
+                    name='slow-request-sampler'
+                )
+                self.thread.start()
+
+    def stop(self):
+        with self.lock:
+            return self.stacks.pop(threading.get_ident(), Counter())
+
+    def run(self, interval):
+        idle_since = None
+        while True:
+            time.sleep(interval)
+            with self.lock:
+                if not self.stacks:
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since > IDLE_TIMEOUT:
+                        self.thread = None
+                        return
+                    continue
+                idle_since = None
+                frames = sys._current_frames()
+                for ident, stacks in self.stacks.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[collapse(frame)] += 1
+
+
+sampler = Sampler()
+
+
+def write_profile(view, stacks):
+    directory = settings.SLOW_REQUEST_PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = (
+        f'{timezone.now():%Y%m%d-%H%M%S}-{view.replace(":", "-")}-'
+        f'{uuid.uuid4().hex[:8]}.folded'
+    )
+    with open(os.path.join(directory, name), 'w') as profile:
+        for stack, count in stacks.most_common():
+            profile.write(f'{stack} {count}\n')
+    return name
+
+
+def rotate():
+    stale = SlowRequest.objects.order_by('-created', '-pk')[
+        settings.SLOW_REQUEST_MAX_PROFILES:
+    ]
+    for pk, name in stale.values_list('pk', 'profile'):
+        try:
+            os.remove(os.path.join(settings.SLOW_REQUEST_PROFILE_DIR, name))
+        except FileNotFoundError:
+            pass
+        SlowRequest.objects.filter(pk=pk).delete()
+
+
+def read_profile(name):
+    path = os.path.join(settings.SLOW_REQUEST_PROFILE_DIR, name)
+    try:
+        with open(path) as profile:
+            return profile.read()
+    except FileNotFoundError:
+        return ''
+
+
+def save(request, duration_ms, stacks):
+    view = view_name(request)
+    if not cache.add(
+        RATE_KEY.format(view), 1, settings.SLOW_REQUEST_RATE_LIMIT
+    ):
+        return None
+    slow_request = SlowRequest.objects.create(
+        view=view, method=request.method,
+        path=request.get_full_path()[:2000],
+        duration_ms=duration_ms, samples=sum(stacks.values()),
+        profile=write_profile(view, stacks),
+    )
+    rotate()
+    return slow_request
+
+
+class SlowRequestMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SLOW_REQUEST_PROFILING:
+            return self.get_response(request)
+        sampler.start(settings.SLOW_REQUEST_SAMPLE_INTERVAL)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        if duration_ms >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            save(request, duration_ms, stacks)
+        return response
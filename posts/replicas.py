@@ -0,0 +1,109 @@
+"""Чтение лент с реплик базы.
+
+View, помеченные ``replica_reads``, на GET читают модели приложений
+``REPLICA_APPS`` с одной из ``REPLICA_DATABASES``. Запись всегда идёт в
+``default``. После записи пользователь ``REPLICA_STICKY_SECONDS`` секунд
+читает только с ``default``, чтобы увидеть свои изменения, которые ещё
+не доехали до реплики. Внутри транзакции чтение тоже идёт в ``default``.
+
+Столько же секунд после любого сдвига версий кэша лент и страниц
+прочитанное с реплики не кэшируется (``may_cache``): отстающая реплика
+отдала бы старые данные, и они легли бы в кэш под новой версией.
+Отметки записи хранятся в кэше ``default``; с кэшем в памяти процесса
+(``locmem``) каждый воркер видит только свои, поэтому при нескольких
+воркерах нужен общий кэш (``YATUBE_CACHE``).
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_APPS = ('posts', 'users')
+STICKY_KEY = 'replica:sticky:{}'
+LAG_KEY = 'replica:lag'
+
+_state = threading.local()
+
+
+def replica_reads(view):
+    """Разрешает view читать с реплики."""
+    view.replica_reads = True
+    return view
+
+
+def current_replica():
+    return getattr(_state, 'replica', None)
+
+
+def note_change():
+    """Отмечает сдвиг версий кэша, до которого реплики могут не доехать."""
+    if settings.REPLICA_DATABASES:
+        cache.set(LAG_KEY, 1, settings.REPLICA_STICKY_SECONDS)
+
+
+def may_cache():
+    """Можно ли кэшировать данные, прочитанные в этом запросе."""
+    return current_replica() is None or cache.get(LAG_KEY) is None
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replica = current_replica()
+        if (
+            replica is None
+            or model._meta.app_label not in REPLICA_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in REPLICA_APPS:
+            _state.replica = None
+            _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.REPLICA_DATABASES
+
+
+def is_sticky(user):
+    return (
+        user.is_authenticated
+        and cache.get(STICKY_KEY.format(user.pk)) is not None
+    )
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.replica, _state.wrote = None, False
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = _state.wrote
+            _state.replica, _state.wrote = None, False
+        if wrote and request.user.is_authenticated:
+            cache.set(
+                STICKY_KEY.format(request.user.pk), 1,
+                settings.REPLICA_STICKY_SECONDS
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.REPLICA_DATABASES
+            and getattr(view_func, 'replica_reads', False)
+            and request.method in ('GET', 'HEAD')
+            and not is_sticky(request.user)
+        ):
+            _state.replica = random.choice(settings.REPLICA_DATABASES)
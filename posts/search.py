@@ -0,0 +1,253 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Тексты разбиваются на слова и приводятся к основам русским стеммером,
+поэтому «котах» находит «коты». Если SQLite собран с FTS5, основы
+хранятся в виртуальной таблице ``posts_search`` и ранжируются bm25,
+иначе — в таблице ``SearchTerm`` с ранжированием по tf-idf.
+"""
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from .models import Comment, Post, SearchTerm
+from .stemmer import stem
+
+FTS_TABLE = 'posts_search'
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    return [stem(word) for word in WORD_RE.findall(text.lower())]
+
+
+_fts5_tables = {}
+
+
+def fts5_available():
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts5_tables:
+        _fts5_tables[name] = (
+            FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts5_tables[name]
+
+
+class Fts5Backend:
+
+    def _rowid(self, post_id, comment_id):
+        return post_id * 2 if comment_id is None else comment_id * 2 + 1
+
+    def index(self, post_id, comment_id, text):
+        rowid = self._rowid(post_id, comment_id)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [rowid]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, body, post_id, comment_id)'
+                f' VALUES (%s, %s, %s, %s)',
+                [rowid, ' '.join(tokenize(text)), post_id, comment_id]
+            )
+
+    def remove(self, post_id, comment_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [self._rowid(post_id, comment_id)]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def _match(self, terms):
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def count(self, terms):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(DISTINCT post_id) FROM {FTS_TABLE}'
+                f' WHERE {FTS_TABLE} MATCH %s',
+                [self._match(terms)]
+            )
+            return cursor.fetchone()[0]
+
+    def post_ids(self, terms, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+                f' GROUP BY post_id ORDER BY MIN(rank), post_id DESC'
+                f' LIMIT %s OFFSET %s',
+                [self._match(terms), limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def comment_ids(self, terms, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT comment_id FROM {FTS_TABLE}'
+                f' WHERE {FTS_TABLE} MATCH %s AND comment_id IS NOT NULL'
+                f' ORDER BY rank LIMIT %s',
+                [self._match(terms), limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SimpleBackend:
+
+    def index(self, post_id, comment_id, text):
+        self.remove(post_id, comment_id)
+        SearchTerm.objects.bulk_create(
+            SearchTerm(
+                term=term[:SearchTerm.TERM_LENGTH], post_id=post_id,
+                comment_id=comment_id, count=count
+            )
+            for term, count in Counter(tokenize(text)).items()
+        )
+
+    def remove(self, post_id, comment_id):
+        SearchTerm.objects.filter(
+            post_id=post_id, comment_id=comment_id
+        ).delete()
+
+    def clear(self):
+        SearchTerm.objects.all().delete()
+
+    def _matches(self, terms, group_by):
+        terms = [term[:SearchTerm.TERM_LENGTH] for term in terms]
+        documents = Post.objects.count() + Comment.objects.count()
+        frequencies = dict(
+            SearchTerm.objects.filter(term__in=terms).values('term')
+            .annotate(total=Count('pk')).values_list('term', 'total')
+        )
+        weights = [
+            When(term=term, then=F('count') * Value(
+                math.log(1 + documents / frequencies.get(term, 1))
+            ))
+            for term in terms
+        ]
+        return (
+            SearchTerm.objects.filter(term__in=terms).values(group_by)
+            .annotate(
+                found=Count('term', distinct=True),
+                score=Sum(Case(*weights, output_field=FloatField()))
+            )
+            .filter(found=len(set(terms)))
+            .order_by('-score', f'-{group_by}')
+        )
+
+    def count(self, terms):
+        return self._matches(terms, 'post').count()
+
+    def post_ids(self, terms, offset, limit):
+        return list(
+            self._matches(terms, 'post')
+            .values_list('post', flat=True)[offset:offset + limit]
+        )
+
+    def comment_ids(self, terms, limit):
+        return list(
+            self._matches(terms, 'comment').filter(comment__isnull=False)
+            .values_list('comment', flat=True)[:limit]
+        )
+
+
+BACKENDS = {'fts5': Fts5Backend, 'simple': SimpleBackend}
+
+
+def get_backend():
+    name = settings.SEARCH_BACKEND
+    if name == 'auto':
+        name = 'fts5' if fts5_available() else 'simple'
+    return BACKENDS[name]()
+
+
+class SearchResults:
+    """Ранжированные посты; лениво читает страницы для Paginator."""
+
+    def __init__(self, query):
+        self.terms = tokenize(query)
+        self.backend = get_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.terms) if self.terms else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        if not self.terms:
+            return []
+        start = item.start or 0
+        ids = self.backend.post_ids(self.terms, start, item.stop - start)
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    return SearchResults(query)
+
+
+def matching_post_ids(query):
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_backend().post_ids(terms, 0, settings.SEARCH_ADMIN_LIMIT)
+
+
+def matching_comment_ids(query):
+    terms = tokenize(query)
+    if not terms:
+        return []
+    return get_backend().comment_ids(terms, settings.SEARCH_ADMIN_LIMIT)
+
+
+def index_post(post):
+    get_backend().index(post.pk, None, post.text)
+
+
+def index_comment(comment):
+    get_backend().index(comment.post_id, comment.pk, comment.text)
+
+
+def remove_post(post):
+    get_backend().remove(post.pk, None)
+
+
+def remove_comment(comment):
+    get_backend().remove(comment.post_id, comment.pk)
+
+
+def _in_batches(queryset, batch_size):
+    batch = []
+    for obj in queryset.order_by().iterator(chunk_size=batch_size):
+        batch.append(obj)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild(batch_size=500):
+    backend = get_backend()
+    backend.clear()
+    for batch in _in_batches(Post.objects.all(), batch_size):
+        with transaction.atomic():
+            for post in batch:
+                backend.index(post.pk, None, post.text)
+    for batch in _in_batches(Comment.objects.all(), batch_size):
+        with transaction.atomic():
+            for comment in batch:
+                backend.index(comment.post_id, comment.pk, comment.text)
@@ -0,0 +1,105 @@
+"""Синтетические данные для нагрузочных тестов.
+
+Популярность распределена по степенному закону: номер ``int(n *
+random() ** SKEW)`` чаще всего мал, поэтому первые авторы получают
+большую часть подписчиков и постов, а самые новые посты — большую часть
+комментариев. Записи выдаются потоком в формате ``posts.bulk`` и
+сохраняются ``Importer`` пачками, память не растёт с объёмом.
+"""
+import io
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+SKEW = 3
+WORDS = (
+    'кот', 'собака', 'город', 'море', 'книга', 'утро', 'дорога', 'лес',
+    'река', 'поезд', 'письмо', 'зима', 'лето', 'песня', 'друг', 'окно',
+    'дом', 'небо', 'ветер', 'сад', 'читать', 'гулять', 'думать',
+    'писать', 'смотреть', 'тихий', 'новый', 'старый', 'тёплый',
+    'далёкий', 'сегодня', 'вечером', 'снова', 'долго', 'вместе',
+)
+IMAGE_SIZE = (1280, 720)
+
+
+def skewed(rng, total):
+    return int(total * rng.random() ** SKEW)
+
+
+def text(rng, low, high):
+    words = rng.choices(WORDS, k=rng.randint(low, high))
+    return ' '.join(words).capitalize() + '.'
+
+
+def color(rng):
+    return tuple(rng.choices(range(256), k=3))
+
+
+def make_images(rng, count):
+    """Сохраняет count разных JPEG и возвращает их имена в хранилище."""
+    names = []
+    width, height = IMAGE_SIZE
+    for number in range(count):
+        image = Image.new('RGB', IMAGE_SIZE, color(rng))
+        draw = ImageDraw.Draw(image)
+        for _ in range(8):
+            left, top = rng.randrange(width), rng.randrange(height)
+            draw.rectangle(
+                (left, top, left + rng.randrange(width // 3),
+                 top + rng.randrange(height // 3)),
+                fill=color(rng)
+            )
+        content = io.BytesIO()
+        image.save(content, 'JPEG', quality=85)
+        names.append(default_storage.save(
+            f'posts/load_{number}.jpg', ContentFile(content.getvalue())
+        ))
+    return names
+
+
+def records(rng, users, groups, posts, follows, comments, images=(),
+            image_ratio=0, days=365, first_post_id=1, first_comment_id=1):
+    now = timezone.now()
+    step = timedelta(days=days) / max(posts, 1)
+
+    def pub_date(number):
+        return now - timedelta(days=days) + step * number
+
+    for number in range(users):
+        yield 'user', {'username': f'load_{number}'}
+    for number in range(groups):
+        yield 'group', {'slug': f'load-{number}', 'title': f'Группа {number}'}
+    for number in range(posts):
+        yield 'post', {
+            'id': first_post_id + number,
+            'text': text(rng, 5, 60),
+            'pub_date': pub_date(number).isoformat(),
+            'author': f'load_{skewed(rng, users)}',
+            'group': (
+                f'load-{rng.randrange(groups)}'
+                if groups and rng.random() < 0.5 else ''
+            ),
+            'image': (
+                rng.choice(images)
+                if images and rng.random() < image_ratio else ''
+            ),
+        }
+    for number in range(comments if posts else 0):
+        post = posts - 1 - skewed(rng, posts)
+        yield 'comment', {
+            'id': first_comment_id + number,
+            'post': first_post_id + post,
+            'author': f'load_{rng.randrange(users)}',
+            'text': text(rng, 2, 25),
+            'created': min(
+                now, pub_date(post) + timedelta(hours=rng.random() * 72)
+            ).isoformat(),
+        }
+    for _ in range(follows):
+        yield 'follow', {
+            'user': f'load_{rng.randrange(users)}',
+            'author': f'load_{skewed(rng, users)}',
+        }
@@ -0,0 +1,205 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (
+    counters, events, feed_cache, page_cache, search, storage, thumbnails,
+    timeline
+)
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_profile(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.bump_profile(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.bump_profile(instance.author_id, 'followers_count', 1)
+        counters.bump_profile(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.bump_profile(instance.author_id, 'followers_count', -1)
+    counters.bump_profile(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def publish_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        events.publish_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def publish_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        events.publish_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_feeds(sender, raw=False, **kwargs):
+    if not raw:
+        feed_cache.bump_feed_version()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        feed_cache.bump_follow_version(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        page_cache.invalidate(*page_cache.post_scopes(
+            instance, getattr(instance, '_stored_group_slug', None)
+        ))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        page_cache.invalidate(*page_cache.post_scopes(instance.post))
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None:
+        instance._stored_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    slugs = {instance.slug, getattr(instance, '_stored_slug', None)}
+    page_cache.invalidate(*(
+        page_cache.scope('group_posts', slug=slug) for slug in slugs if slug
+    ))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        page_cache.invalidate(
+            page_cache.scope('profile', username=instance.user.username),
+            page_cache.scope('profile', username=instance.author.username)
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_profile_page(sender, instance, raw=False, **kwargs):
+    if not raw:
+        page_cache.invalidate(
+            page_cache.scope('profile', username=instance.username)
+        )
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_post(instance)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.remove_comment(instance)
+
+
+@receiver(pre_save, sender=Post)
+def compare_with_stored(sender, instance, raw=False, **kwargs):
+    """Запоминает прежнюю группу и сбрасывает миниатюры при смене
+    картинки."""
+    if raw or instance.pk is None:
+        return
+    stored = Post.objects.filter(pk=instance.pk).values_list(
+        'image', 'srcsets', 'group__slug'
+    ).first()
+    if stored is None:
+        return
+    instance._stored_group_slug = stored[2]
+    if stored[0] != (instance.image.name or None):
+        instance.thumbnail = instance.srcsets = ''
+        instance._replaced_media = thumbnails.variant_names(stored[1])
+        if stored[0]:
+            instance._replaced_media.append(stored[0])
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnail(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if hasattr(instance, '_replaced_media'):
+        storage.release(instance._replaced_media)
+        del instance._replaced_media
+    if instance.image and not instance.thumbnail:
+        thumbnails.schedule_thumbnail(instance.pk, instance.image.name)
+
+
+@receiver(post_delete, sender=Post)
+def release_media(sender, instance, **kwargs):
+    names = thumbnails.variant_names(instance.srcsets)
+    if instance.image:
+        names.append(instance.image.name)
+    storage.release(names)
@@ -0,0 +1,123 @@
+"""Стеммер Портера (Snowball) для русского языка."""
+from functools import lru_cache
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+        'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую',
+        'юю', 'ая', 'яя', 'ою', 'ею',
+    ),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    (),
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+        'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+        'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+        'ья', 'я',
+    ),
+)
+DERIVATIONAL = ((), ('ост', 'ость'))
+SUPERLATIVE = ((), ('ейш', 'ейше'))
+STEM_CACHE_SIZE = 50_000
+
+
+def _after_vowel_consonant(word, start):
+    for position in range(start + 1, len(word)):
+        if word[position] not in VOWELS and word[position - 1] in VOWELS:
+            return position + 1
+    return len(word)
+
+
+def _regions(word):
+    rv = len(word)
+    for position, letter in enumerate(word):
+        if letter in VOWELS:
+            rv = position + 1
+            break
+    r1 = _after_vowel_consonant(word, 0)
+    r2 = _after_vowel_consonant(word, r1)
+    return rv, r2
+
+
+@lru_cache(maxsize=None)
+def _candidates(groups):
+    return sorted(
+        (
+            (suffix, index == 0)
+            for index, group in enumerate(groups) for suffix in group
+        ),
+        key=lambda candidate: len(candidate[0]), reverse=True
+    )
+
+
+def _strip(word, limit, groups):
+    """Удаляет самое длинное окончание из groups, лежащее за limit.
+
+    Окончания первой группы допустимы только после «а» или «я».
+    """
+    for suffix, after_a in _candidates(groups):
+        stem = word[:len(word) - len(suffix)]
+        if not word.endswith(suffix) or len(stem) < limit:
+            continue
+        if after_a and not (len(stem) > limit and stem[-1] in 'ая'):
+            return None
+        return stem
+    return None
+
+
+def _strip_adjectival(word, rv):
+    stem = _strip(word, rv, ADJECTIVE)
+    if stem is None:
+        return None
+    return _strip(stem, rv, PARTICIPLE) or stem
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    stem = _strip(word, rv, PERFECTIVE_GERUND)
+    if stem is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        stem = (
+            _strip_adjectival(word, rv)
+            or _strip(word, rv, VERB)
+            or _strip(word, rv, NOUN)
+            or word
+        )
+    word = stem
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _strip(word, max(r2, rv), DERIVATIONAL) or word
+    superlative = _strip(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        word = superlative
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        return word[:-1]
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
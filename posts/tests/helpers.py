@@ -0,0 +1,44 @@
+"""Общие заготовки тестов с загрузкой картинок."""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class TemporaryMediaMixin:
+    """Файлы тестов класса пишутся во временный ``MEDIA_ROOT``, который
+    удаляется после них."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_settings = override_settings(
+            MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR)
+        )
+        cls.media_settings.enable()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls.remove_media()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls.remove_media()
+
+    @classmethod
+    def remove_media(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        cls.media_settings.disable()
@@ -0,0 +1,98 @@
+import asyncio
+import io
+
+from django.test import SimpleTestCase, override_settings
+
+from yatube.asgi import application, wsgi_environ
+
+
+def call(scope, messages):
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Future()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class AsgiTests(SimpleTestCase):
+    def test_environ(self):
+        """Запрос ASGI переводится в окружение WSGI."""
+        environ = wsgi_environ({
+            'type': 'http', 'method': 'POST', 'path': '/группа/',
+            'query_string': b'page=2', 'client': ('10.0.0.1', 5000),
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'x-forwarded-for', b'1.1.1.1'),
+                (b'x-forwarded-for', b'2.2.2.2'),
+            ],
+        }, io.BytesIO(b'{}'))
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/группа/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'application/json')
+        self.assertEqual(environ['HTTP_X_FORWARDED_FOR'], '1.1.1.1,2.2.2.2')
+        self.assertEqual(environ['REMOTE_ADDR'], '10.0.0.1')
+        self.assertEqual(environ['wsgi.input'].read(), b'{}')
+
+    def test_request(self):
+        """Django отвечает через мост ASGI."""
+        sent = call(
+            {
+                'type': 'http', 'method': 'GET', 'path': '/about/author/',
+                'query_string': b'', 'headers': [(b'host', b'localhost')],
+            },
+            [{'type': 'http.request', 'body': b''}]
+        )
+        start, body = sent
+        self.assertEqual(start['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'), start['headers']
+        )
+        self.assertIn('Об авторе'.encode(), body['body'])
+
+    @override_settings(MAX_UPLOAD_SIZE=8, DATA_UPLOAD_MAX_MEMORY_SIZE=8)
+    def test_body_too_large(self):
+        """Слишком длинное тело отклоняется, не доходя до Django."""
+        scope = {
+            'type': 'http', 'method': 'POST', 'path': '/new/',
+            'query_string': b'', 'headers': [(b'host', b'localhost')],
+        }
+        declared = {
+            **scope, 'headers': [*scope['headers'], (b'content-length', b'17')]
+        }
+        chunks = [
+            {'type': 'http.request', 'body': b'x' * 10, 'more_body': True},
+            {'type': 'http.request', 'body': b'x' * 10},
+        ]
+        for scope, messages in ((declared, []), (scope, chunks)):
+            with self.subTest(headers=scope['headers']):
+                start, body = call(scope, messages)
+                self.assertEqual(start['status'], 413)
+
+    def test_lifespan(self):
+        """Сервер получает подтверждение запуска."""
+        sent = []
+
+        async def run():
+            messages = asyncio.Queue()
+            await messages.put({'type': 'lifespan.startup'})
+
+            async def send(message):
+                sent.append(message)
+
+            task = asyncio.ensure_future(
+                application({'type': 'lifespan'}, messages.get, send)
+            )
+            await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(run())
+        self.assertEqual(sent, [{'type': 'lifespan.startup.complete'}])
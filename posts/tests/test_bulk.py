@@ -0,0 +1,155 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import bulk, search
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+from users.models import Profile
+
+User = get_user_model()
+
+
+class BulkImportExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Author', password='x')
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Коты спят', author=cls.author, group=cls.group
+        )
+        cls.published = timezone.now() - timedelta(days=3)
+        Post.objects.filter(pk=cls.post.pk).update(pub_date=cls.published)
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Собаки лают'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def export(self, path, *args):
+        call_command('export_yatube', path, *args)
+
+    def load(self, path, *args):
+        call_command('import_yatube', path, *args, stdout=StringIO())
+
+    def dump_path(self, name):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return os.path.join(directory.name, name)
+
+    def round_trip(self, name, *args):
+        path = self.dump_path(name)
+        self.export(path, '--with-passwords')
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.load(path, '--batch-size', '1', *args)
+        return path
+
+    def test_round_trip(self):
+        """Выгрузка загружается обратно с теми же id, датами и связями."""
+        for name in ('dump.ndjson', 'dump.csv.gz'):
+            with self.subTest(name=name):
+                self.round_trip(name)
+                post = Post.objects.get(pk=self.post.pk)
+                self.assertEqual(post.pub_date, self.published)
+                self.assertEqual(post.author.username, 'Author')
+                self.assertEqual(post.group.slug, 'group')
+                self.assertTrue(post.author.check_password('x'))
+                comment = Comment.objects.get(pk=self.comment.pk)
+                self.assertEqual(comment.author.username, 'Reader')
+                self.assertTrue(Follow.objects.filter(
+                    user__username='Reader', author__username='Author'
+                ).exists())
+
+    def test_passwords_are_exported_on_request(self):
+        """Без --with-passwords хеши паролей не выгружаются."""
+        path = self.dump_path('dump.ndjson')
+        self.export(path)
+        with open(path) as dump:
+            self.assertNotIn('"password"', dump.read())
+        User.objects.all().delete()
+        self.load(path)
+        author = User.objects.get(username='Author')
+        self.assertFalse(author.has_usable_password())
+
+    def test_import_applies_signal_effects(self):
+        """Импорт пересчитывает счётчики, ленту подписок и поиск."""
+        self.round_trip('dump.ndjson')
+        reader = User.objects.get(username='Reader')
+        self.assertEqual(Post.objects.get().comments_count, 1)
+        self.assertEqual(
+            Profile.objects.values_list(
+                'posts_count', 'followers_count'
+            ).get(user__username='Author'),
+            (1, 1)
+        )
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=reader, post_id=self.post.pk
+        ).exists())
+        self.assertEqual(
+            search.matching_post_ids('кот'), [self.post.pk]
+        )
+
+    def test_import_without_signals(self):
+        """С --no-signals загружаются только сами записи."""
+        self.round_trip('dump.ndjson', '--no-signals')
+        self.assertEqual(Post.objects.get().comments_count, 0)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertFalse(Profile.objects.exists())
+
+    def test_existing_records_are_skipped(self):
+        """Повторный импорт не создаёт дублей."""
+        path = self.dump_path('dump.ndjson')
+        self.export(path)
+        out = StringIO()
+        call_command('import_yatube', path, stdout=out)
+        self.assertIn('post: загружено 0, пропущено 1', out.getvalue())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_import_into_database_with_other_posts(self):
+        """Пост, чей id занят чужим постом, получает новый id вместе со
+        своими комментариями; комментарии пропущенных постов не
+        загружаются."""
+        path = self.dump_path('dump.ndjson')
+        self.export(path)
+        with bulk.open_file(path, 'a') as dump:
+            bulk.write_ndjson([
+                ('post', {
+                    'id': 999, 'text': 'Без автора', 'author': 'Nobody',
+                    'pub_date': self.published.isoformat(),
+                }),
+                ('comment', {
+                    'id': 999, 'post': 999, 'author': 'Reader',
+                    'text': 'Сирота', 'created': '',
+                }),
+            ], dump)
+        Post.objects.all().delete()
+        local = Post.objects.create(
+            pk=self.post.pk, text='Местный пост', author=self.reader
+        )
+        other = Post.objects.create(
+            pk=999, text='Другой пост', author=self.reader
+        )
+        self.load(path)
+        self.assertFalse(Comment.objects.filter(
+            post__in=[local, other]
+        ).exists())
+        imported = Post.objects.exclude(pk__in=[local.pk, other.pk]).get()
+        self.assertEqual(imported.text, 'Коты спят')
+        self.assertEqual(
+            list(imported.comments.values_list('text', flat=True)),
+            ['Собаки лают']
+        )
+        self.assertFalse(Comment.objects.filter(text='Сирота').exists())
+        self.load(path)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 1)
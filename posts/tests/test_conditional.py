@@ -0,0 +1,136 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTests.reader)
+        self.urls = (
+            reverse('index'),
+            reverse('group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('profile', kwargs={'username': 'Author'}),
+            reverse('post', kwargs={
+                'username': 'Author', 'post_id': ConditionalGetTests.post.pk
+            }),
+        )
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_page_returns_304_after_one_query(self):
+        """Неизменившаяся страница отдаёт 304 после одного запроса
+        (кроме чтения сессии и пользователя)."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.has_header('Last-Modified'))
+                with self.assertNumQueries(3):
+                    repeated = self.revalidate(
+                        self.authorized_client, url, response
+                    )
+                self.assertEqual(repeated.status_code, 304)
+
+    def test_if_modified_since_ignores_edits(self):
+        """If-Modified-Since не даёт 304 на устаревшую страницу: время
+        публикации не меняется при правке поста и группы."""
+        since = http_date(time.time() + 60)
+        changes = (
+            lambda: Post.objects.filter(
+                pk=ConditionalGetTests.post.pk
+            ).first().save(),
+            lambda: Group.objects.filter(
+                pk=ConditionalGetTests.group.pk
+            ).first().save(),
+        )
+        for change in changes:
+            change()
+            for url in self.urls:
+                with self.subTest(url=url):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_MODIFIED_SINCE=since
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+    def test_changes_invalidate_etag(self):
+        """Новый пост, комментарий и правка меняют ETag."""
+        changes = (
+            lambda: Post.objects.create(
+                text='Новый пост', author=ConditionalGetTests.author,
+                group=ConditionalGetTests.group
+            ),
+            lambda: Comment.objects.create(
+                post=ConditionalGetTests.post,
+                author=ConditionalGetTests.reader, text='Комментарий'
+            ),
+            lambda: Post.objects.filter(
+                pk=ConditionalGetTests.post.pk
+            ).first().save(),
+        )
+        for change in changes:
+            responses = [self.guest_client.get(url) for url in self.urls]
+            change()
+            for url, response in zip(self.urls, responses):
+                with self.subTest(url=url):
+                    repeated = self.revalidate(
+                        self.guest_client, url, response
+                    )
+                    self.assertEqual(repeated.status_code, 200)
+
+    def test_follow_invalidates_profile(self):
+        """Подписка меняет ETag профиля у подписчика."""
+        url = self.urls[2]
+        response = self.authorized_client.get(url)
+        Follow.objects.create(
+            user=ConditionalGetTests.reader, author=ConditionalGetTests.author
+        )
+        repeated = self.revalidate(self.authorized_client, url, response)
+        self.assertEqual(repeated.status_code, 200)
+        self.assertContains(repeated, 'Отписаться')
+
+    def test_etag_depends_on_user(self):
+        """Гость и пользователь получают разные ETag, страница
+        пользователя не кэшируется общими кэшами."""
+        url = self.urls[0]
+        guest = self.guest_client.get(url)
+        user = self.authorized_client.get(url)
+        self.assertNotEqual(guest['ETag'], user['ETag'])
+        self.assertIn('private', user['Cache-Control'])
+        self.assertEqual(
+            self.revalidate(self.authorized_client, url, guest).status_code,
+            200
+        )
+
+    def test_missing_page_has_no_etag(self):
+        """Для несуществующей группы отдаётся 404 без ETag."""
+        response = self.guest_client.get(
+            reverse('group_posts', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post
+from users.models import Profile
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.reader = User.objects.create(username='Reader')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def counts(self, user):
+        return Profile.objects.values_list(
+            'posts_count', 'followers_count', 'following_count'
+        ).get(user=user)
+
+    def test_post_counter(self):
+        """Счётчик записей меняется при создании и удалении поста."""
+        post = Post.objects.create(text='Ещё пост', author=self.author)
+        self.assertEqual(self.counts(self.author)[0], 2)
+        post.delete()
+        self.assertEqual(self.counts(self.author)[0], 1)
+
+    def test_follow_counters(self):
+        """Подписка меняет счётчики подписчиков и подписок."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.counts(self.author), (1, 1, 0))
+        self.assertEqual(self.counts(self.reader), (0, 0, 1))
+        follow.delete()
+        self.assertEqual(self.counts(self.author), (1, 0, 0))
+        self.assertEqual(self.counts(self.reader), (0, 0, 0))
+
+    def test_comment_counter(self):
+        """Счётчик комментариев поста меняется при комментировании."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_missing_profile_is_recounted(self):
+        """Профиль без строки счётчиков создаётся с верными значениями."""
+        Profile.objects.filter(user=self.author).delete()
+        Post.objects.create(text='Ещё пост', author=self.author)
+        self.assertEqual(self.counts(self.author)[0], 2)
+
+    def test_recount_counters_fixes_drift(self):
+        """recount_counters исправляет разошедшиеся счётчики."""
+        Profile.objects.filter(user=self.author).update(
+            posts_count=10, followers_count=3
+        )
+        Post.objects.filter(pk=self.post.pk).update(comments_count=7)
+        Profile.objects.filter(user=self.reader).delete()
+        call_command('recount_counters', stdout=StringIO())
+        self.assertEqual(self.counts(self.author), (1, 0, 0))
+        self.assertEqual(self.counts(self.reader), (0, 0, 0))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
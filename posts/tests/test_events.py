@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+
+from posts import events
+from posts.models import Comment, Event, Follow, Group, Post
+
+User = get_user_model()
+
+
+def parse(chunk):
+    """События из куска потока SSE: список пар (тип, данные)."""
+    parsed = []
+    for block in chunk.decode().split('\n\n'):
+        fields = dict(
+            line.split(': ', 1) for line in block.splitlines()
+            if ': ' in line and not line.startswith(':')
+        )
+        if 'event' in fields:
+            parsed.append((fields['event'], json.loads(fields['data'])))
+    return parsed
+
+
+@override_settings(EVENTS_KEEPALIVE=0.01)
+class EventTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        self.broker = events.Broker()
+        self.default_broker, events.broker = events.broker, self.broker
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(EventTests.reader)
+
+    def tearDown(self):
+        events.broker = self.default_broker
+
+    def test_signals_write_outbox(self):
+        """Новые пост и комментарий попадают в outbox с автором и группой."""
+        post = Post.objects.create(
+            text='Пост', author=EventTests.author, group=EventTests.group
+        )
+        Comment.objects.create(post=post, author=EventTests.reader, text='К')
+        post_event, comment_event = Event.objects.all()
+        self.assertEqual(post_event.kind, Event.POST)
+        self.assertEqual(comment_event.kind, Event.COMMENT)
+        for event in (post_event, comment_event):
+            self.assertEqual(event.author_id, EventTests.author.pk)
+            self.assertEqual(event.group_id, EventTests.group.pk)
+        self.assertEqual(json.loads(comment_event.payload)['author'], 'reader')
+
+    def test_broker_filters_and_limits_queue(self):
+        """Подписчик получает только свои события, очередь ограничена."""
+        group_listener = self.broker.subscribe(
+            events.matcher({'group_id': EventTests.group.pk})
+        )
+        with self.settings(EVENTS_QUEUE_SIZE=1):
+            author_listener = self.broker.subscribe(
+                events.matcher({'author_id__in': [EventTests.author.pk]})
+            )
+        Post.objects.create(text='Без группы', author=EventTests.author)
+        Post.objects.create(
+            text='В группе', author=EventTests.reader, group=EventTests.group
+        )
+        Post.objects.create(text='Ещё', author=EventTests.author)
+        self.broker.poll()
+        self.assertEqual(
+            [json.loads(event.payload)['text']
+             for event in group_listener.get(0)],
+            ['В группе']
+        )
+        self.assertFalse(group_listener.overflowed)
+        self.assertEqual(len(author_listener.get(0)), 1)
+        self.assertTrue(author_listener.overflowed)
+
+    def test_listener_cap(self):
+        """Сверх EVENTS_MAX_CONNECTIONS подписчики получают 503."""
+        with self.settings(EVENTS_MAX_CONNECTIONS=1):
+            first = self.guest_client.get('/api/v1/events/')
+            response = self.guest_client.get('/api/v1/events/')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '30')
+            first.close()
+            second = self.guest_client.get('/api/v1/events/')
+            self.assertEqual(second.status_code, 200)
+            second.close()
+
+    def test_async_wait(self):
+        """Асинхронное ожидание просыпается от события из другого потока."""
+        listener = self.broker.subscribe(events.matcher({}))
+        event = Event(pk=1, kind=Event.POST, post_id=1, author_id=1)
+
+        async def wait():
+            return await listener.aget(5)
+
+        threading.Timer(0.05, listener.put, [event]).start()
+        self.assertEqual(asyncio.run(wait()), [event])
+
+    def test_stream_replays_missed_events(self):
+        """После переподключения приходят пропущенные события ленты."""
+        Follow.objects.create(user=EventTests.reader, author=EventTests.author)
+        post = Post.objects.create(text='Подписка', author=EventTests.author)
+        Post.objects.create(text='Чужой', author=EventTests.reader)
+        Comment.objects.create(post=post, author=EventTests.reader, text='К')
+        response = self.authorized_client.get(
+            '/api/v1/follow/events/', HTTP_LAST_EVENT_ID='0'
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        self.assertEqual(
+            [(kind, data['text']) for kind, data in parse(next(chunks))],
+            [('post', 'Подписка'), ('comment', 'К')]
+        )
+        Post.objects.create(text='Новый', author=EventTests.author)
+        self.broker.poll()
+        self.assertEqual(
+            [data['text'] for _, data in parse(next(chunks))], ['Новый']
+        )
+        response.close()
+        self.assertFalse(self.broker.subscribers)
+
+    def test_group_stream(self):
+        """Поток группы отдаёт только её события."""
+        Post.objects.create(text='Вне группы', author=EventTests.author)
+        Post.objects.create(
+            text='В группе', author=EventTests.author, group=EventTests.group
+        )
+        response = self.guest_client.get(
+            '/api/v1/groups/group/events/', HTTP_LAST_EVENT_ID='0'
+        )
+        self.assertEqual(
+            [data['text'] for _, data in parse(
+                next(iter(response.streaming_content))
+            )],
+            ['В группе']
+        )
+        response.close()
+        response = self.guest_client.get('/api/v1/groups/missing/events/')
+        self.assertEqual(response.status_code, 404)
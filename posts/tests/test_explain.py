@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExplainFeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create(username='Author')
+        reader = User.objects.create(username='Reader')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(
+            text='Тестовый пост', author=author, group=group
+        )
+        Comment.objects.create(post=post, author=reader, text='Комментарий')
+
+    def test_feed_queries_use_indexes(self):
+        """Запросы лент читают индексы и не сортируют результат."""
+        out = StringIO()
+        call_command('explain_feeds', '--check', stdout=out)
+        self.assertIn('post_group_pub_date_idx', out.getvalue())
+        self.assertIn('post_author_pub_date_idx', out.getvalue())
+        self.assertIn('comment_post_created_idx', out.getvalue())
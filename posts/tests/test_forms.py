@@ -1,32 +1,21 @@
-import shutil
-import tempfile
+import hashlib
 
-from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.models import Comment, Group, Post, User
+from posts.tests.helpers import SMALL_GIF, TemporaryMediaMixin
 
 
-@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
-class PostFormTests(TestCase):
+class PostFormTests(TemporaryMediaMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
 
-        cls.small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x02\x00'
-            b'\x01\x00\x80\x00\x00\x00\x00\x00'
-            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
-            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
-            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
-            b'\x0A\x00\x3B'
-        )
-
         uploaded = SimpleUploadedFile(
             name='small.gif',
-            content=cls.small_gif,
+            content=SMALL_GIF,
             content_type='image/gif'
         )
 
@@ -49,11 +38,6 @@ class PostFormTests(TestCase):
             image=uploaded
         )
 
-    @classmethod
-    def tearDownClass(cls):
-        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
-        super().tearDownClass()
-
     def setUp(self):
         self.authorized_client = Client()
         self.authorized_client.force_login(PostFormTests.user)
@@ -79,7 +63,7 @@ class PostFormTests(TestCase):
         posts_count = Post.objects.count()
         uploaded = SimpleUploadedFile(
             name='small.gif',
-            content=PostFormTests.small_gif,
+            content=SMALL_GIF,
             content_type='image/gif'
         )
 
@@ -96,14 +80,48 @@ class PostFormTests(TestCase):
         self.assertRedirects(response, reverse('index'))
 
         self.assertEqual(Post.objects.count(), posts_count + 1)
+        digest = hashlib.sha256(SMALL_GIF).hexdigest()
         self.assertTrue(
             Post.objects.filter(
                 group=PostFormTests.group.id,
                 text='Тестовый пост',
-                image='posts/small.gif',
+                image=f'posts/{digest[:2]}/{digest[2:4]}/{digest}.gif',
             ).exists()
         )
 
+    def post_image(self, name):
+        uploaded = SimpleUploadedFile(
+            name=name,
+            content=SMALL_GIF,
+            content_type='image/gif'
+        )
+        return self.authorized_client.post(
+            reverse('new_post'),
+            data={'text': 'Пост с картинкой', 'image': uploaded}
+        )
+
+    @override_settings(MAX_UPLOAD_SIZE=16)
+    def test_new_post_rejects_large_upload(self):
+        """Файл больше MAX_UPLOAD_SIZE не сохраняется, форма
+        сообщает о размере."""
+        posts_count = Post.objects.count()
+        response = self.post_image('large.gif')
+        self.assertEqual(Post.objects.count(), posts_count)
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 16\xa0байт.'
+        )
+
+    @override_settings(IMAGE_MAX_PIXELS=1)
+    def test_new_post_rejects_too_many_pixels(self):
+        """Картинка больше IMAGE_MAX_PIXELS точек отклоняется."""
+        posts_count = Post.objects.count()
+        response = self.post_image('wide.gif')
+        self.assertEqual(Post.objects.count(), posts_count)
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большое изображение: 2×1 точек.'
+        )
+
     def test_edit_post(self):
         """Редактирование поста прошло успешно."""
         new_form_data = {
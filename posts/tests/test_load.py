@@ -0,0 +1,52 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, Follow, MediaFile, Post
+from posts.tests.helpers import TemporaryMediaMixin
+from users.models import Profile
+
+
+class LoadTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed_load', '--users', '30', '--groups', '3', '--posts', '200',
+            '--comments', '300', '--follows', '150', '--images', '2',
+            '--image-ratio', '0.5', stdout=StringIO()
+        )
+
+    def test_seed_load(self):
+        """Генератор создаёт посты с картинками, комментарии и подписки
+        с перекосом в пользу популярных авторов."""
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertGreater(Follow.objects.count(), 50)
+        top = Profile.objects.order_by('-followers_count').first()
+        self.assertEqual(top.user.username, 'load_0')
+        self.assertGreater(top.followers_count, Follow.objects.count() / 10)
+        with_image = Post.objects.exclude(image='').count()
+        self.assertGreater(with_image, 0)
+        self.assertEqual(
+            sum(MediaFile.objects.values_list('refs', flat=True)),
+            with_image
+        )
+
+    def test_bench_load_reports_json(self):
+        """Нагрузочный тест выдаёт перцентили и число запросов."""
+        out = StringIO()
+        call_command(
+            'bench_load', '--requests', '3', '--warmup', '1', stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['rows']['posts'], 200)
+        self.assertEqual(set(report['scenarios']), {
+            'index', 'follow_index', 'profile', 'post_view', 'add_comment',
+            'api_posts', 'api_follow'
+        })
+        for result in report['scenarios'].values():
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries_max'], 0)
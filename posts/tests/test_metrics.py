@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+from posts import metrics, views
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.guest_client = Client()
+        self.label = f'view="index",pid="{os.getpid()}"'
+
+    def scrape(self):
+        response = self.guest_client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_request_is_recorded(self):
+        """Время ответа, запросы, шаблоны и кэш видны в /metrics."""
+        self.guest_client.get('/')
+        self.guest_client.get('/')
+        text = self.scrape()
+        self.assertIn(
+            f'yatube_request_duration_seconds_count{{{self.label}}} 2', text
+        )
+        self.assertIn(
+            f'yatube_request_duration_seconds_bucket{{{self.label},le="+Inf"}}'
+            ' 2',
+            text
+        )
+        self.assertIn(
+            f'yatube_template_render_seconds_total{{{self.label}}}', text
+        )
+        self.assertIn(f'yatube_cache_hits_total{{{self.label}}}', text)
+        self.assertNotIn(f'yatube_db_queries_total{{{self.label}}} 0\n', text)
+
+    def test_counters_survive_cache_clear(self):
+        """Счётчики живут в памяти процесса, а не в кэше."""
+        self.guest_client.get('/')
+        cache.clear()
+        self.guest_client.get('/')
+        self.assertIn(
+            f'yatube_request_duration_seconds_count{{{self.label}}} 2',
+            self.scrape()
+        )
+
+    def test_processes_share_directory(self):
+        """С METRICS_DIR видны счётчики всех процессов с меткой pid."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, '1.json'), 'w') as file:
+            json.dump({'index': {'requests': 5, 'bucket_0': 5}}, file)
+        with self.settings(METRICS_DIR=directory):
+            self.guest_client.get('/')
+            text = self.scrape()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="index",pid="1"} 5',
+            text
+        )
+        self.assertIn(
+            f'yatube_request_duration_seconds_count{{{self.label}}} 1', text
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(directory, f'{os.getpid()}.json'))
+        )
+
+    def test_metrics_hidden_from_other_hosts(self):
+        """/metrics недоступен с адресов не из METRICS_ALLOWED_IPS."""
+        response = self.guest_client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 404)
+
+    def test_query_budget_fails_tests(self):
+        """Превышение бюджета запросов роняет тест."""
+        with mock.patch.object(views.index, 'query_budget', 0):
+            with self.assertRaises(metrics.QueryBudgetExceeded):
+                self.guest_client.get('/')
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_query_budget_is_logged(self):
+        """В работе превышение бюджета пишется в лог и в метрики."""
+        with mock.patch.object(views.index, 'query_budget', 0):
+            with self.assertLogs('posts.metrics', 'WARNING'):
+                response = self.guest_client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            f'yatube_query_budget_exceeded_total{{{self.label}}} 1',
+            self.scrape()
+        )
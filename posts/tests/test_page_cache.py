@@ -0,0 +1,125 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import page_cache
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.other = User.objects.create(username='Other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа', slug='other-slug',
+            description='Другое описание'
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+        cls.other_post = Post.objects.create(
+            text='Другой пост', author=cls.other, group=cls.other_group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        post = AnonymousPageCacheTests.post
+        other_post = AnonymousPageCacheTests.other_post
+        self.urls = {
+            'index': reverse('index'),
+            'group': reverse('group_posts', kwargs={'slug': 'test-slug'}),
+            'other_group': reverse(
+                'group_posts', kwargs={'slug': 'other-slug'}
+            ),
+            'profile': reverse('profile', kwargs={'username': 'Author'}),
+            'other_profile': reverse(
+                'profile', kwargs={'username': 'Other'}
+            ),
+            'post': reverse(
+                'post', kwargs={'username': 'Author', 'post_id': post.pk}
+            ),
+            'other_post': reverse('post', kwargs={
+                'username': 'Other', 'post_id': other_post.pk
+            }),
+        }
+
+    def warm(self):
+        for url in self.urls.values():
+            self.guest_client.get(url)
+
+    def assertCached(self, expected):
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.guest_client.get(url)
+                self.assertEqual(
+                    response.get('X-Page-Cache') == 'hit', name in expected
+                )
+
+    def test_second_request_is_served_from_cache(self):
+        """Повторный запрос гостя отдаётся из кэша без запросов к базе."""
+        url = self.urls['index']
+        self.assertEqual(self.guest_client.get(url)['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Тестовый пост')
+        self.assertEqual(page_cache.stats(), (1, 1))
+        self.assertNotEqual(
+            self.guest_client.get(url + '?page=2').get('X-Page-Cache'), 'hit'
+        )
+
+    def test_authorized_user_bypasses_cache(self):
+        """Страницы вошедшего пользователя не кэшируются."""
+        client = Client()
+        client.force_login(AnonymousPageCacheTests.author)
+        url = self.urls['index']
+        client.get(url)
+        self.assertFalse(client.get(url).has_header('X-Page-Cache'))
+
+    def test_new_post_invalidates_only_affected_pages(self):
+        """Новый пост сбрасывает главную, свою группу и профиль автора."""
+        self.warm()
+        Post.objects.create(
+            text='Новый пост', author=AnonymousPageCacheTests.author,
+            group=AnonymousPageCacheTests.group
+        )
+        self.assertCached({'other_group', 'other_profile', 'other_post'})
+
+    def test_comment_invalidates_post_and_cards(self):
+        """Комментарий сбрасывает страницу поста и ленты с его карточкой."""
+        self.warm()
+        Comment.objects.create(
+            post=AnonymousPageCacheTests.other_post,
+            author=AnonymousPageCacheTests.author, text='Комментарий'
+        )
+        self.assertCached({'group', 'profile', 'post'})
+
+    def test_moving_post_invalidates_both_groups(self):
+        """Перенос поста в другую группу сбрасывает обе группы."""
+        self.warm()
+        post = Post.objects.get(pk=AnonymousPageCacheTests.post.pk)
+        post.group = AnonymousPageCacheTests.other_group
+        post.save()
+        self.assertCached({'other_profile', 'other_post'})
+
+    def test_group_and_follow_changes(self):
+        """Правка группы и подписка сбрасывают только свои страницы."""
+        self.warm()
+        group = Group.objects.get(pk=AnonymousPageCacheTests.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        Follow.objects.create(
+            user=AnonymousPageCacheTests.other,
+            author=AnonymousPageCacheTests.author
+        )
+        self.assertCached({'index', 'other_group'})
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Group, Post
@@ -38,6 +41,9 @@ class PaginatorViewsTest(TestCase):
                 group=PaginatorViewsTest.group,
             )
 
+    def setUp(self):
+        cache.clear()
+
     def test_first_page_containse_ten_records(self):
         templates_names = {
             'index': {},
@@ -65,3 +71,57 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(
                     len(response.context.get('page').object_list), 3
                 )
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Курсорная пагинация проходит ленту вперёд и назад."""
+        first = PaginatorViewsTest.guest_client.get(reverse('index'))
+        next_cursor = first.context['page'].next_cursor
+        self.assertIsNotNone(next_cursor)
+        second = PaginatorViewsTest.guest_client.get(
+            reverse('index') + f'?cursor={next_cursor}'
+        )
+        page = second.context['page']
+        self.assertEqual(len(page.object_list), 3)
+        self.assertFalse(page.has_next())
+        self.assertEqual(
+            page.object_list,
+            list(first.context['page'].paginator.page(2).object_list)
+        )
+        back = PaginatorViewsTest.guest_client.get(
+            reverse('index') + f'?cursor={page.previous_cursor}'
+        )
+        self.assertEqual(
+            back.context['page'].object_list,
+            list(first.context['page'].object_list)
+        )
+        self.assertFalse(back.context['page'].has_previous())
+
+    def test_last_numbered_page_has_no_cursor(self):
+        """На последней и пустой номерной странице курсора дальше нет."""
+        last = PaginatorViewsTest.guest_client.get(
+            reverse('index') + '?page=2'
+        )
+        self.assertIsNone(last.context['page'].next_cursor)
+        Group.objects.create(title='Пустая группа', slug='empty-slug')
+        empty = PaginatorViewsTest.guest_client.get(
+            reverse('group_posts', kwargs={'slug': 'empty-slug'})
+        )
+        self.assertIsNone(empty.context['page'].next_cursor)
+
+    def test_cursor_page_skips_count(self):
+        """Курсорная страница не выполняет COUNT по всей таблице."""
+        with CaptureQueriesContext(connection) as queries:
+            PaginatorViewsTest.guest_client.get(
+                reverse('group_posts', kwargs={'slug': 'test-slug'})
+                + '?cursor='
+            )
+        self.assertFalse(
+            any('COUNT' in query['sql'] for query in queries.captured_queries)
+        )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = PaginatorViewsTest.guest_client.get(
+            reverse('index') + '?cursor=broken'
+        )
+        self.assertEqual(len(response.context['page'].object_list), 10)
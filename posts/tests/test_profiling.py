@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+from posts.models import SlowRequest
+from posts.profiling import Sampler
+
+User = get_user_model()
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@override_settings(
+    SLOW_REQUEST_PROFILING=True, SLOW_REQUEST_THRESHOLD_MS=0,
+    SLOW_REQUEST_SAMPLE_INTERVAL=0.001,
+    SLOW_REQUEST_PROFILE_DIR=tempfile.mkdtemp(dir=settings.BASE_DIR)
+)
+class SlowRequestTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.SLOW_REQUEST_PROFILE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    @mock.patch('posts.profiling.IDLE_TIMEOUT', 0)
+    def test_sampler_collects_stacks(self):
+        """Сэмплер снимает стеки только зарегистрированного потока."""
+        sampler = Sampler()
+        sampler.start(0.001)
+        thread = sampler.thread
+        busy_wait(0.05)
+        stacks = sampler.stop()
+        self.assertTrue(stacks)
+        self.assertTrue(all('busy_wait' in stack for stack in stacks))
+        thread.join(1)
+        self.assertIsNone(sampler.thread)
+
+    def test_slow_request_is_saved(self):
+        """Медленный запрос сохраняется с профилем на диске."""
+        self.guest_client.get('/')
+        slow_request = SlowRequest.objects.get()
+        self.assertEqual(slow_request.view, 'index')
+        path = os.path.join(
+            settings.SLOW_REQUEST_PROFILE_DIR, slow_request.profile
+        )
+        self.assertTrue(os.path.exists(path))
+
+    def test_rate_limit(self):
+        """Для одного view профиль пишется не чаще раза в интервал."""
+        self.guest_client.get('/')
+        self.guest_client.get('/')
+        self.assertEqual(SlowRequest.objects.count(), 1)
+
+    @override_settings(SLOW_REQUEST_RATE_LIMIT=0.001,
+                       SLOW_REQUEST_MAX_PROFILES=1)
+    def test_rotation(self):
+        """Старые профили удаляются вместе с файлами."""
+        self.guest_client.get('/')
+        first = SlowRequest.objects.get()
+        time.sleep(0.01)
+        self.guest_client.get('/')
+        self.assertEqual(SlowRequest.objects.count(), 1)
+        self.assertNotEqual(SlowRequest.objects.get().pk, first.pk)
+        self.assertFalse(os.path.exists(os.path.join(
+            settings.SLOW_REQUEST_PROFILE_DIR, first.profile
+        )))
+
+    def test_admin_lists_slow_requests(self):
+        """Медленные запросы видны в админке со стеками."""
+        self.guest_client.get('/')
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        slow_request = SlowRequest.objects.get(view='index')
+        response = client.get(
+            f'/admin/posts/slowrequest/{slow_request.pk}/change/'
+        )
+        self.assertContains(response, 'Самые частые стеки')
+        self.assertContains(
+            client.get('/admin/posts/slowrequest/'), 'index'
+        )
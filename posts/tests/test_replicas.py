@@ -0,0 +1,99 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import Client, TransactionTestCase, override_settings
+
+from posts.models import Group, Post
+from posts.replicas import LAG_KEY, ReplicaRouter, _state
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASES=['test_replica'])
+class ReplicaTests(TransactionTestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        settings.DATABASES['test_replica'] = {
+            **settings.DATABASES['default'], 'NAME': self.path,
+            'TEST': {'MIRROR': 'default'},
+        }
+        cache.clear()
+        self.user = User.objects.create(username='Reader')
+        self.author = User.objects.create(username='Author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.old_post = Post.objects.create(
+            text='Старый пост', author=self.author, group=self.group
+        )
+        call_command('sync_replicas', stdout=open(os.devnull, 'w'))
+        self.new_post = Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group
+        )
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        connections['test_replica'].close()
+        del connections['test_replica']
+        del settings.DATABASES['test_replica']
+        os.remove(self.path)
+
+    def test_feeds_are_read_from_replica(self):
+        """Ленты читаются с реплики и не видят ещё не доехавший пост."""
+        for url in ('/', '/group/group/', '/Author/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Старый пост')
+                self.assertNotContains(response, 'Новый пост')
+
+    def test_writer_reads_own_writes(self):
+        """После записи пользователь читает с основной базы."""
+        self.client.post(
+            f'/Author/{self.old_post.pk}/comment', {'text': 'Комментарий'}
+        )
+        response = self.client.get('/')
+        self.assertContains(response, 'Новый пост')
+        guest = Client().get('/group/group/')
+        self.assertNotContains(guest, 'Новый пост')
+
+    def test_stale_replica_reads_are_not_cached(self):
+        """Сразу после сдвига версий прочитанное с реплики не кэшируется."""
+        self.new_post.save()
+        guest = Client()
+        for client in (guest, self.client):
+            self.assertNotContains(client.get('/'), 'Новый пост')
+        cache.delete(LAG_KEY)
+        call_command('sync_replicas', stdout=open(os.devnull, 'w'))
+        for client in (guest, self.client):
+            self.assertContains(client.get('/'), 'Новый пост')
+
+    def test_stale_replica_reads_have_no_etag(self):
+        """Сразу после сдвига версий ответ с реплики отдаётся без ETag."""
+        self.new_post.save()
+        guest = Client()
+        for client in (guest, self.client):
+            response = client.get('/')
+            self.assertNotContains(response, 'Новый пост')
+            self.assertFalse(response.has_header('ETag'))
+        cache.delete(LAG_KEY)
+        self.assertTrue(guest.get('/').has_header('ETag'))
+
+    def test_writes_and_transactions_use_default(self):
+        """Запись и чтение внутри транзакции идут в основную базу."""
+        router = ReplicaRouter()
+        _state.replica = 'test_replica'
+        try:
+            self.assertEqual(router.db_for_read(Post), 'test_replica')
+            self.assertEqual(router.db_for_read(User), 'default')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Post), 'default')
+            self.assertEqual(router.db_for_write(Post), 'default')
+            self.assertEqual(router.db_for_read(Post), 'default')
+        finally:
+            _state.replica, _state.wrote = None, False
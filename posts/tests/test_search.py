@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post
+from posts.stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_stem(self):
+        """Разные формы слова приводятся к одной основе."""
+        words = {
+            'котах': 'кот',
+            'коты': 'кот',
+            'красивая': 'красив',
+            'публикации': 'публикац',
+            'говорить': 'говор',
+            'ёлки': 'елк',
+        }
+        for word, expected in words.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+
+@override_settings(SEARCH_BACKEND='fts5')
+class Fts5SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='TestName')
+        cls.cats = Post.objects.create(
+            text='Пишу про котов и снова про котов', author=cls.user
+        )
+        cls.dogs = Post.objects.create(
+            text='Собаки тоже хорошие, но коты лучше', author=cls.user
+        )
+        cls.other = Post.objects.create(
+            text='Про погоду', author=cls.user
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.other, author=cls.user, text='А у меня живёт кот'
+        )
+
+    def test_search_finds_word_forms_ranked(self):
+        """Поиск находит формы слова и ранжирует по частоте."""
+        results = search.search_posts('котах')
+        self.assertEqual(results.count(), 3)
+        self.assertEqual(results[0], self.cats)
+
+    def test_search_requires_all_words(self):
+        """Пост должен содержать все слова запроса."""
+        results = search.search_posts('хорошая собака')
+        self.assertEqual(list(results[0:10]), [self.dogs])
+
+    def test_search_follows_edit_and_delete(self):
+        """Индекс обновляется при изменении и удалении."""
+        post = Post.objects.get(pk=self.other.pk)
+        post.text = 'Про зиму'
+        post.save()
+        self.assertEqual(list(search.search_posts('зима')[0:10]), [post])
+        self.assertEqual(search.search_posts('погода').count(), 0)
+        Comment.objects.get(pk=self.comment.pk).delete()
+        self.assertEqual(search.search_posts('кот').count(), 2)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке отбирает посты и комментарии через индекс."""
+        self.assertCountEqual(
+            search.matching_post_ids('коты'),
+            [self.cats.pk, self.dogs.pk, self.other.pk]
+        )
+        self.assertEqual(
+            search.matching_comment_ids('коты'), [self.comment.pk]
+        )
+
+    def test_search_page(self):
+        """Страница поиска выводит найденные записи постранично."""
+        for number in range(11):
+            Post.objects.create(text=f'Кот номер {number}', author=self.user)
+        response = Client().get(reverse('search'), {'q': 'кот'})
+        self.assertEqual(response.context['page'].paginator.count, 14)
+        self.assertEqual(len(response.context['page'].object_list), 10)
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82&amp;page=2')
+        response = Client().get(reverse('search'), {'q': 'кот', 'page': 2})
+        self.assertEqual(len(response.context['page'].object_list), 4)
+
+
+@override_settings(SEARCH_BACKEND='simple')
+class SimpleSearchTests(Fts5SearchTests):
+    pass
@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import tempfile
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from yatube.sqlite.base import DatabaseWrapper
+
+
+class SQLiteBackendTests(TransactionTestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        self.wrapper = DatabaseWrapper(
+            {**connection.settings_dict, 'NAME': self.path,
+             'OPTIONS': {'pragmas': {'busy_timeout': 1234}}},
+            alias='sqlite_test'
+        )
+
+    def tearDown(self):
+        self.wrapper.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def pragma(self, name):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        """Соединение открывается в WAL с ожиданием блокировок."""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 1234)
+        self.assertGreater(self.pragma('mmap_size'), 0)
+
+    def test_transaction_takes_write_lock(self):
+        """Транзакция сразу берёт блокировку на запись."""
+        self.wrapper.ensure_connection()
+        self.wrapper._start_transaction_under_autocommit()
+        other = sqlite3.connect(self.path, timeout=0)
+        try:
+            with self.assertRaisesMessage(
+                sqlite3.OperationalError, 'locked'
+            ):
+                other.execute('BEGIN IMMEDIATE')
+        finally:
+            other.close()
+            self.wrapper.connection.rollback()
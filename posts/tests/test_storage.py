@@ -0,0 +1,85 @@
+import os
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import storage
+from posts.models import MediaFile, Post
+from posts.tests.helpers import SMALL_GIF, TemporaryMediaMixin
+
+User = get_user_model()
+
+OTHER_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\x00\xFF\x00')
+
+
+class ContentAddressedStorageTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='TestName')
+
+    def create_post(self, name, content=SMALL_GIF):
+        return Post.objects.create(
+            text='Тестовый пост',
+            author=ContentAddressedStorageTests.user,
+            image=SimpleUploadedFile(name, content, 'image/gif')
+        )
+
+    def refs(self, name):
+        return MediaFile.objects.get(name=name).refs
+
+    def collect(self):
+        storage.collect(timezone.now() + timedelta(seconds=1))
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом с двумя ссылками."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name,
+            r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.gif$'
+        )
+        directory = os.path.dirname(default_storage.path(first.image.name))
+        self.assertEqual(len(os.listdir(directory)), 1)
+        self.assertEqual(self.refs(first.image.name), 2)
+
+    def test_file_is_collected_after_last_reference(self):
+        """Файл удаляется сборщиком только когда на него нет ссылок."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        name = first.image.name
+        first.delete()
+        self.collect()
+        self.assertTrue(default_storage.exists(name))
+        second.delete()
+        self.assertEqual(self.refs(name), 0)
+        self.collect()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+
+    def test_replaced_image_is_released(self):
+        """Замена картинки отпускает ссылку на старый файл."""
+        post = self.create_post('first.gif')
+        old_name = post.image.name
+        post.image = SimpleUploadedFile('other.gif', OTHER_GIF, 'image/gif')
+        post.save()
+        self.assertEqual(self.refs(old_name), 0)
+        self.assertEqual(self.refs(post.image.name), 1)
+
+    def test_grace_period_and_reuse_keep_file(self):
+        """Недавно осиротевший или снова загруженный файл не удаляется."""
+        post = self.create_post('first.gif')
+        name = post.image.name
+        post.delete()
+        call_command('collect_media', stdout=open(os.devnull, 'w'))
+        self.assertTrue(default_storage.exists(name))
+        self.create_post('again.gif')
+        self.collect()
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(self.refs(name), 1)
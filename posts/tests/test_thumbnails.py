@@ -0,0 +1,157 @@
+import io
+import json
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from PIL import Image
+
+from jobs.models import Job
+from jobs.queue import work
+from posts.models import MediaFile, Post
+from posts.tests.helpers import SMALL_GIF, TemporaryMediaMixin
+from posts.thumbnails import generate_thumbnail, variant_formats
+
+User = get_user_model()
+
+
+class ThumbnailTests(TemporaryMediaMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='TestName')
+
+    def create_post(self, name='small.gif', content=SMALL_GIF):
+        return Post.objects.create(
+            text='Тестовый пост',
+            author=ThumbnailTests.user,
+            image=SimpleUploadedFile(name, content, 'image/gif')
+        )
+
+    def large_image(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 500), 'teal').save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def test_card_shows_placeholder_until_thumbnail_is_ready(self):
+        """Карточка показывает заглушку, пока миниатюра не готова."""
+        post = self.create_post()
+        response = Client().get(reverse('index'))
+        self.assertContains(response, 'Изображение обрабатывается')
+        url = generate_thumbnail(post.pk, post.image.name)
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, url)
+        response = Client().get(reverse(
+            'post', kwargs={'username': 'TestName', 'post_id': post.pk}
+        ))
+        self.assertContains(response, f'<img class="card-img" src="{url}"')
+
+    def test_thumbnail_is_built_by_worker(self):
+        """Сохранение поста только ставит задачу, миниатюру строит
+        воркер."""
+        post = self.create_post()
+        post.save()
+        self.assertEqual(Job.objects.get().queue, 'thumbnails')
+        self.assertEqual(work(['thumbnails'], threading.Event(), True), 1)
+        post.refresh_from_db()
+        self.assertNotEqual(post.thumbnail, '')
+
+    def test_cached_pages_show_thumbnail_once_built(self):
+        """Готовая миниатюра сменяет заглушку в закэшированных лентах
+        гостя и пользователя."""
+        post = self.create_post()
+        user_client = Client()
+        user_client.force_login(ThumbnailTests.user)
+        clients = (Client(), user_client)
+        etags = []
+        for client in clients:
+            response = client.get(reverse('index'))
+            self.assertContains(response, 'Изображение обрабатывается')
+            etags.append(response['ETag'])
+        self.assertEqual(work(['thumbnails'], threading.Event(), True), 1)
+        post.refresh_from_db()
+        for client, etag in zip(clients, etags):
+            with self.subTest(client=client):
+                response = client.get(
+                    reverse('index'), HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertContains(response, post.image_srcset)
+
+    def test_new_image_resets_thumbnail(self):
+        """Замена картинки сбрасывает старую миниатюру."""
+        post = self.create_post()
+        generate_thumbnail(post.pk, post.image.name)
+        post.refresh_from_db()
+        post.text = 'Новый текст'
+        post.save()
+        self.assertNotEqual(post.thumbnail, '')
+        post.image = SimpleUploadedFile('other.gif', SMALL_GIF, 'image/gif')
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, '')
+
+    def test_variants_for_each_width_and_format(self):
+        """Варианты строятся для ширин не больше исходной во всех
+        доступных форматах, запасной JPEG — шириной с карточку."""
+        post = self.create_post('large.png', self.large_image())
+        url = generate_thumbnail(post.pk, post.image.name)
+        post.refresh_from_db()
+        srcsets = json.loads(post.srcsets)
+        self.assertEqual(sorted(srcsets), sorted(variant_formats()))
+        for format, srcset in srcsets.items():
+            with self.subTest(format=format):
+                self.assertEqual(
+                    [source.split()[1] for source in srcset.split(', ')],
+                    ['960w', '640w', '320w']
+                )
+        self.assertIn(f'{url} 960w', post.image_srcset)
+        response = Client().get(reverse('index'))
+        for type, srcset in post.image_sources:
+            self.assertContains(
+                response, f'<source type="{type}" srcset="{srcset}"'
+            )
+
+    def test_variant_names_depend_on_content(self):
+        """Одинаковые картинки дают одни и те же файлы вариантов."""
+        first = self.create_post('first.png', self.large_image())
+        second = self.create_post('second.png', self.large_image())
+        self.assertEqual(
+            generate_thumbnail(first.pk, first.image.name),
+            generate_thumbnail(second.pk, second.image.name)
+        )
+
+    def test_variants_follow_exif_orientation(self):
+        """Варианты повёрнуты по EXIF и не содержат метаданных."""
+        image = Image.new('RGB', (400, 1000), 'blue')
+        image.paste('red', (0, 0, 400, 500))
+        exif = image.getexif()
+        exif[0x0112] = 6
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', exif=exif.tobytes())
+        post = self.create_post('rotated.jpg', buffer.getvalue())
+        raw_name = post.image.name
+        url = generate_thumbnail(post.pk, post.image.name)
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, raw_name)
+        self.assertEqual(
+            MediaFile.objects.get(name=raw_name).refs, 0
+        )
+        with default_storage.open(post.image.name) as file:
+            original = Image.open(file)
+            original.load()
+        self.assertEqual(original.size, (1000, 400))
+        self.assertEqual(dict(original.getexif()), {})
+        self.assertNotIn('exif', original.info)
+        with default_storage.open(url[len(settings.MEDIA_URL):]) as file:
+            variant = Image.open(file)
+            variant.load()
+        self.assertEqual(variant.size, (960, 339))
+        self.assertFalse(variant.getexif())
+        left, right = variant.getpixel((60, 170)), variant.getpixel((900, 170))
+        self.assertGreater(left[2], left[0])
+        self.assertGreater(right[0], right[2])
@@ -0,0 +1,87 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from jobs.queue import work
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='Reader')
+        cls.author = User.objects.create(username='Author')
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.author
+        )
+
+    def test_follow_backfills_timeline(self):
+        """Подписка добавляет в ленту уже опубликованные посты автора."""
+        Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.author
+        )
+        self.assertEqual(
+            list(timeline.follow_feed(TimelineTests.reader)),
+            [TimelineTests.old_post]
+        )
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост раскладывается в ленты подписчиков."""
+        Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.author
+        )
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=TimelineTests.reader, post=post
+        ).exists())
+        self.assertEqual(
+            list(timeline.follow_feed(TimelineTests.reader)),
+            [post, TimelineTests.old_post]
+        )
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка удаляет посты автора из ленты."""
+        follow = Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.author
+        )
+        follow.delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=TimelineTests.reader).exists()
+        )
+        self.assertEqual(list(timeline.follow_feed(TimelineTests.reader)), [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_read_on_demand(self):
+        """Посты популярного автора подмешиваются при чтении ленты."""
+        Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.author
+        )
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(
+            list(timeline.follow_feed(TimelineTests.reader)),
+            [post, TimelineTests.old_post]
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_author_no_longer_popular_is_backfilled(self):
+        """Посты, опубликованные в популярности, остаются в лентах, когда
+        подписчиков становится меньше TIMELINE_FANOUT_LIMIT."""
+        other = User.objects.create(username='Other')
+        Follow.objects.create(
+            user=TimelineTests.reader, author=TimelineTests.author
+        )
+        Follow.objects.create(user=other, author=TimelineTests.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        Follow.objects.get(user=other).delete()
+        self.assertEqual(work(['default'], threading.Event(), True), 1)
+        self.assertEqual(
+            list(timeline.follow_feed(TimelineTests.reader)),
+            [post, TimelineTests.old_post]
+        )
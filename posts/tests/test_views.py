@@ -1,10 +1,12 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -54,6 +56,7 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = PostPagesTests.user
         self.authorized_client = Client()
@@ -191,18 +194,49 @@ class PostPagesTests(TestCase):
         self.assertEqual(response.context['user_post'], PostPagesTests.post)
 
     def test_index_page_cache(self):
-        """Записи Index хранятся в кэше и обновлялся раз в 20 секунд"""
+        """Записи index хранятся в кэше, пока лента не изменилась."""
         response_1 = self.authorized_client.get(reverse('index'))
+        Post.objects.filter(pk=PostPagesTests.post.pk).update(
+            text='Изменение в обход сигналов'
+        )
+        response_2 = self.authorized_client.get(reverse('index'))
+        self.assertEqual(response_1.content, response_2.content)
         Post.objects.create(
-            text='Тестовый текст для кэша',
+            text='Новый пост',
             author=PostPagesTests.user,
             group=PostPagesTests.group,
         )
-        response_2 = self.authorized_client.get(reverse('index'))
-        self.assertEqual(response_1.content, response_2.content)
-        cache.clear()
         response_3 = self.authorized_client.get(reverse('index'))
         self.assertNotEqual(response_2.content, response_3.content)
+        self.assertContains(response_3, 'Новый пост')
+
+    def test_index_cache_is_per_user(self):
+        """Кэш index не показывает кнопки автора другим пользователям."""
+        edit_url = reverse('post_edit', kwargs={
+            'username': PostPagesTests.user.username,
+            'post_id': PostPagesTests.post.id
+        })
+        response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, edit_url)
+        response = self.authorized_client2.get(reverse('index'))
+        self.assertNotContains(response, edit_url)
+
+    def test_follow_cache_is_per_user(self):
+        """Кэш ленты подписок у каждого пользователя свой."""
+        response = self.authorized_client1.get(reverse('follow_index'))
+        self.assertContains(response, PostPagesTests.post.text)
+        response = self.authorized_client2.get(reverse('follow_index'))
+        self.assertNotContains(response, PostPagesTests.post.text)
+
+    def test_follow_cache_is_invalidated_by_follow(self):
+        """Подписка сразу обновляет закэшированную ленту подписок."""
+        response = self.authorized_client2.get(reverse('follow_index'))
+        self.assertNotContains(response, PostPagesTests.post.text)
+        Follow.objects.create(
+            user=PostPagesTests.user2, author=PostPagesTests.user
+        )
+        response = self.authorized_client2.get(reverse('follow_index'))
+        self.assertContains(response, PostPagesTests.post.text)
 
     def test_following_authorized_client(self):
         """Авторизованный пользователь может подписаться"""
@@ -244,3 +278,60 @@ class PostPagesTests(TestCase):
         response = self.authorized_client2.get(reverse('follow_index'))
         post_count1 = len(response.context.get('page').object_list)
         self.assertEqual(post_count, post_count1)
+
+
+class FeedQueriesTests(TestCase):
+    # Запрос состояния страницы для ETag входит в бюджет.
+    FEED_QUERY_LIMIT = 7
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.add_posts(1)
+
+    @classmethod
+    def add_posts(cls, count):
+        for number in range(count):
+            post = Post.objects.create(
+                text=f'Тестовый пост {number}',
+                author=cls.author,
+                group=cls.group
+            )
+            Comment.objects.create(
+                post=post, author=cls.reader, text='Комментарий'
+            )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(FeedQueriesTests.reader)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_feed_queries_do_not_depend_on_page_size(self):
+        """Число запросов ленты не зависит от числа постов на странице."""
+        urls = (
+            reverse('index'),
+            reverse('group_posts', kwargs={'slug': 'test-slug'}),
+            reverse('profile', kwargs={'username': 'Author'}),
+            reverse('follow_index'),
+        )
+        single = {url: self.count_queries(url) for url in urls}
+        FeedQueriesTests.add_posts(9)
+        for url in urls:
+            with self.subTest(url=url):
+                queries = self.count_queries(url)
+                self.assertEqual(queries, single[url])
+                self.assertLessEqual(queries, self.FEED_QUERY_LIMIT)
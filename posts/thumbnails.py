@@ -0,0 +1,244 @@
+"""Фоновая подготовка картинок для карточек постов.
+
+После сохранения поста с новой картинкой воркер очереди задач
+(``manage.py run_workers``, очередь ``thumbnails``) строит набор
+вариантов: ширины ``IMAGE_VARIANT_WIDTHS`` в форматах
+``IMAGE_VARIANT_FORMATS``. Картинка декодируется один раз, меньшие
+размеры получаются из большего. Хранилище называет файлы по хешу
+содержимого, они никогда не меняются, поэтому их можно кэшировать
+навсегда, а повторно загруженная картинка берёт готовые варианты. Адрес
+запасного JPEG записывается в ``Post.thumbnail``, значения srcset по
+форматам — в ``Post.srcsets``; пока миниатюры нет, шаблоны показывают
+заглушку. Тот же шаг заменяет загруженный оригинал копией, повёрнутой
+по EXIF и сохранённой без метаданных (EXIF с координатами съёмки, XMP),
+а исходный файл отпускает.
+"""
+import io
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from jobs.queue import enqueue
+
+from . import feed_cache, page_cache
+from .models import Post
+from .storage import acquire, release
+
+logger = logging.getLogger(__name__)
+
+CARD_WIDTH = 960
+CARD_RATIO = 339 / 960
+
+EXIF_ORIENTATION = 0x0112
+ROTATED = (5, 6, 7, 8)
+XMP_KEYS = ('xmp', 'XML:com.adobe.xmp')
+ORIGINAL_OPTIONS = {
+    'JPEG': {'quality': 92},
+    'WEBP': {'quality': 92},
+}
+
+ENCODERS = {
+    'avif': ('AVIF', {'quality': 60}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_formats():
+    Image.init()
+    return [
+        format for format in settings.IMAGE_VARIANT_FORMATS
+        if ENCODERS[format][0] in Image.SAVE
+    ]
+
+
+def card_size(width):
+    return width, round(width * CARD_RATIO)
+
+
+def variant_widths(source_width):
+    """Ширины не больше исходной; крошечные картинки растягиваются до
+    наименьшей ширины, чтобы карточка сохранила пропорции."""
+    widths = sorted(settings.IMAGE_VARIANT_WIDTHS)
+    return [width for width in widths if width <= source_width] or widths[:1]
+
+
+def encode(image, format):
+    name, options = ENCODERS[format]
+    buffer = io.BytesIO()
+    image.save(buffer, name, **options)
+    return buffer.getvalue()
+
+
+def oriented_size(image):
+    if image.getexif().get(EXIF_ORIENTATION) in ROTATED:
+        return image.height, image.width
+    return image.size
+
+
+def strip_metadata(source):
+    """Байты картинки, повёрнутой по EXIF и сохранённой без метаданных,
+    или None, если метаданных нет. Анимации остаются как есть."""
+    with Image.open(source) as image:
+        if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+            raise OSError('Слишком большое изображение')
+        if getattr(image, 'is_animated', False) or not (
+            image.getexif() or any(key in image.info for key in XMP_KEYS)
+        ):
+            return None
+        format = image.format
+        options = dict(ORIGINAL_OPTIONS.get(format, {}))
+        if image.info.get('icc_profile'):
+            options['icc_profile'] = image.info['icc_profile']
+        cleaned = ImageOps.exif_transpose(image)
+    cleaned.info = {}
+    buffer = io.BytesIO()
+    cleaned.save(buffer, format, **options)
+    return buffer.getvalue()
+
+
+def clean_original(image_name):
+    """Имя оригинала без метаданных; файл без них остаётся прежним."""
+    with default_storage.open(image_name, 'rb') as source:
+        content = strip_metadata(source)
+    if content is None:
+        return image_name
+    return default_storage.save(
+        os.path.join(
+            Post._meta.get_field('image').upload_to,
+            os.path.basename(image_name)
+        ),
+        ContentFile(content)
+    )
+
+
+def render_variants(source):
+    """Возвращает список (формат, ширина, высота, байты).
+
+    Картинка поворачивается по EXIF, а сами метаданные в варианты не
+    попадают.
+    """
+    with Image.open(source) as image:
+        if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+            raise OSError('Слишком большое изображение')
+        width, height = oriented_size(image)
+        widths = variant_widths(width)
+        largest = card_size(widths[-1])
+        rotated = (width, height) != image.size
+        image.draft('RGB', largest[::-1] if rotated else largest)
+        resized = ImageOps.fit(
+            ImageOps.exif_transpose(image).convert('RGB'),
+            largest, Image.LANCZOS
+        )
+    formats = variant_formats()
+    variants = []
+    for width in reversed(widths):
+        size = card_size(width)
+        if resized.size != size:
+            resized = resized.resize(size, Image.LANCZOS)
+        variants.extend(
+            (format, *size, encode(resized, format)) for format in formats
+        )
+    return variants
+
+
+def store(content, format):
+    return default_storage.url(
+        default_storage.save(f'variants/card.{format}', ContentFile(content))
+    )
+
+
+def fallback_url(variants):
+    jpegs = [
+        (width, url) for format, width, url in variants if format == 'jpeg'
+    ]
+    fitting = [jpeg for jpeg in jpegs if jpeg[0] <= CARD_WIDTH]
+    return max(fitting or jpegs)[1]
+
+
+def srcsets(variants):
+    result = {}
+    for format, width, url in variants:
+        result.setdefault(format, []).append(f'{url} {width}w')
+    return json.dumps(
+        {format: ', '.join(sources) for format, sources in result.items()}
+    )
+
+
+def variant_names(srcsets):
+    """Имена файлов вариантов в хранилище по значению ``Post.srcsets``."""
+    try:
+        sources = json.loads(srcsets)
+    except ValueError:
+        return []
+    if not isinstance(sources, dict):
+        return []
+    names = set()
+    for srcset in sources.values():
+        for source in str(srcset).split(', '):
+            url = source.rsplit(' ', 1)[0]
+            if url.startswith(settings.MEDIA_URL):
+                names.add(url[len(settings.MEDIA_URL):])
+    return sorted(names)
+
+
+def render(post_id, image_name):
+    """Готовые варианты той же картинки берутся у другого поста,
+    иначе строятся заново. Возвращает (адрес JPEG, srcsets)."""
+    ready = Post.objects.filter(image=image_name).exclude(
+        pk=post_id
+    ).exclude(thumbnail='').values_list('thumbnail', 'srcsets').first()
+    if ready is not None and variant_names(ready[1]):
+        acquire(variant_names(ready[1]))
+        return ready
+    with default_storage.open(image_name, 'rb') as source:
+        rendered = render_variants(source)
+    variants = [
+        (format, width, store(content, format))
+        for format, width, height, content in rendered
+    ]
+    return fallback_url(variants), srcsets(variants)
+
+
+def generate_thumbnail(post_id, image_name):
+    """Очищает оригинал, строит варианты картинки и сохраняет их, если
+    она не сменилась.
+
+    Запись одна — UPDATE с условием на то же имя картинки; если пост
+    успели изменить или удалить, ссылки на очищенный оригинал и варианты
+    отпускаются, иначе отпускается исходный файл. UPDATE не вызывает
+    сигналов, поэтому кэши страниц поста и лент сбрасываются здесь же:
+    иначе в них осталась бы заглушка.
+    """
+    original = image_name
+    try:
+        original = clean_original(image_name)
+        url, sources = render(post_id, original)
+    except OSError:
+        logger.warning('Не удалось построить миниатюру поста %s', post_id)
+        if original != image_name:
+            release([original])
+        return None
+    replaced = [image_name] if original != image_name else []
+    if not Post.objects.filter(pk=post_id, image=image_name).update(
+        image=original, thumbnail=url, srcsets=sources
+    ):
+        release(variant_names(sources) + [original] * bool(replaced))
+        return None
+    release(replaced)
+    post = Post.objects.select_related('author', 'group').get(pk=post_id)
+    feed_cache.bump_feed_version()
+    page_cache.invalidate(*page_cache.post_scopes(post))
+    return url
+
+
+def schedule_thumbnail(post_id, image_name):
+    enqueue(
+        generate_thumbnail, post_id, image_name, queue='thumbnails',
+        key=f'thumbnail:{post_id}:{image_name}'
+    )
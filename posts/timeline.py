@@ -0,0 +1,159 @@
+"""Лента подписок, материализованная при записи (fan-out-on-write).
+
+Каждый новый пост раскладывается в ``TimelineEntry`` подписчиков автора,
+поэтому чтение ленты — один диапазон индекса по записям пользователя.
+Посты авторов, у которых подписчиков больше ``TIMELINE_FANOUT_LIMIT``,
+не раскладываются, а подмешиваются при чтении (fan-out-on-read). Кто
+популярен, и при записи, и при чтении решает один счётчик
+``Profile.followers_count``. Когда автор перестаёт быть популярным, его
+посты больше не подмешиваются, поэтому задача ``backfill_followers``
+раскладывает недавние посты по лентам оставшихся подписчиков.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, Max, Q
+
+from jobs.queue import enqueue
+from users.models import Profile
+
+from .models import Follow, Post, TimelineEntry
+
+
+def _entries(user_ids, posts):
+    return [
+        TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for user_id in user_ids
+        for pk, pub_date in posts
+    ]
+
+
+def _followers(author_id):
+    if is_popular(author_id):
+        return []
+    return list(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+    )
+
+
+def fan_out(post):
+    TimelineEntry.objects.bulk_create(
+        _entries(_followers(post.author_id), [(post.pk, post.pub_date)]),
+        ignore_conflicts=True
+    )
+
+
+def fan_out_many(posts):
+    """Раскладывает пачку постов, читая подписчиков каждого автора раз."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append((post.pk, post.pub_date))
+    TimelineEntry.objects.bulk_create(
+        [
+            entry
+            for author_id, author_posts in by_author.items()
+            for entry in _entries(_followers(author_id), author_posts)
+        ],
+        ignore_conflicts=True
+    )
+
+
+def backfill(user_id, author_id):
+    if is_popular(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        _entries([user_id], posts), ignore_conflicts=True
+    )
+
+
+def backfill_many(pairs):
+    """Заполняет ленты новых подписчиков, читая посты каждого автора раз."""
+    by_author = defaultdict(list)
+    for user_id, author_id in pairs:
+        by_author[author_id].append(user_id)
+    for author_id, user_ids in by_author.items():
+        if is_popular(author_id):
+            continue
+        posts = Post.objects.filter(author_id=author_id).values_list(
+            'pk', 'pub_date'
+        )[:settings.TIMELINE_BACKFILL]
+        TimelineEntry.objects.bulk_create(
+            _entries(user_ids, posts), ignore_conflicts=True
+        )
+
+
+def backfill_followers(author_id):
+    """Задача очереди: раскладывает недавние посты автора, который
+    перестал быть популярным, по лентам его подписчиков."""
+    if is_popular(author_id):
+        return
+    posts = list(Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:settings.TIMELINE_BACKFILL])
+    followers = list(Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True))
+    for start in range(0, len(followers), 100):
+        TimelineEntry.objects.bulk_create(
+            _entries(followers[start:start + 100], posts),
+            ignore_conflicts=True, batch_size=1000
+        )
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты отписавшегося; вызывается после
+    уменьшения счётчика подписчиков."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    if Profile.objects.filter(
+        user_id=author_id, followers_count=settings.TIMELINE_FANOUT_LIMIT
+    ).exists():
+        enqueue(
+            backfill_followers, author_id,
+            key=f'timeline:backfill:{author_id}'
+        )
+
+
+def is_popular(author_id):
+    return Profile.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).exists()
+
+
+def popular_author_ids(user):
+    return list(Follow.objects.filter(
+        user=user,
+        author__profile__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).values_list('author_id', flat=True))
+
+
+def latest_pub_date(user):
+    """Время последнего поста в ленте подписок, по индексам без JOIN."""
+    dates = [TimelineEntry.objects.filter(user=user).aggregate(
+        latest=Max('pub_date')
+    )['latest']]
+    popular = popular_author_ids(user)
+    if popular:
+        dates.append(Post.objects.filter(author_id__in=popular).aggregate(
+            latest=Max('pub_date')
+        )['latest'])
+    return max(filter(None, dates), default=None)
+
+
+def follow_feed(user):
+    popular = popular_author_ids(user)
+    if popular:
+        return Post.objects.filter(
+            Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+            | Q(author_id__in=popular)
+        )
+    return Post.objects.filter(timeline_entries__user=user).annotate(
+        feed_date=F('timeline_entries__pub_date'),
+        feed_post=F('timeline_entries__post'),
+    ).order_by('-feed_date', '-feed_post')
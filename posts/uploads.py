@@ -0,0 +1,46 @@
+"""Потоковый приём загружаемых файлов с ограничением размера.
+
+Файл пишется на диск частями по 64 КБ, в памяти держится только
+текущая часть. Когда получено больше
+``MAX_UPLOAD_SIZE`` байт, временный файл удаляется, остаток запроса
+дочитывается без записи, а форма получает ``RejectedUpload`` с причиной
+отказа.
+"""
+import io
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+
+
+class RejectedUpload(UploadedFile):
+
+    def __init__(self, name, content_type, size, rejection):
+        super().__init__(io.BytesIO(), name, content_type, size)
+        self.rejection = rejection
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= settings.MAX_UPLOAD_SIZE:
+            return super().receive_data_chunk(raw_data, start)
+        if not self.file.closed:
+            self.file.close()
+        return None
+
+    def file_complete(self, file_size):
+        if self.received <= settings.MAX_UPLOAD_SIZE:
+            return super().file_complete(file_size)
+        return RejectedUpload(
+            self.file_name, self.content_type, self.received,
+            'Файл больше {}.'.format(
+                filesizeformat(settings.MAX_UPLOAD_SIZE)
+            )
+        )
@@ -2,30 +2,41 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-
+from django.utils.http import urlencode
+
+from . import timeline
+from .conditional import (
+    conditional_page, group_state, index_state, post_state, profile_state
+)
+from .counters import profile_for
+from .feed_cache import feed_cache_context
 from .forms import CommentForm, PostForm
+from .metrics import query_budget
 from .models import Comment, Follow, Group, Post
+from .paginator import POSTS_PER_PAGE, paginate
+from .replicas import replica_reads
+from .search import search_posts
 
 User = get_user_model()
 
 
+@query_budget(6)
+@replica_reads
+@conditional_page(index_state)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = paginate(request, Post.objects.for_feed())
     return render(
         request, 'index.html',
-        {'page': page, 'is_short': True}
+        {'page': page, 'is_short': True, **feed_cache_context()}
     )
 
 
+@query_budget(7)
+@replica_reads
+@conditional_page(group_state)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = paginate(request, group.posts.for_feed())
     return render(
         request, 'group.html',
         {
@@ -34,6 +45,20 @@ def group_posts(request, slug):
         })
 
 
+@query_budget(10)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page = Paginator(search_posts(query), POSTS_PER_PAGE).get_page(
+        request.GET.get('page')
+    )
+    return render(
+        request, 'search.html',
+        {
+            'query': query, 'page': page, 'is_short': True,
+            'page_query': urlencode({'q': query}) + '&'
+        })
+
+
 @login_required
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -45,32 +70,40 @@ def new_post(request):
     return render(request, 'new.html', {'form': form})
 
 
+@query_budget(8)
+@replica_reads
+@conditional_page(profile_state)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    user_posts = user.posts.all()
-    post_count = user_posts.count()
-    paginator = Paginator(user_posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    following_count = user.follower.all().count()
-    follower_count = user.following.all().count()
+    user = get_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    counts = profile_for(user)
+    page = paginate(request, user.posts.for_feed())
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
-        author__username=username).exists()
+        author=user).exists()
     return render(
         request, 'profile.html', {
-            'author': user, 'post_count': post_count,
-            'following_count': following_count,
-            'follower_count': follower_count,
+            'author': user, 'post_count': counts.posts_count,
+            'following_count': counts.following_count,
+            'follower_count': counts.followers_count,
             'page': page, 'following': following, 'is_short': True
         })
 
 
+@query_budget(6)
+@replica_reads
+@conditional_page(post_state)
 def post_view(request, username, post_id):
-    user_post = get_object_or_404(Post, author__username=username, id=post_id)
-    post_count = user_post.author.posts.count()
+    user_post = get_object_or_404(
+        Post.objects.for_feed().select_related('author__profile'),
+        author__username=username, id=post_id
+    )
+    post_count = profile_for(user_post.author).posts_count
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post__id=post_id)
+    comments = Comment.objects.filter(post__id=post_id).select_related(
+        'author'
+    ).order_by('created')
     return render(
         request, 'post.html',
         {
@@ -111,6 +144,7 @@ def server_error(request):
     return render(request, 'misc/500.html', status=500)
 
 
+@query_budget(11)
 @login_required
 def add_comment(request, username, post_id):
     post = get_object_or_404(Post, author__username=username, id=post_id)
@@ -127,17 +161,21 @@ def add_comment(request, username, post_id):
     )
 
 
+@query_budget(6)
+@replica_reads
 @login_required
 def follow_index(request):
-    author_posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(author_posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(
-        request, 'follow.html', {'page': page, 'paginator': paginator}
+    page = paginate(
+        request, timeline.follow_feed(request.user).for_feed()
     )
+    return render(
+        request, 'follow.html', {
+            'page': page, 'paginator': page.paginator,
+            **feed_cache_context(request.user)
+        })
 
 
+@query_budget(12)
 @login_required
 def profile_follow(request, username):
     follow_user = get_object_or_404(User, username=username)
@@ -146,6 +184,7 @@ def profile_follow(request, username):
     return redirect('profile', username=username)
 
 
+@query_budget(12)
 @login_required
 def profile_unfollow(request, username):
     unfollow_user = get_object_or_404(User, username=username)
@@ -0,0 +1,13 @@
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+
+
+def send_welcome_email(user):
+    """Письмо после регистрации; попадает в очередь писем (mailer)."""
+    if not user.email:
+        return
+    send_mail(
+        'Добро пожаловать в Yatube',
+        render_to_string('welcome_email.txt', {'user': user}),
+        None, [user.email]
+    )
@@ -1,6 +1,7 @@
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 
+from .emails import send_welcome_email
 from .forms import CreationForm
 
 
@@ -8,3 +9,8 @@ class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('signup')
     template_name = 'signup.html'
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        send_welcome_email(self.object)
+        return response
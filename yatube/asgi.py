@@ -0,0 +1,210 @@
+"""Точка входа ASGI: ``uvicorn yatube.asgi:application``.
+
+Django 2.2 не умеет асинхронные view, поэтому приложение здесь — мост:
+событийный цикл сервера принимает соединения и читает тело запроса во
+временный файл (большое тело уходит на диск, а тело длиннее
+``body_limit()`` отклоняется ответом 413), а Django выполняется в
+ограниченном пуле из ``ASGI_THREADS`` потоков.
+Медленный запрос занимает один поток пула, а не весь воркер: остальные
+соединения принимаются и ждут свободный поток, а не очередь сокета.
+Потоковые ответы отдаются по частям; если клиент отключился, итератор
+ответа закрывается.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+wsgi_application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402 (после django.setup())
+
+executor = ThreadPoolExecutor(
+    settings.ASGI_THREADS, thread_name_prefix='asgi'
+)
+
+
+def _latin1(text):
+    return text.encode('utf-8').decode('latin-1')
+
+
+def wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': _latin1(scope.get('root_path', '')),
+        'PATH_INFO': _latin1(scope['path']),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = f'HTTP_{key}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def run_wsgi(environ):
+    """Вызывает Django; обычный ответ читается целиком сразу."""
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [int(status.split()[0]), [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ]]
+
+    response = wsgi_application(environ, start_response)
+    if getattr(response, 'streaming', False):
+        return started, None, response
+    try:
+        return started, b''.join(response), None
+    finally:
+        response.close()
+
+
+def body_limit():
+    # Файл до MAX_UPLOAD_SIZE и поля формы до DATA_UPLOAD_MAX_MEMORY_SIZE.
+    # Лишнее тело не читается вовсе, а файл чуть больше лимита
+    # отклоняет LimitedUploadHandler с понятной ошибкой в форме.
+    return settings.MAX_UPLOAD_SIZE + (
+        settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0
+    )
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+def declared_length(scope):
+    for name, value in scope.get('headers', []):
+        if name.lower() == b'content-length' and value.isdigit():
+            return int(value)
+    return 0
+
+
+async def read_body(receive, limit):
+    """Читает тело во временный файл; ``None``, если клиент отключился."""
+    body = tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    try:
+        received = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            chunk = message.get('body', b'')
+            received += len(chunk)
+            if received > limit:
+                raise BodyTooLarge
+            body.write(chunk)
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+    except BaseException:
+        body.close()
+        raise
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def threaded(response, loop):
+    chunks = iter(response)
+    while True:
+        chunk = await loop.run_in_executor(executor, next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def stream(response, receive, send, loop):
+    # Ответ с async_content (события SSE) ждёт данных в событийном цикле,
+    # остальные потоковые ответы читаются в пуле потоков.
+    chunks = getattr(response, 'async_content', None)
+    if chunks is None:
+        chunks = threaded(response, loop)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        async for chunk in chunks:
+            if disconnected.done():
+                break
+            if chunk:
+                await send({
+                    'type': 'http.response.body', 'body': chunk,
+                    'more_body': True,
+                })
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+        await chunks.aclose()
+        await loop.run_in_executor(executor, response.close)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # Ожидание незаконченных запросов не должно держать цикл.
+            await asyncio.to_thread(executor.shutdown)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        raise ValueError(f'Протокол {scope["type"]} не поддерживается')
+    limit = body_limit()
+    try:
+        if declared_length(scope) > limit:
+            raise BodyTooLarge
+        body = await read_body(receive, limit)
+    except BodyTooLarge:
+        await send({
+            'type': 'http.response.start', 'status': 413,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        })
+        await send({
+            'type': 'http.response.body', 'body': b'Request body too large',
+        })
+        return
+    if body is None:
+        return
+    loop = asyncio.get_running_loop()
+    with body:
+        (status, headers), content, response = await loop.run_in_executor(
+            executor, run_wsgi, wsgi_environ(scope, body)
+        )
+    await send({
+        'type': 'http.response.start', 'status': status, 'headers': headers,
+    })
+    if response is None:
+        await send({'type': 'http.response.body', 'body': content})
+    else:
+        await stream(response, receive, send, loop)
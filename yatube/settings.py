@@ -19,6 +19,9 @@ INSTALLED_APPS = [
     'about',
     'users',
     'posts',
+    'api',
+    'jobs',
+    'mailer',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -30,14 +33,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'posts.profiling.SlowRequestMiddleware',
+    'posts.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'posts.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'posts.page_cache.AnonymousPageCacheMiddleware',
 ]
 
 INTERNAL_IPS = [
@@ -49,7 +56,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'posts.metrics.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -64,15 +71,40 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Мост ASGI (yatube/asgi.py) выполняет Django в пуле из ASGI_THREADS потоков.
+ASGI_APPLICATION = 'yatube.asgi.application'
+ASGI_THREADS = int(os.environ.get('YATUBE_ASGI_THREADS', 8))
 
 
+# yatube.sqlite включает WAL и ожидание блокировок, см. yatube/sqlite/base.py.
+# Соединение живёт CONN_MAX_AGE секунд и переиспользуется запросами.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики только для чтения: YATUBE_REPLICAS=путь1,путь2. Ленты читаются
+# с них, запись и чтение сразу после записи идут в default. Локально
+# реплики — копии файла SQLite, их обновляет manage.py sync_replicas.
+# В тестах чтение с реплик выключено (yatube/testing.py).
+REPLICA_DATABASES = []
+for number, name in enumerate(
+    filter(None, os.environ.get('YATUBE_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'], 'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{number}')
+DATABASE_ROUTERS = ['posts.replicas.ReplicaRouter']
+# Допустимое отставание реплик: столько секунд после записи автор читает
+# с default, а прочитанное с реплик не кэшируется. Отметки хранятся в
+# кэше, поэтому с несколькими воркерами нужен общий YATUBE_CACHE.
+REPLICA_STICKY_SECONDS = 5
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,16 +138,140 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Файлы называются по хешу содержимого и не дублируются; файлы без
+# ссылок удаляет collect_media спустя MEDIA_GC_GRACE секунд.
+DEFAULT_FILE_STORAGE = 'posts.storage.ContentAddressedStorage'
+MEDIA_GC_GRACE = 3600
 
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = 'index'
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма сначала попадают в очередь (mailer/spool.py), а воркер отправляет
+# их через MAIL_SPOOL_BACKEND: file пишет в sent_emails/, smtp — на
+# EMAIL_HOST:EMAIL_PORT. Выбирается переменной YATUBE_MAIL_BACKEND.
+EMAIL_BACKEND = 'mailer.backends.SpoolBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+MAIL_BACKENDS = {
+    'file': 'django.core.mail.backends.filebased.EmailBackend',
+    'smtp': 'django.core.mail.backends.smtp.EmailBackend',
+    'console': 'django.core.mail.backends.console.EmailBackend',
+}
+MAIL_SPOOL_BACKEND = MAIL_BACKENDS[
+    os.environ.get('YATUBE_MAIL_BACKEND', 'file')
+]
+EMAIL_HOST = os.environ.get('YATUBE_EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('YATUBE_EMAIL_PORT', 25))
+EMAIL_TIMEOUT = 30
+
+# Кэш выбирается переменной окружения YATUBE_CACHE: locmem годится только
+# для одного процесса, file и db общие для всех воркеров без внешних
+# сервисов, redis и memcached — для продакшена.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        os.path.join(BASE_DIR, 'cache'),
+    ),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'yatube_cache'),
+    'redis': ('django_redis.cache.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'memcached': (
+        'django.core.cache.backends.memcached.MemcachedCache',
+        '127.0.0.1:11211',
+    ),
+}
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE', 'locmem')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]
+        ),
+        'KEY_PREFIX': 'yatube',
+        'TIMEOUT': 300,
     }
 }
+
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.db' if CACHE_BACKEND == 'locmem'
+    else 'django.contrib.sessions.backends.cached_db'
+)
+SESSION_CACHE_ALIAS = 'default'
+THUMBNAIL_CACHE = 'default'
+
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BACKFILL = 500
+
+FEED_CACHE_TIMEOUT = 300
+# Целые страницы для анонимных посетителей; сигналы сбрасывают только
+# затронутые страницы, остальное живёт PAGE_CACHE_TIMEOUT секунд.
+PAGE_CACHE_TIMEOUT = 60
+
+# auto: FTS5, если SQLite собран с ним, иначе индекс в таблице SearchTerm.
+SEARCH_BACKEND = 'auto'
+SEARCH_ADMIN_LIMIT = 1000
+
+# Ширины вариантов картинки поста для srcset и форматы в порядке
+# предпочтения; JPEG обязателен как запасной для старых браузеров.
+# Форматы, которые не умеет кодировать установленный Pillow, пропускаются.
+IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1920)
+IMAGE_VARIANT_FORMATS = ('avif', 'webp', 'jpeg')
+
+# Загрузки всегда пишутся во временный файл на диске и обрываются после
+# MAX_UPLOAD_SIZE байт; картинки больше IMAGE_MAX_PIXELS точек
+# отклоняются по заголовку, не декодируясь.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.LimitedUploadHandler']
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000
+
+# Метрики для Prometheus отдаются на /metrics только с этих адресов.
+METRICS_ALLOWED_IPS = INTERNAL_IPS
+# Каталог, куда процессы сбрасывают свои счётчики, чтобы /metrics любого
+# воркера отдавал счётчики всех; без него — только счётчики ответившего
+# процесса. Очищайте каталог при выкладке.
+METRICS_DIR = os.environ.get('YATUBE_METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = 5
+# Превышение бюджета запросов view пишется в лог, а в тестах роняет тест
+# (TEST_RUNNER и conftest.py включают QUERY_BUDGET_RAISE).
+QUERY_BUDGET_RAISE = False
+TEST_RUNNER = 'yatube.testing.TestRunner'
+
+# Сэмплирующий профилировщик запросов дольше SLOW_REQUEST_THRESHOLD_MS;
+# включается переменной окружения YATUBE_PROFILE_SLOW=1.
+SLOW_REQUEST_PROFILING = os.environ.get('YATUBE_PROFILE_SLOW') == '1'
+SLOW_REQUEST_THRESHOLD_MS = 500
+SLOW_REQUEST_SAMPLE_INTERVAL = 0.005
+SLOW_REQUEST_RATE_LIMIT = 60
+SLOW_REQUEST_MAX_PROFILES = 200
+SLOW_REQUEST_PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# События лент для SSE (posts/events.py): outbox читается раз в
+# EVENTS_POLL_INTERVAL секунд, пустая строка уходит раз в EVENTS_KEEPALIVE.
+EVENTS_MAX_CONNECTIONS = 500
+EVENTS_QUEUE_SIZE = 100
+EVENTS_REPLAY = 100
+EVENTS_POLL_INTERVAL = 1
+EVENTS_KEEPALIVE = 15
+EVENTS_RETENTION = 24 * 60 * 60
+
+# Очередь фоновых задач (jobs/queue.py), воркеры — manage.py run_workers.
+# Очереди с большим приоритетом разбираются первыми; упавшая задача
+# повторяется через JOBS_RETRY_DELAY * 2**(попытка - 1) секунд, но не реже
+# раза в JOBS_RETRY_MAX_DELAY; задачу, которую воркер держит дольше
+# JOBS_LEASE секунд, забирает другой воркер.
+JOBS_QUEUES = {'mail': 20, 'thumbnails': 10, 'default': 0}
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10
+JOBS_RETRY_MAX_DELAY = 60 * 60
+JOBS_LEASE = 10 * 60
+JOBS_POLL_INTERVAL = 1
+
+# Письма уходят пачками по MAIL_BATCH_SIZE через одно соединение на воркер,
+# не чаще MAIL_RATE_LIMIT в секунду; временные ошибки повторяются через
+# MAIL_RETRY_DELAY * 2**(попытка - 1) секунд, до MAIL_MAX_ATTEMPTS раз.
+MAIL_BATCH_SIZE = 50
+MAIL_RATE_LIMIT = 10
+MAIL_MAX_ATTEMPTS = 8
+MAIL_RETRY_DELAY = 60
+MAIL_RETRY_MAX_DELAY = 60 * 60
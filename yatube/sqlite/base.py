@@ -0,0 +1,40 @@
+"""SQLite, настроенный для работы под нагрузкой.
+
+При открытии соединения включаются WAL (читатели не ждут писателя),
+``synchronous=NORMAL``, чтение через mmap и кэш страниц побольше, а
+``busy_timeout`` заставляет писателя ждать блокировку, а не падать с
+«database is locked». Транзакции начинаются с ``BEGIN IMMEDIATE``:
+отложенная транзакция, которая сначала читает, а потом пишет, получает
+SQLITE_BUSY сразу, без ожидания, если базу успел изменить сосед.
+Значения PRAGMA можно переопределить в ``OPTIONS['pragmas']``.
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20_000,
+    'cache_size': -64_000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = {
+            **PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})
+        }
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,26 @@
+"""Настройки, которые действуют только в тестах.
+
+``manage.py test`` включает их через ``TEST_RUNNER``, pytest — через
+``conftest.py`` в корне проекта. Превышение бюджета запросов роняет
+тест, а реплики не используются: Django 2.2 открывает для зеркал
+отдельные соединения, и данные тестовой транзакции на них не видны.
+"""
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+TEST_SETTINGS = {
+    'QUERY_BUDGET_RAISE': True,
+    'REPLICA_DATABASES': [],
+}
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(**TEST_SETTINGS)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,13 +1,19 @@
+import os
+
 from django.conf import settings
 from django.conf.urls import handler404, handler500
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from posts.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/v1/', include('api.urls', namespace='api')),
     path('', include('posts.urls')),
     path('about/', include('about.urls', namespace='about')),
 ]
@@ -17,8 +23,10 @@ handler500 = 'posts.views.server_error'
 
 if settings.DEBUG:
     import debug_toolbar
+    # Оригиналы картинок с EXIF не публикуются, только варианты.
     urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
+        f'{settings.MEDIA_URL}variants/',
+        document_root=os.path.join(settings.MEDIA_ROOT, 'variants')
     )
     urlpatterns += static(
         settings.STATIC_URL, document_root=settings.STATIC_ROOT